@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+CLI Latency Benchmark
+=====================
+Measures the wall time of the non-interactive subcommands against a
+temporary HOME and fails when one exceeds its latency budget.
+
+Budgets are end to end, interpreter start-up included. `python -c pass` is
+timed in the same run and printed alongside, to show how much of each
+median no code in gitsw can remove.
+
+Usage:
+    python3 benchmarks/bench_cli.py [--runs 30] [--profiles 50] [--budget-ms 50]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ENTRY_POINT = REPO_ROOT / 'gitsw.py'
+
+# Median latency budgets in milliseconds, including interpreter start-up.
+BUDGETS_MS = {
+    'use': 50.0,
+    'current': 50.0,
+    'list': 50.0,
+}
+
+def make_home(root: Path, profile_count: int) -> Dict[str, str]:
+    """Create a throwaway HOME with a profile store and return its environment."""
+    profiles = {
+        f'user{i}': {
+            'name': f'user{i}',
+            'email': f'user{i}@example.com',
+            'ssh_key': str(root / '.ssh' / f'id_rsa_user{i}')
+        }
+        for i in range(profile_count)
+    }
+    (root / '.ssh').mkdir(mode=0o700)
+    (root / '.git_profiles.json').write_text(json.dumps(profiles, indent=2), encoding='utf-8')
+    (root / '.gitconfig').write_text('[user]\n\tname = user0\n\temail = user0@example.com\n', encoding='utf-8')
+    # Fresh health results, so `use` doesn't start a background connection test
+    # that competes with the next sample for the CPU
+    health = {username: {'success': True, 'latency': 0.1, 'error': '', 'checked_at': time.time()}
+              for username in profiles}
+    (root / '.git_profiles_health.json').write_text(json.dumps(health), encoding='utf-8')
+
+    env = os.environ.copy()
+    env['HOME'] = str(root)
+    env['USERPROFILE'] = str(root)
+    env['GIT_CONFIG_NOSYSTEM'] = '1'
+    env.pop('GIT_CONFIG_GLOBAL', None)
+    # Measure an installed tool, which has its bytecode cache in place.
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return env
+
+def time_command(argv: List[str], env: Dict[str, str], runs: int, cwd: Path) -> List[float]:
+    """Run a subcommand repeatedly and return wall times in milliseconds."""
+    return time_process([sys.executable, str(ENTRY_POINT)] + argv, env, runs, cwd)
+
+def time_process(argv: List[str], env: Dict[str, str], runs: int, cwd: Path) -> List[float]:
+    """Run a command line repeatedly and return wall times in milliseconds."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(argv, env=env, cwd=str(cwd), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        samples.append((time.perf_counter() - start) * 1000)
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(argv)} failed: {result.stderr.decode(errors='replace')}")
+    return samples
+
+def main() -> int:
+    """Run the benchmark and enforce the latency budgets."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=30)
+    parser.add_argument('--profiles', type=int, default=50)
+    parser.add_argument('--budget-ms', type=float, default=None, help="override the 'use' budget")
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS_MS)
+    if args.budget_ms is not None:
+        budgets['use'] = args.budget_ms
+
+    with tempfile.TemporaryDirectory() as tmp:
+        home = Path(tmp)
+        env = make_home(home, args.profiles)
+        commands = {
+            'use': ['use', 'user1'],
+            'current': ['current'],
+            'list': ['list'],
+        }
+
+        time_command(['list'], env, 1, home)  # warm the bytecode cache
+        baseline = statistics.median(time_process([sys.executable, '-c', 'pass'], env, args.runs, home))
+
+        failed = False
+        print(f"python -c pass: {baseline:.1f}ms (included below)")
+        print(f"{'command':<10} {'median':>9} {'p95':>9} {'gitsw':>9} {'budget':>9}")
+        for name, argv in commands.items():
+            samples = sorted(time_command(argv, env, args.runs, home))
+            median = statistics.median(samples)
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            over = median > budgets[name]
+            failed = failed or over
+            marker = '  OVER BUDGET' if over else ''
+            print(f"{name:<10} {median:>7.1f}ms {p95:>7.1f}ms {median - baseline:>7.1f}ms "
+                  f"{budgets[name]:>7.1f}ms{marker}")
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
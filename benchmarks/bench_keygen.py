@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+SSH Key Algorithm Benchmark
+===========================
+Compares the key types `gitsw add --key-type` offers:
+
+- keygen:  wall time of `ssh-keygen -t <type>` (what `add` waits for)
+- sign:    private-key signing cost, the client's share of every SSH
+           handshake, measured with `ssh-keygen -Y sign` over many files in
+           one process so start-up cost is subtracted out
+- pubkey:  public key size in bytes (what GitHub stores and the client sends)
+
+Usage:
+    python3 benchmarks/bench_keygen.py [--runs 5] [--signatures 200]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# (label, key type, bits) in the order they are reported
+ALGORITHMS: List[Tuple[str, str, Optional[int]]] = [
+    ('ed25519', 'ed25519', None),
+    ('ecdsa-256', 'ecdsa', 256),
+    ('ecdsa-384', 'ecdsa', 384),
+    ('rsa-2048', 'rsa', 2048),
+    ('rsa-3072', 'rsa', 3072),
+    ('rsa-4096', 'rsa', 4096),
+]
+
+def generate(key_file: Path, key_type: str, bits: Optional[int]) -> float:
+    """Generate one key and return the wall time in milliseconds."""
+    cmd = ['ssh-keygen', '-q', '-t', key_type, '-N', '', '-C', 'bench', '-f', str(key_file)]
+    if bits:
+        cmd[4:4] = ['-b', str(bits)]
+    start = time.perf_counter()
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+def sign(key_file: Path, files: List[Path]) -> float:
+    """Sign files in one ssh-keygen process and return the wall time in milliseconds."""
+    for path in files:
+        Path(f"{path}.sig").unlink(missing_ok=True)
+    start = time.perf_counter()
+    subprocess.run(['ssh-keygen', '-Y', 'sign', '-f', str(key_file), '-n', 'git'] + [str(p) for p in files],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+def main() -> int:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='keys generated per algorithm')
+    parser.add_argument('--signatures', type=int, default=200, help='signatures per measurement')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        payloads = []
+        for i in range(args.signatures):
+            payload = root / f'payload{i}'
+            payload.write_bytes(b'session-id and user-auth request stand-in\n')
+            payloads.append(payload)
+
+        print(f"{'algorithm':<10} {'keygen':>10} {'keygen max':>11} {'sign':>9} {'pubkey':>7}")
+        for label, key_type, bits in ALGORITHMS:
+            times = []
+            for run in range(args.runs):
+                key_file = root / f'{label}-{run}'
+                times.append(generate(key_file, key_type, bits))
+
+            key_file = root / f'{label}-0'
+            single = min(sign(key_file, payloads[:1]) for _ in range(3))
+            batch = min(sign(key_file, payloads) for _ in range(3))
+            per_signature = max(0.0, batch - single) / max(1, args.signatures - 1)
+            pubkey = len(Path(f"{key_file}.pub").read_bytes())
+
+            print(f"{label:<10} {statistics.median(times):>8.1f}ms {max(times):>9.1f}ms "
+                  f"{per_signature:>7.3f}ms {pubkey:>6}B")
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
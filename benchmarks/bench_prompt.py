@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Prompt Cost Benchmark
+=====================
+Measures what showing the active profile in PS1 costs per prompt render:
+
+- shell:  the `gitsw prompt --shell-init` function with a fresh state file
+          (shell builtins only, no fork)
+- fresh:  `gitsw prompt` served from the state file
+- stale:  `gitsw prompt` after ~/.gitconfig changed (reads git, rewrites state)
+- current: `gitsw current`, the pre-existing way to get the same answer
+
+Usage:
+    python3 benchmarks/bench_prompt.py [--runs 30] [--shell-calls 1000] [--budget-ms 5]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from bench_cli import ENTRY_POINT, make_home, time_command
+
+def touch_config(home: Path) -> None:
+    """Make ~/.gitconfig newer than the state file."""
+    config = home / '.gitconfig'
+    stamp = time.time() + 1
+    os.utime(config, (stamp, stamp))
+
+def time_stale_prompt(env: Dict[str, str], runs: int, home: Path) -> List[float]:
+    """Time `prompt` when the state file is stale on every run."""
+    samples = []
+    for _ in range(runs):
+        touch_config(home)
+        samples.extend(time_command(['prompt'], env, 1, home))
+        # Leave the state file older than the next touch
+        os.utime(home / '.git_profiles_state', (0, 0))
+    return samples
+
+def time_shell_function(env: Dict[str, str], calls: int, home: Path) -> float:
+    """Return the per-call cost of the shell function in milliseconds."""
+    init = subprocess.run([sys.executable, str(ENTRY_POINT), 'prompt', '--shell-init'],
+                          env=env, capture_output=True, text=True, check=True).stdout
+    script = init + f'for i in $(seq {calls}); do p=$(__gitsw_ps1); done; printf "%s" "$p"'
+    start = time.perf_counter()
+    subprocess.run(['bash', '-c', 'true'], env=env, check=True)
+    baseline = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = subprocess.run(['bash', '-c', script], env=env, cwd=str(home), capture_output=True, text=True)
+    elapsed = time.perf_counter() - start - baseline
+    if result.stdout != 'user0':
+        raise RuntimeError(f"shell function printed {result.stdout!r}")
+    return elapsed * 1000 / calls
+
+def summarize(samples: List[float]) -> str:
+    """Format median and p95."""
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return f"{statistics.median(samples):>7.2f}ms {p95:>7.2f}ms"
+
+def main() -> int:
+    """Run the benchmark; fails when the shell function exceeds its budget."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=30)
+    parser.add_argument('--shell-calls', type=int, default=1000)
+    parser.add_argument('--profiles', type=int, default=50)
+    parser.add_argument('--budget-ms', type=float, default=5.0, help='per-render budget for the shell function')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        home = Path(tmp)
+        env = make_home(home, args.profiles)
+        time_command(['prompt'], env, 1, home)  # warm the bytecode cache and write the state file
+
+        print(f"{'mode':<10} {'median':>9} {'p95':>9}")
+        if shutil.which('bash'):
+            # Command substitution forks a subshell per call, as PS1 does
+            per_call = time_shell_function(env, args.shell_calls, home)
+            print(f"{'shell':<10} {per_call:>7.2f}ms {'':>9}")
+        else:
+            per_call = 0.0
+            print(f"{'shell':<10} {'skipped (no bash)':>19}")
+        print(f"{'fresh':<10} {summarize(time_command(['prompt'], env, args.runs, home))}")
+        print(f"{'stale':<10} {summarize(time_stale_prompt(env, args.runs, home))}")
+        print(f"{'current':<10} {summarize(time_command(['current'], env, args.runs, home))}")
+
+    if per_call > args.budget_ms:
+        print(f"shell function over its {args.budget_ms:.1f}ms budget")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
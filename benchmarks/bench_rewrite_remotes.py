@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Bulk Remote Rewrite Benchmark
+=============================
+Builds a workspace of real git repositories (clones, a linked worktree and
+a bare repository) under a temporary directory and times
+`gitsw rewrite-remotes` over it, first as a dry run and then for real.
+
+Usage:
+    python3 benchmarks/bench_rewrite_remotes.py [--repos 1000] [--jobs 8] [--budget-s 5]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ENTRY_POINT = REPO_ROOT / 'gitsw.py'
+
+CONFIG_TEMPLATE = """[core]
+\trepositoryformatversion = 0
+\tfilemode = true
+\tbare = {bare}
+[remote "origin"]
+\turl = {url}
+\tfetch = +refs/heads/*:refs/remotes/origin/*
+[branch "main"]
+\tremote = origin
+\tmerge = refs/heads/main
+"""
+
+def make_repository(path: Path, url: str, bare: bool = False) -> None:
+    """Create the on-disk layout git recognises, without spawning git."""
+    git_dir = path if bare else path / '.git'
+    for sub in ('objects', 'refs/heads', 'refs/tags'):
+        (git_dir / sub).mkdir(parents=True, exist_ok=True)
+    (git_dir / 'HEAD').write_text('ref: refs/heads/main\n', encoding='utf-8')
+    (git_dir / 'config').write_text(
+        CONFIG_TEMPLATE.format(bare='true' if bare else 'false', url=url), encoding='utf-8')
+
+def make_workspace(root: Path, count: int) -> None:
+    """Create `count` repositories spread over org directories."""
+    for i in range(count):
+        org = root / f'org{i % 20}'
+        url = f'https://github.com/org{i % 20}/repo{i}.git' if i % 2 else f'git@github.com:org{i % 20}/repo{i}.git'
+        make_repository(org / f'repo{i}', url)
+
+    # A linked worktree of repo0 and a bare mirror
+    main_git = root / 'org0' / 'repo0' / '.git'
+    worktree_git = main_git / 'worktrees' / 'feature'
+    worktree_git.mkdir(parents=True)
+    (worktree_git / 'commondir').write_text('../..\n', encoding='utf-8')
+    worktree = root / 'org0' / 'repo0-feature'
+    worktree.mkdir()
+    (worktree / '.git').write_text(f'gitdir: {worktree_git}\n', encoding='utf-8')
+    make_repository(root / 'mirrors' / 'repo0.git', 'git@github.com:org0/repo0.git', bare=True)
+
+def main() -> int:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repos', type=int, default=1000)
+    parser.add_argument('--jobs', type=int, default=8)
+    parser.add_argument('--budget-s', type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        home = Path(tmp)
+        workspace = home / 'work'
+        make_workspace(workspace, args.repos)
+        profiles = {'bench': {'name': 'bench', 'email': 'bench@example.com', 'ssh_key': str(home / 'key')}}
+        (home / '.git_profiles.json').write_text(json.dumps(profiles), encoding='utf-8')
+
+        env = os.environ.copy()
+        env['HOME'] = str(home)
+        failed = False
+        for label, extra in (('dry run', ['--dry-run']), ('rewrite', [])):
+            start = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, str(ENTRY_POINT), 'rewrite-remotes', str(workspace),
+                 '--profile', 'bench', '--jobs', str(args.jobs)] + extra,
+                env=env, capture_output=True, text=True
+            )
+            elapsed = time.perf_counter() - start
+            summary = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else result.stderr
+            over = elapsed > args.budget_s
+            failed = failed or over or result.returncode != 0
+            print(f"{label:<8} {elapsed:6.2f}s  {summary}{'  OVER BUDGET' if over else ''}")
+
+        check = subprocess.run(['git', '--git-dir', str(workspace / 'org0' / 'repo0' / '.git'),
+                                'config', 'remote.origin.url'], capture_output=True, text=True)
+        print(f"git reads back: {check.stdout.strip()}")
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
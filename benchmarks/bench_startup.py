@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Start-up Benchmark
+==================
+Guards the cold-start cost of the read-only subcommands, which is mostly
+Python importing modules before any work happens:
+
+- imports:  `python -X importtime` per command; fails when a module that
+            only some paths need (browser, getpass, shutil, SQLite, CSV,
+            thread pools, ...) is imported, or when git_profile_manager's
+            cumulative import time exceeds its target
+- wall:     median wall time of the same commands
+
+Usage:
+    python3 benchmarks/bench_startup.py [--runs 20] [--import-target-ms 15]
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from bench_cli import ENTRY_POINT, make_home, time_command
+
+COMMANDS = {
+    'current': ['current'],
+    'list': ['list'],
+    'use': ['use', 'user1'],
+    'prompt': ['prompt'],
+}
+
+# Modules only the paths that need them may import
+DEFERRED_MODULES = (
+    'webbrowser', 'getpass', 'platform', 'shutil', 'tempfile', 'sqlite3', 'csv',
+    'concurrent.futures', 'ssh_config', 'known_hosts', 'ssh_agent',
+)
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+def import_times(argv: List[str], env: Dict[str, str], cwd: Path) -> Dict[str, Tuple[int, int]]:
+    """Return {module: (self us, cumulative us)} for one run of a subcommand."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', str(ENTRY_POINT)] + argv,
+        env=env, cwd=str(cwd), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv)} failed: {result.stderr}")
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return modules
+
+def main() -> int:
+    """Run the benchmark; fails on deferred imports or an import time over target."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--profiles', type=int, default=50)
+    parser.add_argument('--import-target-ms', type=float, default=15.0,
+                        help="cumulative import budget for git_profile_manager")
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        home = Path(tmp)
+        env = make_home(home, args.profiles)
+        time_command(['prompt'], env, 1, home)  # warm the bytecode cache and write the state file
+
+        print(f"{'command':<10} {'wall':>9} {'manager':>9} {'total':>9}  deferred imports")
+        for name, argv in COMMANDS.items():
+            # Best of a few runs, so one slow disk read does not fail the check
+            runs = [import_times(argv, env, home) for _ in range(3)]
+            modules = min(runs, key=lambda found: found.get('git_profile_manager', (0, 0))[1])
+            manager_ms = modules.get('git_profile_manager', (0, 0))[1] / 1000
+            total_ms = sum(own for own, _ in modules.values()) / 1000
+            leaked = [module for module in DEFERRED_MODULES if module in modules]
+            wall = statistics.median(time_command(argv, env, args.runs, home))
+
+            over = manager_ms > args.import_target_ms
+            failed = failed or over or bool(leaked)
+            marker = '  OVER TARGET' if over else ''
+            print(f"{name:<10} {wall:>7.1f}ms {manager_ms:>7.1f}ms {total_ms:>7.1f}ms  "
+                  f"{', '.join(leaked) or '-'}{marker}")
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Profile Store Benchmark
+=======================
+Compares the JSON and SQLite profile store backends at several profile
+counts, in-process, on a temporary directory:
+
+- create:  first save of the whole document
+- cold:    load() in a fresh store object (parse from disk)
+- warm:    load() again with the file unchanged (cache hit)
+- update:  change one profile's email and save()
+- lookup:  GitProfileManager.find_profile_by_identity() for the last
+           profile, the "which profile is active" lookup, through the store
+
+Usage:
+    python3 benchmarks/bench_store.py [--sizes 10 1000 100000] [--repeat 5]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from git_profile_manager import GitProfileManager  # noqa: E402
+from profile_store import BACKENDS  # noqa: E402
+
+def make_profiles(count: int) -> Dict[str, Dict[str, str]]:
+    """Build a profile document shaped like the real one."""
+    return {
+        f'user{i}': {
+            'name': f'User {i}',
+            'email': f'user{i}@example.com',
+            'ssh_key': f'/home/me/.ssh/id_ed25519_user{i}'
+        }
+        for i in range(count)
+    }
+
+def best_of(repeat: int, action: Callable[[], object]) -> float:
+    """Return the fastest of several runs in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        action()
+        samples.append((time.perf_counter() - start) * 1000)
+    return min(samples)
+
+def bench_backend(backend: str, path: Path, profiles: Dict[str, Dict[str, str]], repeat: int) -> List[float]:
+    """Return [create, cold, warm, update, lookup] timings for one backend."""
+    store_class = BACKENDS[backend]
+    start = time.perf_counter()
+    store_class(path).save(profiles)
+    create = (time.perf_counter() - start) * 1000
+
+    cold = best_of(repeat, lambda: store_class(path).load())
+    store = store_class(path)
+    store.load()
+    warm = best_of(repeat, store.load)
+
+    last = f'user{len(profiles) - 1}'
+    counter = iter(range(repeat))
+
+    def update() -> None:
+        current = store.load()
+        current[last] = {**current[last], 'email': f'changed{next(counter)}@example.com'}
+        store.save(current)
+
+    update_ms = best_of(repeat, update)
+    target = store.load()[last]
+    manager = GitProfileManager(setup_environment=False)
+    manager.store = store
+    lookup = best_of(repeat, lambda: manager.find_profile_by_identity(target['name'], target['email']))
+    return [create, cold, warm, update_ms, lookup]
+
+def main() -> int:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    columns = ['create', 'cold', 'warm', 'update', 'lookup']
+    print(f"{'profiles':>9} {'backend':<8} " + ' '.join(f"{name:>10}" for name in columns))
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            profiles = make_profiles(size)
+            for backend in BACKENDS:
+                path = Path(tmp) / f'{backend}-{size}.store'
+                timings = bench_backend(backend, path, profiles, args.repeat)
+                print(f"{size:>9} {backend:<8} " + ' '.join(f"{value:>8.2f}ms" for value in timings))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Hermetic Operation Benchmark
+============================
+Runs switch, add, remove, test and the read-only commands through
+`SubcommandRunner` (and so `GitProfileCLI` and `GitProfileManager`) against a
+temporary HOME, with stand-ins for `git`, `ssh`, `ssh-keyscan` and
+`ssh-keygen` first on PATH. Nothing touches the real ~/.gitconfig, ~/.ssh or
+the network.
+
+The stand-ins are small shell scripts that log every call and sleep for an
+injectable latency (--latency ssh=0.3). `ssh` authenticates every profile,
+`ssh-keygen` writes placeholder key files and `ssh-keyscan` prints nothing;
+`git` logs the call and hands it to the real git, so config writes stay real
+(and land in the temporary HOME).
+
+For each profile count, every operation is reported with:
+
+- wall:    median wall time in milliseconds
+- procs:   subprocesses started per run
+- opens:   files opened per run, and how many of those were for writing
+- renames: atomic replaces per run
+
+Usage:
+    python3 benchmarks/bench_suite.py [--sizes 1 50 500] [--repeat 5]
+                                      [--latency ssh=0.3] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+STUB_TOOLS = ('git', 'ssh', 'ssh-keyscan', 'ssh-keygen')
+STUB_LOG_VARIABLE = 'GITSW_STUB_LOG'
+
+# Shared prologue: log the call, then sleep for the tool's injected latency
+STUB_PROLOGUE = '''#!/bin/sh
+printf '%s\\n' "{tool} $*" >> "$GITSW_STUB_LOG"
+if [ "${{{latency}:-0}}" != 0 ]; then sleep "${latency}"; fi
+'''
+
+STUB_BODIES = {
+    'git': 'exec {git} "$@"\n',
+    'ssh': '''case " $* " in
+    *" -O "*) exit 255 ;;
+    *" -T "*)
+        for host; do :; done
+        echo "Hi ${host#*github.com-}! You've successfully authenticated, but GitHub does not provide shell access." >&2
+        exit 1 ;;
+esac
+exit 0
+''',
+    'ssh-keyscan': 'exit 0\n',
+    'ssh-keygen': '''key=
+mode=generate
+while [ $# -gt 0 ]; do
+    case "$1" in
+        -f) key="$2"; shift ;;
+        -t|-b|-N|-C|-n|-Y) shift ;;
+        -l) mode=fingerprint ;;
+        -y) mode=public ;;
+    esac
+    shift
+done
+case "$mode" in
+    fingerprint) echo "256 SHA256:stub stub (ED25519)" ;;
+    public) echo "ssh-ed25519 AAAAC3NzaC1lZDI1NTE5AAAAstub stub" ;;
+    *)
+        [ -n "$key" ] || exit 1
+        umask 077
+        echo "stub private key" > "$key"
+        echo "ssh-ed25519 AAAAC3NzaC1lZDI1NTE5AAAAstub stub" > "$key.pub" ;;
+esac
+''',
+}
+
+# (name, argv for run number i, profile count)
+OPERATIONS: List[tuple] = [
+    ('list', lambda i, count: ['list']),
+    ('current', lambda i, count: ['current']),
+    ('use', lambda i, count: ['use', f'user{(count - 1) * (i % 2)}']),
+    ('add', lambda i, count: ['add', f'new{i}', f'new{i}@example.com']),
+    ('remove', lambda i, count: ['remove', f'new{i}', '--yes']),
+    ('test', lambda i, count: ['test', 'user0']),
+    ('test-all', lambda i, count: ['test', 'all']),
+]
+
+def latency_variable(tool: str) -> str:
+    """Environment variable holding a stub's injected latency."""
+    return 'GITSW_STUB_LATENCY_' + tool.upper().replace('-', '_')
+
+def write_stubs(bin_dir: Path) -> None:
+    """Write the stand-in tools into bin_dir."""
+    real_git = shutil.which('git')
+    if not real_git:
+        raise RuntimeError("the git stand-in needs a real git on PATH")
+    bin_dir.mkdir()
+    for tool in STUB_TOOLS:
+        variable = latency_variable(tool)
+        prologue = STUB_PROLOGUE.format(tool=tool, latency=variable)
+        body = STUB_BODIES[tool].replace('{git}', real_git)
+        path = bin_dir / tool
+        path.write_text(prologue.replace('${latency}', '$' + variable) + body, encoding='utf-8')
+        path.chmod(0o755)
+
+def make_environment(home: Path, latencies: Dict[str, float]) -> Dict[str, str]:
+    """Return an environment pointing HOME, PATH and the call log at home."""
+    env = os.environ.copy()
+    env['HOME'] = str(home)
+    env['USERPROFILE'] = str(home)
+    env['GIT_CONFIG_NOSYSTEM'] = '1'
+    env.pop('GIT_CONFIG_GLOBAL', None)
+    env['PATH'] = str(home / 'bin') + os.pathsep + env.get('PATH', '')
+    env[STUB_LOG_VARIABLE] = str(home / 'stub-calls.log')
+    for tool in STUB_TOOLS:
+        env[latency_variable(tool)] = str(latencies.get(tool, 0))
+    return env
+
+class Counters:
+    """Subprocess and file activity seen through audit hooks."""
+
+    def __init__(self) -> None:
+        self.procs = 0
+        self.opens = 0
+        self.writes = 0
+        self.renames = 0
+
+    def hook(self, event: str, args: tuple) -> None:
+        """sys.addaudithook callback."""
+        if event == 'subprocess.Popen':
+            self.procs += 1
+        elif event == 'open':
+            path, mode, flags = args
+            if not isinstance(path, (str, bytes, os.PathLike)):
+                return
+            self.opens += 1
+            if isinstance(mode, str):
+                self.writes += any(c in mode for c in 'wax+')
+            elif isinstance(flags, int):
+                self.writes += bool(flags & (os.O_WRONLY | os.O_RDWR))
+        elif event == 'os.rename':
+            self.renames += 1
+
+    def snapshot(self) -> List[int]:
+        """Current totals."""
+        return [self.procs, self.opens, self.writes, self.renames]
+
+def count_stub_calls(log: Path) -> Dict[str, int]:
+    """Calls per stand-in so far."""
+    calls = {tool: 0 for tool in STUB_TOOLS}
+    try:
+        with open(log, 'r', encoding='utf-8') as f:
+            for line in f:
+                tool = line.split(' ', 1)[0].strip()
+                if tool in calls:
+                    calls[tool] += 1
+    except FileNotFoundError:
+        pass
+    return calls
+
+def seed_home(count: int) -> None:
+    """Create count profiles with keys, SSH hosts and fresh health records."""
+    from git_profile_manager import SSH_DIR, ConnectionResult, GitProfileManager
+    from ssh_config import SSHConfig
+
+    manager = GitProfileManager()
+    config = SSHConfig.load(SSH_DIR / 'config')
+    profiles = {}
+    for i in range(count):
+        username = f'user{i}'
+        key_file = SSH_DIR / f'id_ed25519_{username}'
+        key_file.write_text('stub private key\n', encoding='utf-8')
+        Path(f'{key_file}.pub').write_text('ssh-ed25519 AAAAC3NzaC1lZDI1NTE5AAAAstub stub\n', encoding='utf-8')
+        profiles[username] = {'name': username, 'email': f'{username}@example.com', 'ssh_key': str(key_file)}
+        manager._set_ssh_host(config, username, str(key_file))
+    config.save(SSH_DIR / 'config')
+    manager.save_profiles(profiles)
+    manager.set_git_config('user0', 'user0@example.com')
+    # Fresh health keeps `use` from starting a background re-test mid-measurement
+    manager.record_connection_health([ConnectionResult(username, True, 0.1) for username in profiles])
+
+def run_worker(count: int, repeat: int, output: Path) -> int:
+    """Measure every operation in this process; HOME and PATH are already isolated."""
+    sys.path.insert(0, str(REPO_ROOT))
+    import contextlib
+    from git_profiles import SubcommandRunner, build_parser
+
+    seed_home(count)
+    log = Path(os.environ[STUB_LOG_VARIABLE])
+    counters = Counters()
+    sys.addaudithook(counters.hook)
+    parser = build_parser()
+
+    results: Dict[str, Any] = {}
+    with open(os.devnull, 'w') as sink:
+        for name, make_argv in OPERATIONS:
+            samples: List[float] = []
+            totals = [0, 0, 0, 0]
+            calls_before = count_stub_calls(log)
+            for i in range(repeat):
+                args = parser.parse_args(make_argv(i, count))
+                before = counters.snapshot()
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(sink):
+                    code = SubcommandRunner().run(args)
+                samples.append((time.perf_counter() - start) * 1000)
+                totals = [t + after - b for t, after, b in zip(totals, counters.snapshot(), before)]
+                if code != 0:
+                    raise RuntimeError(f"{name} exited with {code}")
+            calls_after = count_stub_calls(log)
+            results[name] = {
+                'wall_ms': statistics.median(samples),
+                'wall_ms_max': max(samples),
+                'procs': totals[0] / repeat,
+                'opens': totals[1] / repeat,
+                'writes': totals[2] / repeat,
+                'renames': totals[3] / repeat,
+                'calls': {tool: (calls_after[tool] - calls_before[tool]) / repeat for tool in STUB_TOOLS},
+            }
+
+    output.write_text(json.dumps(results), encoding='utf-8')
+    return 0
+
+def measure(count: int, repeat: int, latencies: Dict[str, float]) -> Dict[str, Any]:
+    """Run one worker against a fresh HOME and return its results."""
+    with tempfile.TemporaryDirectory() as tmp:
+        home = Path(tmp)
+        write_stubs(home / 'bin')
+        (home / '.ssh').mkdir(mode=0o700)
+        output = home / 'results.json'
+        result = subprocess.run(
+            [sys.executable, __file__, '--worker', '--profiles', str(count),
+             '--repeat', str(repeat), '--output', str(output)],
+            env=make_environment(home, latencies), cwd=str(home),
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"worker for {count} profiles failed:\n{result.stderr}")
+        return json.loads(output.read_text(encoding='utf-8'))
+
+def parse_latency(value: str) -> tuple:
+    """argparse type for TOOL=SECONDS."""
+    tool, _, seconds = value.partition('=')
+    if tool not in STUB_TOOLS:
+        raise argparse.ArgumentTypeError(f"unknown tool '{tool}' (choose from {', '.join(STUB_TOOLS)})")
+    try:
+        return tool, float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{seconds}' is not a number of seconds")
+
+def main() -> int:
+    """Run the benchmark and optionally save the results."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 50, 500])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--latency', type=parse_latency, action='append', default=[], metavar='TOOL=SECONDS',
+                        help='injected latency per stand-in call (repeatable)')
+    parser.add_argument('--output', type=Path, help='write results as JSON')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--profiles', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker(args.profiles, args.repeat, args.output)
+
+    latencies = dict(args.latency)
+    report: Dict[str, Any] = {
+        'python': platform.python_version(),
+        'platform': sys.platform,
+        'repeat': args.repeat,
+        'latency': latencies,
+        'sizes': {},
+    }
+    print(f"{'profiles':>8} {'operation':<10} {'wall':>10} {'procs':>6} {'opens':>6} {'writes':>7} {'renames':>8}")
+    for size in args.sizes:
+        results = measure(size, args.repeat, latencies)
+        report['sizes'][str(size)] = results
+        for name, row in results.items():
+            print(f"{size:>8} {name:<10} {row['wall_ms']:>8.1f}ms {row['procs']:>6.1f} {row['opens']:>6.1f} "
+                  f"{row['writes']:>7.1f} {row['renames']:>8.1f}")
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+        print(f"Results written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
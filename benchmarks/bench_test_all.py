@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Parallel Connection Test Benchmark
+==================================
+Runs `gitsw test all` against a stub `ssh` on PATH that simulates healthy,
+slow and failing hosts, and reports the wall time against the serial cost.
+
+Profiles named `slow*` sleep for --slow seconds, `fail*` are rejected and
+everything else authenticates after --latency seconds.
+
+Usage:
+    python3 benchmarks/bench_test_all.py [--profiles 30] [--jobs 8] [--latency 0.5]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ENTRY_POINT = REPO_ROOT / 'gitsw.py'
+
+STUB_SSH = '''#!{python}
+import sys, time
+user = sys.argv[-1].split('github.com-', 1)[-1]
+if user.startswith('slow'):
+    time.sleep({slow})
+elif user.startswith('fail'):
+    time.sleep({latency})
+    sys.stderr.write('git@github.com: Permission denied (publickey).\\n')
+    sys.exit(255)
+time.sleep({latency})
+sys.stderr.write('Hi %s! You\\'ve successfully authenticated, but GitHub does not provide shell access.\\n' % user)
+sys.exit(1)
+'''
+
+def write_stubs(bin_dir: Path, latency: float, slow: float) -> None:
+    """Write the stub ssh and a no-op ssh-keyscan."""
+    bin_dir.mkdir()
+    stubs = {
+        'ssh': STUB_SSH.format(python=sys.executable, latency=latency, slow=slow),
+        'ssh-keyscan': f'#!{sys.executable}\n',
+    }
+    for name, body in stubs.items():
+        path = bin_dir / name
+        path.write_text(body, encoding='utf-8')
+        path.chmod(0o755)
+
+def make_profiles(home: Path, count: int) -> int:
+    """Write a profile store with a mix of healthy, slow and failing profiles."""
+    profiles = {}
+    for i in range(count):
+        kind = 'slow' if i % 10 == 9 else 'fail' if i % 10 == 8 else 'user'
+        username = f'{kind}{i}'
+        profiles[username] = {
+            'name': username,
+            'email': f'{username}@example.com',
+            'ssh_key': str(home / '.ssh' / f'id_rsa_{username}')
+        }
+    (home / '.ssh').mkdir(mode=0o700)
+    (home / '.git_profiles.json').write_text(json.dumps(profiles, indent=2), encoding='utf-8')
+    return count
+
+def main() -> int:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', type=int, default=30)
+    parser.add_argument('--jobs', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.5, help='healthy/failing host latency (s)')
+    parser.add_argument('--slow', type=float, default=5.0, help='slow host latency (s)')
+    parser.add_argument('--timeout', type=float, default=2.0, help='per-profile timeout (s)')
+    parser.add_argument('--deadline', type=float, default=30.0, help='global deadline (s)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        home = Path(tmp)
+        write_stubs(home / 'bin', args.latency, args.slow)
+        make_profiles(home, args.profiles)
+
+        env = os.environ.copy()
+        env['HOME'] = str(home)
+        env['PATH'] = f"{home / 'bin'}{os.pathsep}{env.get('PATH', '')}"
+
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, str(ENTRY_POINT), 'test', 'all', '--jobs', str(args.jobs),
+             '--timeout', str(args.timeout), '--deadline', str(args.deadline)],
+            env=env, cwd=str(home), capture_output=True, text=True
+        )
+        elapsed = time.perf_counter() - start
+
+    print(result.stdout)
+    slow_count = args.profiles // 10
+    serial = (args.profiles - slow_count) * args.latency + slow_count * min(args.slow, args.timeout)
+    print(f"wall time: {elapsed:.2f}s (serial estimate {serial:.2f}s, deadline {args.deadline:.0f}s)")
+    return 0 if elapsed <= args.deadline + 2 else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
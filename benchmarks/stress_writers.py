@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Concurrent Writer Stress Test
+=============================
+Starts many gitsw writer processes against one temporary HOME at the same
+moment and checks that nothing was lost or corrupted.
+
+Each worker repeatedly, through GitProfileManager:
+
+- adds a profile of its own (load_profiles, then save_profiles)
+- adds its Host block to ~/.ssh/config (update_ssh_config)
+- records a switch in the usage file (record_profile_use)
+- increments a counter on one shared profile, retrying on ConflictError
+  (the optimistic check that refuses to overwrite a concurrent edit)
+
+Afterwards every profile, Host block and usage entry must be present, the
+shared counter must equal the number of increments, every file must parse,
+and no temp files may be left behind. The run fails (exit 1) otherwise.
+
+Usage:
+    python3 benchmarks/stress_writers.py [--workers 16] [--iterations 20]
+                                         [--backend json sqlite]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SHARED_PROFILE = 'shared'
+
+def run_worker(worker: int, iterations: int, start_at: float) -> int:
+    """Do the writes for one worker; HOME is already the shared temporary one."""
+    sys.path.insert(0, str(REPO_ROOT))
+    from git_profile_manager import SSH_DIR, GitProfileManager
+    from profile_store import ConflictError
+
+    manager = GitProfileManager(setup_environment=False)
+    retries = 0
+    time.sleep(max(0.0, start_at - time.time()))
+
+    for i in range(iterations):
+        username = f'w{worker}-{i}'
+        key_file = str(SSH_DIR / f'id_ed25519_{username}')
+        profiles = manager.load_profiles()
+        profiles[username] = {'name': username, 'email': f'{username}@example.com', 'ssh_key': key_file}
+        if not manager.save_profiles(profiles):
+            return 1
+        if not manager.update_ssh_config(username, key_file):
+            return 1
+        manager.record_profile_use(username)
+
+        while True:
+            profiles = manager.store.load()
+            shared = profiles[SHARED_PROFILE]
+            profiles[SHARED_PROFILE] = {**shared, 'counter': shared.get('counter', 0) + 1}
+            try:
+                manager.store.save(profiles)
+                break
+            except ConflictError:
+                retries += 1
+
+    print(json.dumps({'worker': worker, 'retries': retries}))
+    return 0
+
+def check_home(home: Path, backend: str, workers: int, iterations: int) -> List[str]:
+    """Return every problem found in the final state of home."""
+    sys.path.insert(0, str(REPO_ROOT))
+    from profile_store import open_profile_store
+    from ssh_config import SSHConfig
+
+    problems: List[str] = []
+    expected = {f'w{worker}-{i}' for worker in range(workers) for i in range(iterations)}
+    try:
+        profiles = open_profile_store(home / '.git_profiles.json', home / '.git_profiles.db', backend).load()
+    except (OSError, ValueError) as e:
+        return [f"profile store does not parse: {e}"]
+
+    missing = expected - set(profiles)
+    if missing:
+        problems.append(f"{len(missing)} profiles lost, e.g. {sorted(missing)[:3]}")
+    counter = profiles.get(SHARED_PROFILE, {}).get('counter', 0)
+    if counter != workers * iterations:
+        problems.append(f"shared counter is {counter}, expected {workers * iterations}")
+
+    config = SSHConfig.load(home / '.ssh' / 'config')
+    hosts = {pattern for block in config.hosts() for pattern in block.patterns}
+    lost_hosts = {f'github.com-{username}' for username in expected} - hosts
+    if lost_hosts:
+        problems.append(f"{len(lost_hosts)} SSH Host blocks lost")
+
+    try:
+        usage = json.loads((home / '.git_profiles_usage.json').read_text(encoding='utf-8'))
+        if expected - set(usage):
+            problems.append(f"{len(expected - set(usage))} usage entries lost")
+    except (OSError, ValueError) as e:
+        problems.append(f"usage file does not parse: {e}")
+
+    leftovers = [path.name for path in list(home.iterdir()) + list((home / '.ssh').iterdir())
+                 if path.name.endswith('.tmp')]
+    if leftovers:
+        problems.append(f"temp files left behind: {leftovers[:3]}")
+    return problems
+
+def stress(backend: str, workers: int, iterations: int) -> Dict[str, object]:
+    """Run one round of concurrent writers against a fresh HOME."""
+    with tempfile.TemporaryDirectory(prefix='gitsw-stress-') as tmp:
+        home = Path(tmp)
+        (home / '.ssh').mkdir(mode=0o700)
+        env = os.environ.copy()
+        env['HOME'] = str(home)
+        env['USERPROFILE'] = str(home)
+        env['GITSW_STORE'] = backend
+
+        seed = {SHARED_PROFILE: {'name': SHARED_PROFILE, 'email': 'shared@example.com', 'counter': 0}}
+        subprocess.run([sys.executable, '-c',
+                        'import json, sys; sys.path.insert(0, sys.argv[1]); '
+                        'from git_profile_manager import GitProfileManager; '
+                        'GitProfileManager(setup_environment=False).save_profiles(json.loads(sys.argv[2]))',
+                        str(REPO_ROOT), json.dumps(seed)], env=env, check=True)
+
+        # Every worker waits for the same moment, so imports don't stagger the writes
+        start_at = time.time() + 1.0 + workers * 0.05
+        processes = [
+            subprocess.Popen([sys.executable, __file__, '--worker', str(worker), '--iterations', str(iterations),
+                              '--start-at', repr(start_at)], env=env, stdout=subprocess.PIPE, text=True)
+            for worker in range(workers)
+        ]
+        outputs = [process.communicate()[0] for process in processes]
+        elapsed = time.time() - start_at
+
+        problems = [f"worker {worker} exited with {process.returncode}"
+                    for worker, process in enumerate(processes) if process.returncode != 0]
+        retries = sum(json.loads(line)['retries'] for output in outputs for line in output.splitlines()
+                      if line.startswith('{'))
+        problems += check_home(home, backend, workers, iterations)
+
+    writes = workers * iterations * 4
+    return {'backend': backend, 'seconds': elapsed, 'writes': writes, 'retries': retries, 'problems': problems}
+
+def main() -> int:
+    """Run the stress test for each backend."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--backend', nargs='+', choices=['json', 'sqlite'], default=['json', 'sqlite'])
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--start-at', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        return run_worker(args.worker, args.iterations, args.start_at)
+
+    failed = False
+    print(f"{'backend':<8} {'workers':>7} {'writes':>7} {'seconds':>8} {'writes/s':>9} {'retries':>8}  result")
+    for backend in args.backend:
+        result = stress(backend, args.workers, args.iterations)
+        problems = result['problems']
+        failed = failed or bool(problems)
+        print(f"{backend:<8} {args.workers:>7} {result['writes']:>7} {result['seconds']:>8.2f} "
+              f"{result['writes'] / result['seconds']:>9.0f} {result['retries']:>8}  {'FAIL' if problems else 'ok'}")
+        for problem in problems:
+            print(f"  - {problem}")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
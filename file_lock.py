@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+File Lock
+=========
+Advisory locks and durable atomic replacement for the files gitsw owns.
+
+A lock is taken on a sidecar `<file>.lock` rather than the file itself,
+because writers replace the file with a new inode. Locks are exclusive
+between processes (fcntl.flock, or msvcrt.locking on Windows) and between
+threads, and re-entrant within one thread, so a locked update can call
+helpers that lock the same file. Lock files are never deleted: removing one
+while another process waits on it would hand out two locks.
+
+Git's own files (.gitconfig, .git/config) are not locked here; git_config
+edits them under git's `config.lock` protocol instead.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+# Seconds to wait for another gitsw process before giving up
+LOCK_TIMEOUT = 30.0
+
+class LockTimeoutError(OSError):
+    """Raised when a lock is still held by someone else after the timeout."""
+
+_local = threading.local()
+
+def _held() -> Dict[str, int]:
+    """Lock depth per file for the calling thread."""
+    held = getattr(_local, 'held', None)
+    if held is None:
+        held = _local.held = {}
+    return held
+
+def _try_lock(fd: int) -> bool:
+    """Take the lock without blocking; False if another holder has it."""
+    if os.name == 'nt':
+        import msvcrt
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    import fcntl
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+def _unlock(fd: int) -> None:
+    """Release a lock taken by _try_lock()."""
+    if os.name == 'nt':
+        import msvcrt
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+@contextmanager
+def locked(path: Union[str, Path], timeout: float = LOCK_TIMEOUT) -> Iterator[None]:
+    """Hold the exclusive lock for path for the duration of the block.
+
+    Waiting polls with a short backoff (a few milliseconds at first), so a
+    lock released mid-wait is picked up quickly. Raises LockTimeoutError
+    after timeout seconds.
+    """
+    key = os.path.realpath(path)
+    held = _held()
+    if held.get(key):
+        held[key] += 1
+        try:
+            yield
+        finally:
+            held[key] -= 1
+        return
+
+    lock_path = f"{key}.lock"
+    os.makedirs(os.path.dirname(lock_path), mode=0o700, exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        deadline = time.monotonic() + timeout
+        delay = 0.001
+        while not _try_lock(fd):
+            if time.monotonic() >= deadline:
+                raise LockTimeoutError(f"{lock_path} is held by another process (waited {timeout:g}s)")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+
+        held[key] = 1
+        try:
+            yield
+        finally:
+            del held[key]
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+def atomic_write(path: Union[str, Path], data: Union[str, bytes], mode: Optional[int] = None,
+                 durable: bool = True) -> None:
+    """Replace path with data: temp file in the same directory, fsync, rename.
+
+    Readers see the old or the new content, never a mix. A symlinked path
+    is written through to its target. mode defaults to the existing file's
+    permissions (0o600 for a new file). durable=False skips the fsyncs, for
+    caches that are cheap to rebuild.
+    """
+    target = os.path.realpath(path)
+    directory = os.path.dirname(target)
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if mode is None:
+        try:
+            mode = os.stat(target).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o600
+
+    # Unique per process and thread, and hidden from globs on the real name
+    tmp_path = os.path.join(directory, f".{os.path.basename(target)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    payload = data.encode('utf-8') if isinstance(data, str) else data
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), mode)
+        try:
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+            if durable:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    if durable and os.name != 'nt':
+        # Make the rename itself survive a crash
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+__all__ = ['LOCK_TIMEOUT', 'LockTimeoutError', 'atomic_write', 'locked']
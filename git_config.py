@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+Git Config
+==========
+Snapshot reader for the global Git configuration, plus a line-level editor
+for repository config files that locks them the way git does.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import tracing
+
+# Keys that together describe which identity Git commits and pushes as
+IDENTITY_KEYS = (
+    'user.name',
+    'user.email',
+    'user.signingkey',
+    'commit.gpgsign',
+    'gpg.format',
+    'core.sshcommand',
+)
+
+# Stat results for every file that contributed to a snapshot, plus the cwd
+# (includeIf "gitdir:" conditions depend on it)
+SnapshotKey = Tuple[str, Tuple[Tuple[str, Optional[Tuple[int, int, int]]], ...]]
+
+def global_config_paths() -> List[Path]:
+    """Return the files Git reads for --global, in the order Git reads them."""
+    override = os.environ.get('GIT_CONFIG_GLOBAL')
+    if override:
+        return [Path(override)]
+
+    xdg_home = os.environ.get('XDG_CONFIG_HOME')
+    xdg_dir = Path(xdg_home) if xdg_home else Path.home() / '.config'
+    return [xdg_dir / 'git' / 'config', Path.home() / '.gitconfig']
+
+def global_config_target() -> Path:
+    """Return the file `git config --global` writes to, with symlinks resolved.
+
+    Like git: GIT_CONFIG_GLOBAL if set, else ~/.gitconfig unless only the
+    XDG file exists.
+    """
+    paths = global_config_paths()
+    target = paths[0] if len(paths) == 1 or (paths[0].exists() and not paths[1].exists()) else paths[-1]
+    return Path(os.path.realpath(target))
+
+def _stat_file(path: str) -> Optional[Tuple[int, int, int]]:
+    """Return (inode, size, mtime_ns) for a file, or None if it is missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+def parse_config_list(output: str) -> Tuple[Dict[str, str], List[str]]:
+    """Parse `git config --show-origin --list -z` output.
+
+    Returns the values (last one wins, as with `git config <key>`) and the
+    files they came from, includes and includeIf targets among them.
+    """
+    values: Dict[str, str] = {}
+    origins: List[str] = []
+    fields = output.split('\0')
+
+    for origin, entry in zip(fields[0::2], fields[1::2]):
+        if origin.startswith('file:') and origin[5:] not in origins:
+            origins.append(origin[5:])
+        key, _, value = entry.partition('\n')
+        values[key] = value
+
+    return values, origins
+
+class GlobalConfigSnapshot:
+    """Reads the whole global Git config with one `git` spawn and caches it.
+
+    The cache is keyed on the stat signature of every contributing file, so
+    edits made by `git config` or by hand are picked up on the next read.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty snapshot."""
+        self._key: Optional[SnapshotKey] = None
+        self._values: Dict[str, str] = {}
+        self._origins: List[str] = []
+
+    def _current_key(self, files: List[str]) -> SnapshotKey:
+        """Build the cache key for a set of contributing files."""
+        return (os.getcwd(), tuple((path, _stat_file(path)) for path in files))
+
+    def _watched_files(self) -> List[str]:
+        """Files whose change invalidates the snapshot."""
+        files = [str(path) for path in global_config_paths()]
+        return files + [path for path in self._origins if path not in files]
+
+    def values(self) -> Dict[str, str]:
+        """Return every global config value, re-reading only after a change."""
+        if self._key is not None and self._key == self._current_key(self._watched_files()):
+            return self._values
+
+        self._values, self._origins = self._read()
+        self._key = self._current_key(self._watched_files())
+        return self._values
+
+    def _read(self) -> Tuple[Dict[str, str], List[str]]:
+        """Run `git config` once and parse all global values."""
+        if not any(path.exists() for path in global_config_paths()):
+            return {}, []
+
+        with tracing.phase('git-config'):
+            result = tracing.run(
+                ['git', 'config', '--global', '--includes', '--show-origin', '--list', '-z'],
+                capture_output=True,
+                text=True
+            )
+        if result.returncode != 0:
+            return {}, []
+        return parse_config_list(result.stdout)
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a single value (section and variable names are case-insensitive)."""
+        section, _, variable = key.rpartition('.')
+        first, dot, subsection = section.partition('.')
+        normalized = f"{first.lower()}{dot}{subsection}.{variable.lower()}"
+        return self.values().get(normalized)
+
+    def identity(self) -> Dict[str, str]:
+        """Return the identity-related keys that are set."""
+        values = self.values()
+        return {key: values[key] for key in IDENTITY_KEYS if key in values}
+
+    def invalidate(self) -> None:
+        """Force the next read to spawn `git config` again."""
+        self._key = None
+
+# [section] or [section "subsection"]; a key may follow on the same line
+SECTION_PATTERN = re.compile(r'^\s*\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+KEY_PATTERN = re.compile(r'^(\s*)([A-Za-z][A-Za-z0-9-]*)\s*(?:=\s*(.*?))?\s*$')
+
+class ConfigLockedError(Exception):
+    """Raised when another process holds a config file's .lock."""
+
+def _parse_value(raw: str) -> str:
+    """Decode a config value: quotes, escapes and trailing comments.
+
+    As in git, unquoted whitespace is trimmed at the ends and each inner
+    whitespace character reads as a space; quoted text is kept verbatim.
+    """
+    value = []
+    quoted = False
+    spaces = 0
+    index = 0
+    while index < len(raw):
+        ch = raw[index]
+        if ch.isspace() and not quoted:
+            spaces += 1 if value else 0
+            index += 1
+            continue
+        if ch in '#;' and not quoted:
+            break
+        if spaces:
+            value.append(' ' * spaces)
+            spaces = 0
+        if ch == '\\' and index + 1 < len(raw):
+            index += 1
+            value.append({'n': '\n', 't': '\t', 'b': '\b'}.get(raw[index], raw[index]))
+        elif ch == '"':
+            quoted = not quoted
+        else:
+            value.append(ch)
+        index += 1
+    return ''.join(value)
+
+def _continues(raw: str) -> bool:
+    """Whether a raw value ends in a backslash that joins it to the next line."""
+    quoted = False
+    index = 0
+    while index < len(raw):
+        ch = raw[index]
+        if ch == '\\':
+            if index + 1 == len(raw):
+                return True
+            index += 1
+        elif ch == '"':
+            quoted = not quoted
+        elif ch in '#;' and not quoted:
+            return False
+        index += 1
+    return False
+
+def _format_value(value: str) -> str:
+    """Encode a config value, quoting only when git would need it."""
+    escaped = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\t', '\\t')
+    if escaped != value or value != value.strip() or any(ch in value for ch in '#;'):
+        return f'"{escaped}"'
+    return value
+
+def _format_header(section: str, subsection: Optional[str]) -> str:
+    """Encode a section header, escaping `"` and `\\` in the subsection as git does."""
+    if subsection is None:
+        return f'[{section}]'
+    escaped = subsection.replace('\\', '\\\\').replace('"', '\\"')
+    return f'[{section} "{escaped}"]'
+
+class _Entry(NamedTuple):
+    """One variable in a config file, as GitConfigFile found it."""
+    first: int           # index of the line the variable starts on
+    last: int            # index of its last line (> first after a continuation)
+    column: int          # where the key starts: after the header for `[section] key = value`
+    section: str
+    subsection: Optional[str]
+    key: str
+    value: str
+
+class GitConfigFile:
+    """Line-preserving editor for a git config file (e.g. .git/config).
+
+    Only lines that are explicitly changed are rewritten; comments,
+    formatting and unknown sections survive untouched.
+    """
+
+    def __init__(self, text: str) -> None:
+        """Parse config text."""
+        self.lines = text.splitlines(keepends=True)
+
+    @classmethod
+    def read(cls, path: Path) -> 'GitConfigFile':
+        """Read a config file; a missing file yields an empty config."""
+        try:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                return cls(f.read())
+        except FileNotFoundError:
+            return cls('')
+
+    def render(self) -> str:
+        """Render the config text."""
+        return ''.join(self.lines)
+
+    def _entries(self) -> Iterator[_Entry]:
+        """Yield every variable, joining values continued with a trailing backslash."""
+        section: Optional[str] = None
+        subsection: Optional[str] = None
+        index = 0
+        while index < len(self.lines):
+            line = self.lines[index]
+            column = 0
+            header = SECTION_PATTERN.match(line)
+            if header:
+                section = header.group(1).lower()
+                subsection = re.sub(r'\\(.)', r'\1', header.group(2)) if header.group(2) is not None else None
+                column = header.end()
+            stripped = line[column:].strip()
+            if section is None or not stripped or stripped[0] in '#;':
+                index += 1
+                continue
+            match = KEY_PATTERN.match(line[column:].rstrip('\r\n'))
+            first = index
+            if match:
+                raw = match.group(3)
+                while raw is not None and _continues(raw) and index + 1 < len(self.lines):
+                    index += 1
+                    raw = raw[:-1] + self.lines[index].rstrip('\r\n')
+                value = _parse_value(raw) if raw is not None else 'true'
+                yield _Entry(first, index, column, section, subsection, match.group(2).lower(), value)
+            index += 1
+
+    def get_all(self, section: str, subsection: Optional[str], key: str) -> List[str]:
+        """Return every value of a variable, in file order."""
+        section, key = section.lower(), key.lower()
+        return [entry.value for entry in self._entries()
+                if entry.section == section and entry.subsection == subsection and entry.key == key]
+
+    def get(self, section: str, subsection: Optional[str], key: str) -> Optional[str]:
+        """Return the last value of a variable, as `git config` does."""
+        values = self.get_all(section, subsection, key)
+        return values[-1] if values else None
+
+    def subsections(self, section: str) -> List[str]:
+        """Return the subsection names of a section, e.g. remote names."""
+        names: List[str] = []
+        for line in self.lines:
+            header = SECTION_PATTERN.match(line)
+            if header and header.group(1).lower() == section.lower() and header.group(2) is not None:
+                name = re.sub(r'\\(.)', r'\1', header.group(2))
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def set(self, section: str, subsection: Optional[str], key: str, value: str) -> bool:
+        """Set a variable: rewrite its last line, or append it to the section.
+
+        Returns True if the text changed.
+        """
+        newline = '\r\n' if self.lines and self.lines[0].endswith('\r\n') else '\n'
+        section, key_lower = section.lower(), key.lower()
+        last: Optional[_Entry] = None
+        section_end = None
+        for found in self._entries():
+            if found.section == section and found.subsection == subsection:
+                section_end = found.last
+                if found.key == key_lower:
+                    last = found
+
+        if last is not None:
+            line = self.lines[last.first]
+            # A bare `key` means true, but is only left alone if it already has a value
+            if last.value == value and '=' in line[last.column:]:
+                return False
+            match = KEY_PATTERN.match(line[last.column:].rstrip('\r\n'))
+            # A continued value collapses onto one line; a key after a header stays there
+            self.lines[last.first:last.last + 1] = [
+                f"{line[:last.column]}{match.group(1)}{match.group(2)} = {_format_value(value)}{newline}"
+            ]
+            return True
+
+        entry = f"\t{key} = {_format_value(value)}{newline}"
+        if section_end is None:
+            section_end = self._find_header(section, subsection)
+        if section_end is not None:
+            if not self.lines[section_end].endswith('\n'):
+                self.lines[section_end] += newline
+            self.lines.insert(section_end + 1, entry)
+            return True
+
+        if self.lines and not self.lines[-1].endswith('\n'):
+            self.lines[-1] += newline
+        self.lines.extend([_format_header(section, subsection) + newline, entry])
+        return True
+
+    def remove_section(self, section: str, subsection: Optional[str]) -> bool:
+        """Remove every block of a section, header and body. Returns True if any was removed."""
+        section = section.lower()
+        kept: List[str] = []
+        removing = False
+        for line in self.lines:
+            header = SECTION_PATTERN.match(line)
+            if header:
+                name = re.sub(r'\\(.)', r'\1', header.group(2)) if header.group(2) is not None else None
+                removing = header.group(1).lower() == section and name == subsection
+            if not removing:
+                kept.append(line)
+        changed = len(kept) != len(self.lines)
+        self.lines = kept
+        return changed
+
+    def append_section(self, section: str, subsection: Optional[str], entries: Iterable[Tuple[str, str]]) -> None:
+        """Append a new section block at the end of the file."""
+        newline = '\r\n' if self.lines and self.lines[0].endswith('\r\n') else '\n'
+        if self.lines and not self.lines[-1].endswith('\n'):
+            self.lines[-1] += newline
+        self.lines.append(_format_header(section, subsection) + newline)
+        self.lines.extend(f"\t{key} = {_format_value(value)}{newline}" for key, value in entries)
+
+    def has_section(self, section: str) -> bool:
+        """Return True if any block of a section (with or without subsection) exists."""
+        return any(header and header.group(1).lower() == section.lower()
+                   for header in map(SECTION_PATTERN.match, self.lines))
+
+    def _find_header(self, section: str, subsection: Optional[str]) -> Optional[int]:
+        """Return the index of the last header line for a section."""
+        found = None
+        for index, line in enumerate(self.lines):
+            header = SECTION_PATTERN.match(line)
+            if header and header.group(1).lower() == section:
+                name = re.sub(r'\\(.)', r'\1', header.group(2)) if header.group(2) is not None else None
+                if name == subsection:
+                    found = index
+        return found
+
+def update_config_file(path: Path, mutate: Callable[[GitConfigFile], bool], dry_run: bool = False) -> bool:
+    """Apply `mutate` to a config file under git's lock protocol.
+
+    Like git, the lock is `<path>.lock` created with O_EXCL; the new content
+    is written to the lock file and renamed over the original. The file is
+    read only after the lock is held, so concurrent writers cannot interleave.
+    Returns True if `mutate` reported a change. Raises ConfigLockedError when
+    another process holds the lock.
+    """
+    if dry_run:
+        return mutate(GitConfigFile.read(path))
+
+    lock_path = Path(f"{path}.lock")
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o644
+    try:
+        fd = os.open(lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode)
+    except FileExistsError:
+        raise ConfigLockedError(f"{lock_path} exists; another git process may be running")
+
+    try:
+        config = GitConfigFile.read(path)
+        changed = mutate(config)
+        if changed:
+            os.write(fd, config.render().encode('utf-8'))
+            os.fsync(fd)
+        os.close(fd)
+        fd = -1
+        if changed:
+            os.replace(lock_path, path)
+        else:
+            os.unlink(lock_path)
+        return changed
+    except BaseException:
+        if fd >= 0:
+            os.close(fd)
+        if lock_path.exists():
+            os.unlink(lock_path)
+        raise
+
+def _read_gitdir_file(dot_git: Path) -> Optional[Path]:
+    """Resolve a `.git` file (worktree or submodule) to its git directory."""
+    try:
+        with open(dot_git, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+    except OSError:
+        return None
+    if not content.startswith('gitdir:'):
+        return None
+    git_dir = Path(content[len('gitdir:'):].strip())
+    return git_dir if git_dir.is_absolute() else (dot_git.parent / git_dir)
+
+def find_git_dir(path: Path) -> Optional[Path]:
+    """Return the git directory of the repository containing path, if any.
+
+    A linked worktree resolves to its own git directory, which is what
+    includeIf "gitdir:" conditions are matched against.
+    """
+    directory = Path(os.path.abspath(path))
+    for candidate in (directory, *directory.parents):
+        dot_git = candidate / '.git'
+        if dot_git.is_dir():
+            return dot_git
+        if dot_git.is_file():
+            return _read_gitdir_file(dot_git)
+    return None
+
+def common_dir(git_dir: Path) -> Path:
+    """Return the directory holding the shared config (differs for worktrees)."""
+    try:
+        with open(git_dir / 'commondir', 'r', encoding='utf-8') as f:
+            common = Path(f.read().strip())
+    except OSError:
+        return git_dir
+    return common if common.is_absolute() else (git_dir / common)
+
+def local_config_paths(git_dir: Path) -> List[Path]:
+    """Return the repository config files git reads for git_dir, in order.
+
+    The shared config lives in the common directory, so a linked worktree
+    resolves to its main repository's config, as `git config --local` does;
+    with extensions.worktreeConfig the worktree's config.worktree is read last.
+    """
+    shared = common_dir(git_dir) / 'config'
+    paths = [shared]
+    extension = GitConfigFile.read(shared).get('extensions', None, 'worktreeconfig')
+    if extension is not None and extension.lower() in ('true', 'yes', 'on', '1'):
+        paths.append(git_dir / 'config.worktree')
+    return paths
+
+def _is_bare_repository(names: Iterable[str]) -> bool:
+    """Return True if a directory listing looks like a bare repository."""
+    return {'HEAD', 'objects', 'refs', 'config'} <= set(names)
+
+def find_repositories(roots: Iterable[Path], max_depth: int = 6) -> Iterator[Path]:
+    """Walk roots and yield each repository's common git directory once.
+
+    Finds regular clones, linked worktrees (deduplicated to their main
+    repository) and bare repositories. Repositories are not descended into,
+    and hidden directories below a root are skipped.
+    """
+    seen = set()
+    stack = [(Path(root), 0) for root in roots]
+
+    while stack:
+        directory, depth = stack.pop()
+        try:
+            entries = {entry.name: entry for entry in os.scandir(directory)}
+        except OSError:
+            continue
+
+        git_dir: Optional[Path] = None
+        dot_git = entries.get('.git')
+        if dot_git is not None:
+            git_dir = Path(dot_git.path) if dot_git.is_dir() else _read_gitdir_file(Path(dot_git.path))
+        elif _is_bare_repository(entries):
+            git_dir = directory
+
+        if git_dir is not None:
+            common = common_dir(git_dir)
+            key = os.path.realpath(common)
+            if key not in seen:
+                seen.add(key)
+                yield common
+            continue
+
+        if depth < max_depth:
+            for name, entry in entries.items():
+                if not name.startswith('.') and entry.is_dir(follow_symlinks=False):
+                    stack.append((Path(entry.path), depth + 1))
+
+__all__ = [
+    'ConfigLockedError', 'GitConfigFile', 'GlobalConfigSnapshot', 'IDENTITY_KEYS',
+    'common_dir', 'find_git_dir', 'find_repositories', 'global_config_paths', 'global_config_target',
+    'local_config_paths', 'parse_config_list', 'update_config_file',
+]
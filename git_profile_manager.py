@@ -8,35 +8,124 @@ Cross-platform support: Windows, macOS, Linux
 
 import json
 import os
-import platform
-import re
-import shutil
 import subprocess
 import sys
-import webbrowser
-from getpass import getpass
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, NamedTuple, Optional, TextIO, Tuple, Union
+
+from git_config import (
+    ConfigLockedError, GitConfigFile, GlobalConfigSnapshot, common_dir, find_git_dir, find_repositories,
+    global_config_paths, global_config_target, local_config_paths, update_config_file
+)
+from profile_store import BACKENDS, HealthStore, UsageStore, backend_name, is_fresh, open_profile_store
+from prompt_state import PromptState, read_state, shell_init, write_state
+import tracing
+
+# Modules only some commands need (webbrowser, getpass, shutil, shlex,
+# concurrent.futures, known_hosts, ssh_config, manifest, ...) are imported
+# where they are used, so read-only commands start fast.
+if TYPE_CHECKING:
+    from screen import Screen
+    from ssh_config import SSHConfig
 
 # Constants
 CONFIG_FILE = Path.home() / '.git_profiles.json'
+PROFILE_DB_FILE = Path.home() / '.git_profiles.db'
+HEALTH_FILE = Path.home() / '.git_profiles_health.json'
+PROMPT_STATE_FILE = Path.home() / '.git_profiles_state'
+REPO_PROMPT_STATE = 'gitsw-prompt'   # per-repository prompt state, inside the git dir
 SSH_DIR = Path.home() / '.ssh'
+INCLUDE_DIR = Path.home() / '.git_profiles.d'
 GITHUB_SSH_URL = 'https://github.com/settings/ssh/new'
 GITHUB_HOST_KEY = 'github.com'
 
+# Connection test limits (seconds / threads)
+SSH_TEST_TIMEOUT = 15
+SSH_TEST_WORKERS = 8
+SSH_TEST_DEADLINE = 60
+
+# Workspace-wide remote rewriting
+REWRITE_WORKERS = 8
+REWRITE_MAX_DEPTH = 6
+
+# Parallel ssh-keygen runs when importing a manifest
+IMPORT_KEYGEN_WORKERS = os.cpu_count() or 4
+
+# Cached connection results younger than this (seconds) skip a live test
+HEALTH_TTL = 15 * 60
+
+# SSH connection multiplexing for profile hosts
+SSH_CONTROL_PATH = '~/.ssh/gitsw-%C'
+SSH_CONTROL_PERSIST = '10m'
+
+# ssh-agent: how long a key loaded on switch stays loaded, and gitsw's own agent
+# socket for sessions without SSH_AUTH_SOCK
+SSH_AGENT_LIFETIME = '8h'
+SSH_AGENT_SOCKET = SSH_DIR / 'gitsw-agent.sock'
+
+# Options this tool owns inside a profile's Host block; others are left alone
+SSH_MANAGED_OPTIONS = (
+    'HostName', 'User', 'IdentityFile', 'IdentitiesOnly',
+    'ControlMaster', 'ControlPath', 'ControlPersist',
+)
+
 # Validation patterns
-EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
-USERNAME_PATTERN = re.compile(r'^[a-zA-Z0-9]([a-zA-Z0-9-]*[a-zA-Z0-9])?$')
+# ssh-keygen key types and their default (and allowed) sizes; ed25519 has a fixed size
+SSH_KEY_TYPES: Dict[str, Tuple[Optional[int], Tuple[int, ...]]] = {
+    'ed25519': (None, ()),
+    'ecdsa': (256, (256, 384, 521)),
+    'rsa': (4096, (2048, 3072, 4096, 8192)),
+}
+DEFAULT_KEY_TYPE = 'ed25519'
+
+# Generated keys are commented "<email> gitsw:<profile>", which is how reconcile
+# tells them from keys the user made; OpenSSH's own FIDO defaults are never ours
+KEY_COMMENT_TAG = 'gitsw:'
+OPENSSH_DEFAULT_KEYS = frozenset({'id_ed25519_sk', 'id_ecdsa_sk'})
+
+# Compiled (and cached by `re`) on first use
+EMAIL_PATTERN = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+USERNAME_PATTERN = r'^[a-zA-Z0-9]([a-zA-Z0-9-]*[a-zA-Z0-9])?$'
+
+# Where `which` results for required tools are remembered between runs
+DEPENDENCY_CACHE_FILE = Path.home() / '.git_profiles_deps.json'
+UPDATE_CACHE_FILE = Path.home() / '.git_profiles_update.json'
+USAGE_FILE = Path.home() / '.git_profiles_usage.json'
+
+def system_name() -> str:
+    """Return what platform.system() would, without importing platform for common systems."""
+    known = {'win32': 'Windows', 'darwin': 'Darwin', 'linux': 'Linux'}
+    if sys.platform in known:
+        return known[sys.platform]
+    import platform
+    return platform.system()
+
+def key_comment_owner(public_key_file: Path) -> Optional[str]:
+    """Return the profile a generated key's comment names (`gitsw:<name>`), or None."""
+    try:
+        with open(public_key_file, 'r', encoding='utf-8') as f:
+            fields = f.readline().split()
+    except (OSError, ValueError):
+        return None
+    tags = [field[len(KEY_COMMENT_TAG):] for field in fields[2:] if field.startswith(KEY_COMMENT_TAG)]
+    return tags[-1] if tags else None
 
 class Colors:
     """ANSI color codes for terminal output with Windows support."""
     
-    def __init__(self) -> None:
-        self._setup_colors()
+    def __getattr__(self, name: str) -> str:
+        """Set the color codes up on first use, then serve them as plain attributes."""
+        if name.isupper() and 'ENDC' not in self.__dict__:
+            self._setup_colors()
+        try:
+            return self.__dict__[name]
+        except KeyError:
+            raise AttributeError(name) from None
     
     def _setup_colors(self) -> None:
         """Setup color codes based on platform support."""
-        if platform.system() == "Windows":
+        if system_name() == "Windows":
             self._enable_windows_colors()
         else:
             self._enable_ansi_colors()
@@ -78,13 +167,80 @@ class Colors:
 # Global colors instance
 colors = Colors()
 
+class RemoteRewrite(NamedTuple):
+    """Outcome for one remote of one repository in a bulk rewrite."""
+    repository: str
+    remote: str
+    old_url: str
+    new_url: str
+    status: str          # 'updated', 'would update', 'unchanged', 'skipped' or 'error'
+    error: str = ''
+
+class LocalSwitch(NamedTuple):
+    """Outcome of switching one repository to a profile."""
+    config_path: str
+    remote: str
+    old_url: str         # '' when the repository has no such remote
+    new_url: str         # '' when the URL is not a GitHub URL this tool can convert
+
+class IdentityMatch(NamedTuple):
+    """The profile an identity belongs to, and how closely it matched."""
+    username: str
+    matched: str         # 'identity' (name and email), 'email' or 'name'
+
+class Drift(NamedTuple):
+    """One disagreement between the profile store, SSH_DIR and the SSH config."""
+    kind: str            # a DRIFT_ACTIONS key
+    subject: str         # profile username, Host alias or key file
+    detail: str
+
+# What reconcile does about each kind of drift
+DRIFT_ACTIONS = {
+    'missing-key': 'remove profile',
+    'missing-host': 'add Host block',
+    'orphan-host': 'remove Host block',
+    'orphan-key': 'delete key pair',
+}
+
+class ImportResult(NamedTuple):
+    """Outcome of a manifest import; nothing is written when validation fails."""
+    created: List[str]
+    generated: List[str]  # profiles whose SSH key was generated
+    skipped: List[str]    # profiles that already existed
+    errors: List[str]
+
+class ConnectionResult(NamedTuple):
+    """Outcome of a single SSH connection test."""
+    username: str
+    success: bool
+    latency: float
+    error: str = ''
+
 class GitProfileManager:
     """Main class for managing Git profiles with cross-platform support."""
     
-    def __init__(self) -> None:
-        """Initialize the Git Profile Manager."""
-        self.platform = platform.system()
+    def __init__(self, setup_environment: bool = True) -> None:
+        """Initialize the Git Profile Manager.
+        
+        Read-only commands pass setup_environment=False and call
+        ensure_environment() only once they need to touch SSH keys.
+        """
+        self.platform = system_name()
+        self.store = open_profile_store(CONFIG_FILE, PROFILE_DB_FILE)
+        self.health = HealthStore(HEALTH_FILE)
+        self.usage = UsageStore(USAGE_FILE)
+        self.git_config = GlobalConfigSnapshot()
+        self._screen: Optional['Screen'] = None
+        self._environment_ready = False
+        if setup_environment:
+            self.ensure_environment()
+    
+    def ensure_environment(self) -> None:
+        """Setup the environment once per process."""
+        if self._environment_ready:
+            return
         self._setup_environment()
+        self._environment_ready = True
     
     def _setup_environment(self) -> None:
         """Setup required environment and check dependencies."""
@@ -94,11 +250,38 @@ class GitProfileManager:
     def _check_dependencies(self) -> None:
         """Check if required tools are available."""
         required_tools = ['git', 'ssh-keygen']
-        missing_tools = [tool for tool in required_tools if not shutil.which(tool)]
+        missing_tools = [tool for tool, path in self._find_tools(required_tools).items() if not path]
         
         if missing_tools:
             self._handle_missing_dependencies(missing_tools)
     
+    def _find_tools(self, tools: List[str]) -> Dict[str, Optional[str]]:
+        """Locate tools on PATH, reusing the last answer while PATH is unchanged.
+        
+        A cached location is trusted only if the file is still there, so an
+        uninstall or upgrade is noticed without a fresh PATH search.
+        """
+        search_path = os.environ.get('PATH', '')
+        try:
+            with open(DEPENDENCY_CACHE_FILE, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get('path') == search_path:
+                found = {tool: cache['tools'].get(tool) for tool in tools}
+                if all(location and os.path.exists(location) for location in found.values()):
+                    return found
+        except (IOError, ValueError, AttributeError, KeyError):
+            pass
+        
+        import shutil
+        found = {tool: shutil.which(tool) for tool in tools}
+        if all(found.values()):
+            from file_lock import atomic_write
+            try:
+                atomic_write(DEPENDENCY_CACHE_FILE, json.dumps({'path': search_path, 'tools': found}), durable=False)
+            except OSError:
+                pass
+        return found
+    
     def _handle_missing_dependencies(self, missing_tools: List[str]) -> None:
         """Handle missing dependencies with platform-specific advice."""
         for tool in missing_tools:
@@ -120,17 +303,13 @@ class GitProfileManager:
         """Ensure required directories exist with proper permissions."""
         if not SSH_DIR.exists():
             SSH_DIR.mkdir(mode=0o700, parents=True)
-        elif self.platform != "Windows":
+        elif self.platform != "Windows" and SSH_DIR.stat().st_mode & 0o777 != 0o700:
             SSH_DIR.chmod(0o700)
     
     def load_profiles(self) -> Dict[str, Any]:
-        """Load profiles from config file."""
-        if not CONFIG_FILE.exists():
-            return {}
-        
+        """Load profiles from config file (cached until the file changes)."""
         try:
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self.store.load()
         except (json.JSONDecodeError, IOError) as e:
             self.print_error(f"Error loading profiles: {e}")
             return {}
@@ -138,68 +317,317 @@ class GitProfileManager:
     def save_profiles(self, profiles: Dict[str, Any]) -> bool:
         """Save profiles to config file."""
         try:
-            CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
-            with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(profiles, f, indent=2, ensure_ascii=False)
-            return True
+            self.store.save(profiles)
         except IOError as e:
             self.print_error(f"Error saving profiles: {e}")
             return False
+        
+        # Re-match the recorded identity against the new profiles (no git spawn);
+        # a stale state file is left for the next prompt to recompute
+        state = read_state(PROMPT_STATE_FILE, self._prompt_watched_files())
+        if state is not None:
+            self._write_prompt_state(self._match_prompt_state(state.name, state.email))
+        return True
     
-    def get_current_git_config(self) -> Optional[Dict[str, str]]:
-        """Get current Git global configuration."""
+    def profiles_with_identity(self, name: str, email: str) -> List[str]:
+        """Return every profile with exactly this name and email, in store order."""
         try:
-            name = self._get_git_config_value('user.name')
-            email = self._get_git_config_value('user.email')
-            return {'name': name, 'email': email} if name and email else None
-        except (subprocess.CalledProcessError, FileNotFoundError):
+            return self.store.find_identity(name, email)
+        except (json.JSONDecodeError, IOError) as e:
+            self.print_error(f"Error loading profiles: {e}")
+            return []
+    
+    def profiles_with_email(self, email: str) -> List[str]:
+        """Return every profile using an email, in store order."""
+        try:
+            return self.store.find_email(email)
+        except (json.JSONDecodeError, IOError) as e:
+            self.print_error(f"Error loading profiles: {e}")
+            return []
+    
+    def profiles_with_name(self, name: str) -> List[str]:
+        """Return every profile using a name, in store order."""
+        try:
+            return self.store.find_name(name)
+        except (json.JSONDecodeError, IOError) as e:
+            self.print_error(f"Error loading profiles: {e}")
+            return []
+    
+    def match_identity(self, name: Optional[str], email: Optional[str]) -> Optional[IdentityMatch]:
+        """Return the profile an identity belongs to, falling back to partial matches.
+        
+        An exact (name, email) match wins; otherwise the first profile with the
+        same email, then the first with the same name. Each step is one index
+        lookup, so an identity edited by hand (say, a corrected user.name)
+        still points at its profile.
+        """
+        username = self.find_profile_by_identity(name, email)
+        if username:
+            return IdentityMatch(username, 'identity')
+        for matched, value, lookup in (('email', email, self.profiles_with_email),
+                                       ('name', name, self.profiles_with_name)):
+            matches = lookup(value) if value else []
+            if matches:
+                return IdentityMatch(matches[0], matched)
+        return None
+    
+    def find_profile_by_identity(self, name: Optional[str], email: Optional[str]) -> Optional[str]:
+        """Return the first profile with this name and email, or None.
+        
+        This is the lookup behind "which profile is active". It is answered
+        by the store's index: a dict the JSON backend rebuilds only when the
+        file changes, or the (name, email) index of the SQLite backend.
+        """
+        if not name or not email:
             return None
+        matches = self.profiles_with_identity(name, email)
+        return matches[0] if matches else None
     
-    def _get_git_config_value(self, key: str) -> Optional[str]:
-        """Get a specific Git config value."""
+    def record_profile_use(self, username: str) -> None:
+        """Remember that a profile was switched to; pickers rank recent profiles first."""
         try:
-            result = subprocess.run(
-                ['git', 'config', '--global', key],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            return result.stdout.strip()
-        except subprocess.CalledProcessError:
+            self.usage.touch(username)
+        except OSError:
+            pass
+    
+    def last_used(self) -> Dict[str, float]:
+        """When each profile was last switched to (epoch seconds)."""
+        return self.usage.load()
+    
+    def migrate_store(self, backend: str) -> bool:
+        """Copy every profile into another store backend and switch to it.
+        
+        The old file is kept as <name>.bak, which also makes the new backend
+        the one picked automatically from then on.
+        """
+        if backend not in BACKENDS:
+            self.print_error(f"Unknown store backend '{backend}' (choose from {', '.join(BACKENDS)})")
+            return False
+        if backend == backend_name(self.store):
+            self.print_warning(f"Profiles are already stored in {self.store.path}")
+            return True
+        
+        from file_lock import locked
+        target = open_profile_store(CONFIG_FILE, PROFILE_DB_FILE, backend)
+        try:
+            # No other process may save to the old store between the copy and the rename
+            with locked(self.store.path):
+                self.store.invalidate()
+                profiles = self.load_profiles()
+                # A plain dict replaces the target's content instead of merging into it
+                target.save(dict(profiles))
+                if self.store.path.exists():
+                    self.store.path.replace(self.store.path.with_name(self.store.path.name + '.bak'))
+        except IOError as e:
+            self.print_error(f"Error migrating profiles: {e}")
+            return False
+        
+        self.store = target
+        self.print_success(f"Migrated {len(profiles)} profiles to {target.path}")
+        return True
+    
+    def get_current_git_config(self) -> Optional[Dict[str, str]]:
+        """Get the global name and email from one cached config snapshot."""
+        try:
+            identity = self.git_config.identity()
+        except (subprocess.CalledProcessError, FileNotFoundError):
             return None
+        name = identity.get('user.name', '').strip()
+        email = identity.get('user.email', '').strip()
+        return {'name': name, 'email': email} if name and email else None
     
     def set_git_config(self, name: str, email: str) -> bool:
-        """Set Git global configuration."""
+        """Set the global user.name and user.email.
+        
+        Both keys go into the file `git config --global` would write, in
+        one edit under git's lock protocol, instead of one git process each.
+        """
+        def mutate(config: GitConfigFile) -> bool:
+            changed = config.set('user', None, 'name', name)
+            return config.set('user', None, 'email', email) or changed
+        
         try:
-            subprocess.run(['git', 'config', '--global', 'user.name', name], check=True)
-            subprocess.run(['git', 'config', '--global', 'user.email', email], check=True)
+            with tracing.phase('git-config'):
+                update_config_file(global_config_target(), mutate)
+            self._write_prompt_state(self._match_prompt_state(name, email))
             return True
-        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        except (ConfigLockedError, OSError) as e:
             self.print_error(f"Error setting Git config: {e}")
             return False
+        finally:
+            self.git_config.invalidate()
+    
+    def set_local_git_config(self, username: str, path: Union[str, Path] = '.',
+                             remote: str = 'origin') -> Optional[LocalSwitch]:
+        """Switch only the repository at path to a profile.
+        
+        user.name, user.email and the remote's URL are written to the
+        repository's own config (the main repository's for a linked
+        worktree) in a single write under git's config.lock, without
+        spawning git. The global identity is left alone.
+        """
+        profiles = self.load_profiles()
+        if not self._validate_profile_exists(username, profiles):
+            return None
+        git_dir = find_git_dir(Path(path))
+        if git_dir is None:
+            self.print_error("Not in a Git repository!")
+            return None
+        
+        profile = profiles[username]
+        config_path = Path(os.path.realpath(common_dir(git_dir))) / 'config'
+        urls = {'old': '', 'new': ''}
+        
+        def mutate(config: GitConfigFile) -> bool:
+            changed = config.set('user', None, 'name', profile['name'])
+            changed = config.set('user', None, 'email', profile['email']) or changed
+            old_url = config.get('remote', remote, 'url')
+            if old_url is not None:
+                new_url = self.convert_url_for_profile(old_url, username) or ''
+                urls.update(old=old_url, new=new_url)
+                if new_url:
+                    changed = config.set('remote', remote, 'url', new_url) or changed
+            return changed
+        
+        try:
+            with tracing.phase('git-config'):
+                update_config_file(config_path, mutate)
+        except (ConfigLockedError, OSError) as e:
+            self.print_error(f"Error setting repository Git config: {e}")
+            return None
+        return LocalSwitch(str(config_path), remote, urls['old'], urls['new'])
+    
+    def get_local_identity(self, path: Union[str, Path] = '.') -> Optional[Dict[str, str]]:
+        """Return the identity set in the config of the repository at path, if any.
+        
+        Read straight from the repository's config files (worktree-aware), so
+        it costs a directory walk and a file read rather than a git process.
+        """
+        git_dir = find_git_dir(Path(path))
+        if git_dir is None:
+            return None
+        
+        identity: Dict[str, str] = {}
+        for config_path in local_config_paths(git_dir):
+            config = GitConfigFile.read(config_path)
+            for key in ('name', 'email'):
+                value = config.get('user', None, key)
+                if value is not None:
+                    identity[key] = value
+        return identity or None
+    
+    def describe_local_override(self, path: Union[str, Path] = '.') -> Optional[str]:
+        """Explain how a repository-local identity overrides the global one, or None if it doesn't."""
+        local = self.get_local_identity(path)
+        if not local:
+            return None
+        global_identity = self.get_current_git_config() or {}
+        if all(local.get(key, global_identity.get(key)) == global_identity.get(key) for key in ('name', 'email')):
+            return None
+        
+        def label(identity: Dict[str, str]) -> str:
+            name, email = identity.get('name', ''), identity.get('email', '')
+            username = self.find_profile_by_identity(name, email)
+            return f"'{username}' ({name} <{email}>)" if username else f"{name} <{email}>"
+        
+        effective = {**global_identity, **local}
+        if not global_identity:
+            return f"This repository commits as {label(effective)}; no global identity is set"
+        return f"This repository commits as {label(effective)}, overriding the global profile {label(global_identity)}"
+    
+    def _prompt_watched_files(self, git_dir: Optional[Path] = None) -> List[Path]:
+        """Files whose change makes the prompt state (of the repository at git_dir) stale."""
+        watched = global_config_paths() + [self.store.path]
+        return watched + local_config_paths(git_dir) if git_dir is not None else watched
+    
+    def _match_prompt_state(self, name: str, email: str) -> PromptState:
+        """Build the prompt state for an identity."""
+        return PromptState(self.find_profile_by_identity(name, email) or '', name, email)
+    
+    def _write_prompt_state(self, state: PromptState, path: Path = PROMPT_STATE_FILE) -> None:
+        """Record the prompt state; a prompt must never break a command."""
+        try:
+            write_state(path, state)
+        except OSError:
+            pass
+    
+    def get_prompt_profile(self) -> str:
+        """Return the profile git commits as in the current directory, for a shell prompt ('' if none).
+        
+        Served from the state file while it is fresh; otherwise the identity
+        is read once and the state file rewritten. Inside a repository the
+        state lives in its git dir and covers what git applies there:
+        includeIf bindings (the config snapshot runs in the cwd) and a
+        repository-local user.name/user.email.
+        """
+        git_dir = find_git_dir(Path('.'))
+        state_path = PROMPT_STATE_FILE if git_dir is None else git_dir / REPO_PROMPT_STATE
+        state = read_state(state_path, self._prompt_watched_files(git_dir))
+        if state is None:
+            current = self.get_current_git_config() or {}
+            if git_dir is not None:
+                current = {**current, **(self.get_local_identity() or {})}
+            state = self._match_prompt_state(current.get('name', ''), current.get('email', ''))
+            self._write_prompt_state(state, state_path)
+        return state.username
+    
+    def prompt_shell_init(self, command: str = 'gitsw') -> str:
+        """Return the shell function that reads the prompt state without forking."""
+        return shell_init(PROMPT_STATE_FILE, self._prompt_watched_files(), command, REPO_PROMPT_STATE)
     
     def validate_email(self, email: str) -> bool:
         """Validate email format."""
-        return bool(EMAIL_PATTERN.match(email))
+        import re
+        return bool(re.match(EMAIL_PATTERN, email))
     
     def validate_username(self, username: str) -> bool:
         """Validate username format."""
+        import re
         return (bool(username) and 
                 len(username) <= 39 and 
-                bool(USERNAME_PATTERN.match(username)))
+                bool(re.match(USERNAME_PATTERN, username)))
     
-    def generate_ssh_key(self, email: str, username: str, use_passphrase: bool = True) -> Optional[str]:
+    def validate_key_type(self, key_type: str, bits: Optional[int] = None) -> bool:
+        """Validate a key type and, where the type has a size, its bit length."""
+        error = self._key_type_error(key_type, bits)
+        if error:
+            self.print_error(error)
+            return False
+        return True
+    
+    def _key_type_error(self, key_type: str, bits: Optional[int]) -> Optional[str]:
+        """Describe what is wrong with a key type and size, or return None."""
+        if key_type not in SSH_KEY_TYPES:
+            return f"Unsupported key type '{key_type}' (choose from {', '.join(SSH_KEY_TYPES)})"
+        
+        allowed = SSH_KEY_TYPES[key_type][1]
+        if bits is not None and bits not in allowed:
+            if allowed:
+                return f"{key_type} keys must be {', '.join(map(str, allowed))} bits"
+            return f"{key_type} keys have a fixed size; drop --bits"
+        return None
+    
+    def ssh_key_path(self, username: str, key_type: str = DEFAULT_KEY_TYPE) -> Path:
+        """Return the key file for a profile, named after the key type like ssh-keygen's defaults."""
+        return SSH_DIR / f"id_{key_type}_{username}"
+    
+    def generate_ssh_key(self, email: str, username: str, use_passphrase: bool = True,
+                         multiplex: bool = False, key_type: str = DEFAULT_KEY_TYPE,
+                         bits: Optional[int] = None) -> Optional[str]:
         """Generate SSH key for the profile with Windows support."""
-        key_file = SSH_DIR / f"id_rsa_{username}"
+        if not self.validate_key_type(key_type, bits):
+            return None
+        
+        key_file = self.ssh_key_path(username, key_type)
         
         if key_file.exists():
             self.print_warning(f"SSH key for profile '{username}' already exists!")
             return str(key_file)
         
-        self.print_info(f"Generating SSH key for profile '{username}'...")
+        self.print_info(f"Generating {key_type} SSH key for profile '{username}'...")
         
         passphrase = self._get_passphrase(use_passphrase)
-        return self._create_ssh_key(key_file, email, passphrase, username)
+        return self._create_ssh_key(key_file, email, passphrase, username, multiplex, key_type, bits)
     
     def _get_passphrase(self, use_passphrase: bool) -> str:
         """Get passphrase for SSH key."""
@@ -210,31 +638,41 @@ class GitProfileManager:
         choice = input(f"{colors.YELLOW}Use passphrase? (y/N): {colors.ENDC}").strip().lower()
         
         if choice == 'y':
+            from getpass import getpass
             return getpass(f"{colors.CYAN}Enter passphrase (leave empty for no passphrase): {colors.ENDC}")
         
         return ""
     
-    def _create_ssh_key(self, key_file: Path, email: str, passphrase: str, username: str) -> Optional[str]:
+    def _keygen_command(self, key_file: Path, email: str, passphrase: str, username: str,
+                        key_type: str = DEFAULT_KEY_TYPE, bits: Optional[int] = None) -> List[str]:
+        """Build the ssh-keygen command line for a key type, tagging the comment with the profile."""
+        cmd = ['ssh-keygen', '-t', key_type]
+        bits = bits or SSH_KEY_TYPES[key_type][0]
+        if bits:
+            cmd += ['-b', str(bits)]
+        return cmd + ['-C', f"{email} {KEY_COMMENT_TAG}{username}", '-f', str(key_file), '-N', passphrase]
+    
+    def _create_ssh_key(self, key_file: Path, email: str, passphrase: str, username: str,
+                        multiplex: bool = False, key_type: str = DEFAULT_KEY_TYPE,
+                        bits: Optional[int] = None) -> Optional[str]:
         """Create SSH key file."""
         try:
-            cmd = [
-                'ssh-keygen', '-t', 'rsa', '-b', '4096',
-                '-C', email, '-f', str(key_file), '-N', passphrase
-            ]
+            cmd = self._keygen_command(key_file, email, passphrase, username, key_type, bits)
             
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                shell=self.platform == "Windows"
-            )
+            with tracing.phase('keygen'):
+                result = tracing.run(
+                    cmd,
+                    capture_output=True,
+                    text=True,
+                    shell=self.platform == "Windows"
+                )
             
             if result.returncode != 0:
                 self.print_error(f"Failed to generate SSH key: {result.stderr}")
                 return None
             
             self._set_ssh_key_permissions(key_file)
-            self.update_ssh_config(username, str(key_file))
+            self.update_ssh_config(username, str(key_file), multiplex)
             self.print_success("SSH key generated successfully!")
             
             return str(key_file)
@@ -249,32 +687,124 @@ class GitProfileManager:
             key_file.chmod(0o600)
             Path(f"{key_file}.pub").chmod(0o644)
     
-    def update_ssh_config(self, username: str, key_file: str) -> bool:
-        """Update SSH config for the profile with Windows path handling."""
-        config_file = SSH_DIR / 'config'
+    def update_ssh_config(self, username: str, key_file: str, multiplex: bool = False) -> bool:
+        """Add or update the profile's Host block (idempotent, atomic rewrite)."""
+        from ssh_config import update_ssh_config_file
         
+        try:
+            update_ssh_config_file(SSH_DIR / 'config',
+                                   lambda config: self._set_ssh_host(config, username, key_file, multiplex))
+            return True
+        except IOError as e:
+            self.print_error(f"Error updating SSH config: {e}")
+            return False
+    
+    def _set_ssh_host(self, config: 'SSHConfig', username: str, key_file: str, multiplex: bool = False) -> bool:
+        """Add or update the profile's Host block in a loaded config. Returns True if it changed."""
         # Windows path handling
         if self.platform == "Windows":
             key_file = key_file.replace('\\', '/')
         
-        config_content = f"""
-# Git profile: {username}
-Host github.com-{username}
-    HostName github.com
-    User git
-    IdentityFile {key_file}
-    IdentitiesOnly yes
-
-"""
+        options = [
+            ('HostName', 'github.com'),
+            ('User', 'git'),
+            ('IdentityFile', key_file),
+            ('IdentitiesOnly', 'yes'),
+        ] + self._multiplex_options(multiplex)
+        return config.set_host(f'github.com-{username}', options,
+                               comment=f'Git profile: {username}', managed=SSH_MANAGED_OPTIONS)
+    
+    def remove_ssh_config_entry(self, username: str) -> bool:
+        """Remove the profile's Host block. Returns True if one was removed."""
+        from ssh_config import update_ssh_config_file
+        return update_ssh_config_file(SSH_DIR / 'config', lambda config: config.remove_host(f'github.com-{username}'))
+    
+    def _multiplex_options(self, multiplex: bool) -> List[Tuple[str, str]]:
+        """Return ControlMaster options for a host block, if supported."""
+        if not multiplex:
+            return []
+        if self.platform == "Windows":
+            self.print_warning("SSH connection multiplexing is not supported on Windows; skipping.")
+            return []
+        
+        return [
+            ('ControlMaster', 'auto'),
+            ('ControlPath', SSH_CONTROL_PATH),
+            ('ControlPersist', SSH_CONTROL_PERSIST),
+        ]
+    
+    def warm_ssh_connection(self, username: str) -> bool:
+        """Start a background master connection for a multiplexed profile host.
         
+        Returns immediately: an existing master is detected with `ssh -O check`
+        (a local socket round-trip) and a new one is spawned detached, so the
+        handshake overlaps with whatever the user does next.
+        """
+        if self.platform == "Windows":
+            return False
+        
+        host = f'git@github.com-{username}'
         try:
-            with open(config_file, 'a', encoding='utf-8') as f:
-                f.write(config_content)
-            return True
-        except IOError as e:
-            self.print_error(f"Error updating SSH config: {e}")
+            with tracing.phase('ssh-warm'):
+                check = tracing.run(['ssh', '-O', 'check', host], capture_output=True, timeout=5)
+                if check.returncode == 0:
+                    return True
+                
+                tracing.popen(
+                    ['ssh', '-f', '-N', '-o', 'BatchMode=yes', host],
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    start_new_session=True
+                )
+                return True
+        except (OSError, subprocess.TimeoutExpired):
             return False
     
+    def load_key_into_agent(self, username: str, lifetime: str = SSH_AGENT_LIFETIME,
+                            exclusive: bool = False) -> bool:
+        """Load a profile's key into ssh-agent for lifetime (`ssh-add -t`).
+        
+        Uses the session's agent, or starts one on SSH_AGENT_SOCKET. A key the
+        agent already holds (same fingerprint) is not added again; exclusive
+        also unloads the keys of every other profile.
+        """
+        from ssh_agent import AgentError, add_key, ensure_agent, public_key_fingerprint, remove_keys
+        
+        profiles = self.load_profiles()
+        key_file = profiles.get(username, {}).get('ssh_key')
+        if not key_file:
+            self.print_warning(f"Profile '{username}' has no SSH key to load")
+            return False
+        
+        try:
+            with tracing.phase('ssh-agent'):
+                socket, started, loaded = ensure_agent(SSH_AGENT_SOCKET)
+                
+                if exclusive:
+                    others = [profile['ssh_key'] for other, profile in profiles.items()
+                              if other != username and profile.get('ssh_key') and
+                              public_key_fingerprint(Path(f"{profile['ssh_key']}.pub")) in loaded]
+                    remove_keys(socket, others)
+                    if others:
+                        self.print_info(f"Unloaded {len(others)} other profile key(s) from ssh-agent")
+                
+                fingerprint = public_key_fingerprint(Path(f"{key_file}.pub"))
+                if fingerprint is not None and fingerprint in loaded:
+                    self.print_info(f"Key for '{username}' is already in ssh-agent")
+                else:
+                    add_key(socket, key_file, lifetime)
+                    self.print_success(f"Loaded key for '{username}' into ssh-agent for {lifetime}")
+        except (AgentError, OSError) as e:
+            self.print_warning(f"ssh-agent: {e}")
+            return False
+        
+        if socket != os.environ.get('SSH_AUTH_SOCK'):
+            # Git's ssh only asks the agent this shell knows about
+            action = 'Started' if started else 'Using'
+            self.print_info(f"{action} ssh-agent at {socket}; run: export SSH_AUTH_SOCK={socket}")
+        return True
+    
     def copy_to_clipboard(self, text: str) -> bool:
         """Copy text to clipboard with enhanced platform support."""
         clipboard_methods = {
@@ -289,9 +819,7 @@ Host github.com-{username}
     def _copy_to_clipboard_macos(self, text: str) -> bool:
         """Copy to clipboard on macOS."""
         try:
-            process = subprocess.Popen(['pbcopy'], stdin=subprocess.PIPE)
-            process.communicate(text.encode('utf-8'))
-            return process.returncode == 0
+            return tracing.run(['pbcopy'], input=text.encode('utf-8')).returncode == 0
         except (subprocess.CalledProcessError, FileNotFoundError):
             return False
     
@@ -300,13 +828,11 @@ Host github.com-{username}
         try:
             # Try PowerShell first
             cmd = ['powershell', '-command', f'"{text}" | Set-Clipboard']
-            if subprocess.run(cmd, capture_output=True, shell=True).returncode == 0:
+            if tracing.run(cmd, capture_output=True, shell=True).returncode == 0:
                 return True
             
             # Fallback to clip
-            process = subprocess.Popen(['clip'], stdin=subprocess.PIPE, shell=True)
-            process.communicate(text.encode('utf-8'))
-            return process.returncode == 0
+            return tracing.run(['clip'], input=text.encode('utf-8'), shell=True).returncode == 0
         except (subprocess.CalledProcessError, FileNotFoundError):
             return False
     
@@ -320,9 +846,7 @@ Host github.com-{username}
         
         for cmd in clipboard_tools:
             try:
-                process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
-                process.communicate(text.encode('utf-8'))
-                if process.returncode == 0:
+                if tracing.run(cmd, input=text.encode('utf-8')).returncode == 0:
                     return True
             except FileNotFoundError:
                 continue
@@ -332,6 +856,7 @@ Host github.com-{username}
     def open_github_ssh_settings(self) -> bool:
         """Open GitHub SSH settings page."""
         try:
+            import webbrowser
             return webbrowser.open(GITHUB_SSH_URL)
         except Exception:
             return self._open_url_fallback(GITHUB_SSH_URL)
@@ -347,7 +872,7 @@ Host github.com-{username}
         cmd = commands.get(self.platform, ['xdg-open', url])
         
         try:
-            subprocess.run(cmd, shell=self.platform == "Windows")
+            tracing.run(cmd, shell=self.platform == "Windows")
             return True
         except (subprocess.CalledProcessError, FileNotFoundError):
             return False
@@ -415,6 +940,470 @@ Host github.com-{username}
         print(f"\n{colors.BOLD}Repository URL format:{colors.ENDC}")
         print(f"{colors.GREEN}git@github.com-{username}:username/repository.git{colors.ENDC}")
     
+    def _validate_manifest(self, rows: Iterable[Tuple[int, Dict[str, Any]]], profiles: Dict[str, Any],
+                           skip_existing: bool) -> Tuple[List[Dict[str, Any]], List[str], List[str]]:
+        """Normalize and validate every manifest row before anything is written.
+        
+        Returns (entries to create, skipped usernames, errors).
+        """
+        from manifest import parse_bool
+        entries: List[Dict[str, Any]] = []
+        skipped: List[str] = []
+        errors: List[str] = []
+        seen = set()
+        
+        for number, row in rows:
+            username = str(row.get('username', '')).strip()
+            email = str(row.get('email', '')).strip()
+            key_type = str(row.get('key_type') or DEFAULT_KEY_TYPE).strip()
+            problems = []
+            if not self.validate_username(username):
+                problems.append(f"invalid username '{username}'")
+            if not self.validate_email(email):
+                problems.append(f"invalid email '{email}'")
+            try:
+                bits = int(row['bits']) if row.get('bits') not in (None, '') else None
+            except (TypeError, ValueError):
+                bits = None
+                problems.append(f"invalid bits '{row['bits']}'")
+            key_error = self._key_type_error(key_type, bits)
+            if key_error:
+                problems.append(key_error)
+            if username in seen:
+                problems.append(f"duplicate username '{username}'")
+            elif username in profiles and not problems:
+                if skip_existing:
+                    skipped.append(username)
+                    continue
+                problems.append(f"profile '{username}' already exists")
+            seen.add(username)
+            
+            if problems:
+                errors.append(f"row {number}: {'; '.join(problems)}")
+                continue
+            
+            ssh_key = row.get('ssh_key')
+            entries.append({
+                'username': username,
+                'name': str(row.get('name') or username).strip(),
+                'email': email,
+                'key_type': key_type,
+                'bits': bits,
+                'ssh_key': Path(ssh_key).expanduser() if ssh_key else self.ssh_key_path(username, key_type),
+                'multiplex': parse_bool(row.get('ssh_multiplex', row.get('multiplex', False))),
+            })
+        
+        return entries, skipped, errors
+    
+    def _generate_key_quietly(self, entry: Dict[str, Any]) -> str:
+        """Generate a passphrase-less key for a manifest entry. Returns an error message or ''."""
+        key_file = entry['ssh_key']
+        try:
+            key_file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            with tracing.phase('keygen'):
+                result = tracing.run(
+                    self._keygen_command(key_file, entry['email'], '', entry['username'], entry['key_type'],
+                                         entry['bits']),
+                    capture_output=True,
+                    text=True,
+                    stdin=subprocess.DEVNULL,
+                    shell=self.platform == "Windows"
+                )
+            if result.returncode != 0:
+                return result.stderr.strip() or f"ssh-keygen exited with {result.returncode}"
+            self._set_ssh_key_permissions(key_file)
+        except OSError as e:
+            return str(e)
+        return ''
+    
+    def import_profiles(self, rows: Iterable[Tuple[int, Dict[str, Any]]], skip_existing: bool = False,
+                        dry_run: bool = False, max_workers: int = IMPORT_KEYGEN_WORKERS) -> ImportResult:
+        """Create many profiles from manifest rows.
+        
+        All rows are validated first and nothing is written if any is invalid.
+        Missing keys are generated without a passphrase by parallel ssh-keygen
+        processes; the SSH config and the profile store are then each written
+        once. Rows whose key generation fails are reported and left out.
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        from ssh_config import update_ssh_config_file
+        profiles = self.load_profiles()
+        entries, skipped, errors = self._validate_manifest(rows, profiles, skip_existing)
+        missing = [entry for entry in entries if not entry['ssh_key'].exists()]
+        if errors:
+            return ImportResult([], [], skipped, errors)
+        if dry_run:
+            return ImportResult([entry['username'] for entry in entries],
+                                [entry['username'] for entry in missing], skipped, errors)
+        
+        self.ensure_environment()
+        generated: List[str] = []
+        failed = set()
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {pool.submit(self._generate_key_quietly, entry): entry['username'] for entry in missing}
+            for future in as_completed(futures):
+                username = futures[future]
+                error = future.result()
+                if error:
+                    failed.add(username)
+                    errors.append(f"{username}: {error}")
+                else:
+                    generated.append(username)
+        
+        created = [entry for entry in entries if entry['username'] not in failed]
+        if not created:
+            return ImportResult([], generated, skipped, errors)
+        
+        def add_hosts(config: 'SSHConfig') -> bool:
+            changed = False
+            for entry in created:
+                changed = self._set_ssh_host(config, entry['username'], str(entry['ssh_key']), entry['multiplex']) or changed
+            return changed
+        
+        try:
+            update_ssh_config_file(SSH_DIR / 'config', add_hosts)
+        except IOError as e:
+            errors.append(f"Error updating SSH config: {e}")
+            return ImportResult([], generated, skipped, errors)
+        
+        for entry in created:
+            profile = {'name': entry['name'], 'email': entry['email'], 'ssh_key': str(entry['ssh_key'])}
+            if entry['multiplex']:
+                profile['ssh_multiplex'] = True
+            profiles[entry['username']] = profile
+        if not self.save_profiles(profiles):
+            return ImportResult([], generated, skipped, errors + ["Failed to save profiles"])
+        
+        return ImportResult([entry['username'] for entry in created], generated, skipped, errors)
+    
+    def export_profiles(self, stream: TextIO, fmt: str, fields: Optional[Iterable[str]] = None) -> int:
+        """Write every profile to a stream as a manifest. Returns the number written."""
+        from manifest import manifest_rows, write_manifest
+        return write_manifest(stream, manifest_rows(self.load_profiles(), fields), fmt)
+    
+    def find_drift(self) -> List[Drift]:
+        """Compare the profile store, SSH_DIR and ~/.ssh/config in one pass.
+        
+        Each source is read once: the store, one listing of SSH_DIR and one
+        parse of the SSH config. Only Host blocks named like gitsw's
+        (github.com-<profile>) are considered. A key is only an orphan when
+        gitsw generated it (id_<type>_<name>, with `gitsw:<name>` in its
+        public key's comment) and neither a profile nor a surviving Host block
+        names it; keys the user made, and OpenSSH's id_*_sk defaults, never are.
+        """
+        from ssh_config import SSHConfig
+        profiles = self.load_profiles()
+        config = SSHConfig.load(SSH_DIR / 'config')
+        try:
+            listing = {entry.name for entry in os.scandir(SSH_DIR)}
+        except FileNotFoundError:
+            listing = set()
+        
+        drift: List[Drift] = []
+        referenced = set()
+        for username, profile in profiles.items():
+            if 'ssh_key' not in profile:
+                continue
+            key_file = Path(profile['ssh_key'])
+            referenced.add(os.path.normcase(os.path.abspath(key_file)))
+            exists = key_file.name in listing if key_file.parent == SSH_DIR else key_file.exists()
+            if not exists:
+                drift.append(Drift('missing-key', username, f"{key_file} no longer exists"))
+            elif config.find(f'github.com-{username}') is None:
+                drift.append(Drift('missing-host', username, f"no Host github.com-{username} in the SSH config"))
+        
+        for block in config.hosts():
+            orphaned = False
+            for alias in block.patterns:
+                owner = alias[len('github.com-'):] if alias.startswith('github.com-') else None
+                if owner and owner not in profiles:
+                    drift.append(Drift('orphan-host', alias, f"no profile named '{owner}'"))
+                    orphaned = True
+            # A key another Host block still names is in use, even if no profile owns it
+            identity = block.get('IdentityFile')
+            if identity and not orphaned:
+                referenced.add(os.path.normcase(os.path.abspath(os.path.expanduser(identity))))
+        
+        prefixes = tuple(f"id_{key_type}_" for key_type in SSH_KEY_TYPES)
+        for name in sorted(listing):
+            key_file = SSH_DIR / name
+            if (not name.startswith(prefixes) or name.endswith('.pub') or name in OPENSSH_DEFAULT_KEYS or
+                    f"{name}.pub" not in listing or os.path.normcase(os.path.abspath(key_file)) in referenced):
+                continue
+            owner = name.split('_', 2)[2]
+            if key_comment_owner(SSH_DIR / f"{name}.pub") == owner:
+                drift.append(Drift('orphan-key', str(key_file), f"generated for '{owner}', not used by any profile"))
+        return drift
+    
+    def reconcile(self, drift: List[Drift], prune_keys: bool = False) -> Optional[List[Drift]]:
+        """Fix drift reported by find_drift(), writing each file once.
+        
+        Profiles whose key is gone leave the store in one save; their Host
+        blocks, orphan Host blocks and missing Host blocks are fixed in one SSH
+        config rewrite; health, usage and directory bindings are updated once
+        each. A removed profile's leftover public key is deleted with it.
+        Orphan key files are only deleted with prune_keys. The store and
+        the SSH config stay locked throughout, and drift that has gone away
+        since the scan is skipped. Returns what was fixed, or None on error.
+        """
+        from file_lock import locked
+        from ssh_config import update_ssh_config_file
+        config_file = SSH_DIR / 'config'
+        
+        try:
+            with locked(self.store.path), locked(config_file):
+                planned = set(drift)
+                fixes = [item for item in self.find_drift() if item in planned and
+                         (prune_keys or item.kind != 'orphan-key')]
+                subjects = {kind: [item.subject for item in fixes if item.kind == kind] for kind in DRIFT_ACTIONS}
+                
+                profiles = self.load_profiles()
+                removed = {username: profiles.pop(username) for username in subjects['missing-key']}
+                if removed and not self.save_profiles(profiles):
+                    return None
+                
+                def fix_hosts(config: 'SSHConfig') -> bool:
+                    changed = False
+                    for alias in subjects['orphan-host'] + [f'github.com-{username}' for username in removed]:
+                        changed = config.remove_host(alias) or changed
+                    for username in subjects['missing-host']:
+                        profile = profiles[username]
+                        changed = self._set_ssh_host(config, username, profile['ssh_key'],
+                                                     bool(profile.get('ssh_multiplex'))) or changed
+                    return changed
+                
+                update_ssh_config_file(config_file, fix_hosts)
+                
+                if removed:
+                    self.health.remove_many(removed)
+                    self.usage.remove_many(removed)
+                    if any(profile.get('directories') for profile in removed.values()):
+                        self.sync_directory_bindings(profiles)
+                stale = subjects['orphan-key'] + [profile['ssh_key'] for profile in removed.values()]
+                for key_file in stale:
+                    for path in (key_file, f"{key_file}.pub"):
+                        try:
+                            os.unlink(path)
+                        except FileNotFoundError:
+                            pass
+        except IOError as e:
+            self.print_error(f"Error reconciling profiles: {e}")
+            return None
+        return fixes
+    
+    def convert_url_for_profile(self, current_url: str, username: str) -> Optional[str]:
+        """Convert a GitHub remote URL to the profile's host alias, or None if unsupported."""
+        if current_url.startswith('git@github.com'):
+            return self._convert_ssh_url(current_url, username)
+        elif current_url.startswith('https://github.com/'):
+            return self._convert_https_url(current_url, username)
+        return None
+    
+    def _convert_ssh_url(self, current_url: str, username: str) -> Optional[str]:
+        """Convert SSH URL for profile."""
+        if 'github.com-' in current_url:
+            # Replace existing profile
+            parts = current_url.split('github.com-')
+            old_profile = parts[1].split(':')[0]
+            return current_url.replace(f'github.com-{old_profile}:', f'github.com-{username}:')
+        elif 'github.com:' in current_url:
+            # Add profile to existing SSH URL
+            repo_part = current_url.split('github.com:')[1]
+            return f"git@github.com-{username}:{repo_part}"
+        return None
+    
+    def _convert_https_url(self, current_url: str, username: str) -> str:
+        """Convert HTTPS URL to SSH with profile."""
+        repo_part = current_url.replace('https://github.com/', '')
+        return f"git@github.com-{username}:{repo_part}"
+    
+    def rewrite_remotes(self, roots: List[Path], username: str, remotes: Optional[List[str]] = None,
+                        dry_run: bool = False, max_workers: int = REWRITE_WORKERS,
+                        max_depth: int = REWRITE_MAX_DEPTH) -> List[RemoteRewrite]:
+        """Point the remotes of every repository under roots at a profile.
+        
+        Repositories (clones, worktrees and bare repos) are found by walking
+        the roots, and each config file is edited directly under git's
+        config.lock protocol on a thread pool; no git process is spawned.
+        remotes=None rewrites every remote with a GitHub URL.
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        results: List[RemoteRewrite] = []
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = [
+                pool.submit(self._rewrite_repository_remotes, git_dir, username, remotes, dry_run)
+                for git_dir in find_repositories(roots, max_depth)
+            ]
+            for future in as_completed(futures):
+                results.extend(future.result())
+        return results
+    
+    def _rewrite_repository_remotes(self, git_dir: Path, username: str, remotes: Optional[List[str]],
+                                    dry_run: bool) -> List[RemoteRewrite]:
+        """Rewrite the remotes of one repository in a single locked write."""
+        repository = str(git_dir)
+        results: List[RemoteRewrite] = []
+        
+        def mutate(config: GitConfigFile) -> bool:
+            results.clear()
+            available = config.subsections('remote')
+            names = available if remotes is None else [name for name in remotes if name in available]
+            changed = False
+            for name in names:
+                old_url = config.get('remote', name, 'url')
+                if old_url is None:
+                    continue
+                new_url = self.convert_url_for_profile(old_url, username)
+                if new_url is None:
+                    results.append(RemoteRewrite(repository, name, old_url, '', 'skipped', 'unsupported URL'))
+                elif new_url == old_url:
+                    results.append(RemoteRewrite(repository, name, old_url, new_url, 'unchanged'))
+                else:
+                    config.set('remote', name, 'url', new_url)
+                    results.append(RemoteRewrite(repository, name, old_url, new_url,
+                                                 'would update' if dry_run else 'updated'))
+                    changed = True
+            return changed
+        
+        try:
+            update_config_file(git_dir / 'config', mutate, dry_run)
+        except (ConfigLockedError, OSError) as e:
+            return [RemoteRewrite(repository, '', '', '', 'error', str(e))]
+        return results
+    
+    def include_file_for(self, username: str) -> Path:
+        """Return the generated Git config include file for a profile."""
+        return INCLUDE_DIR / f"{username}.gitconfig"
+    
+    def _normalize_binding_directory(self, directory: Union[str, Path]) -> str:
+        """Return an absolute directory with the trailing slash that makes gitdir: a prefix match."""
+        path = os.path.abspath(os.path.expanduser(str(directory))).replace('\\', '/')
+        return path.rstrip('/') + '/'
+    
+    def get_directory_bindings(self, profiles: Optional[Dict[str, Any]] = None) -> List[Tuple[str, str]]:
+        """Return (directory, username) bindings, least specific first.
+        
+        Git applies includes in file order and the last match wins, so this is
+        also the order the includeIf rules are written in.
+        """
+        profiles = self.load_profiles() if profiles is None else profiles
+        bindings = [(directory, username) for username, profile in profiles.items()
+                    for directory in profile.get('directories', [])]
+        return sorted(bindings, key=lambda binding: (len(binding[0]), binding[0]))
+    
+    def bind_directory(self, username: str, directory: Union[str, Path]) -> bool:
+        """Bind a directory to a profile; a directory belongs to one profile at a time."""
+        profiles = self.load_profiles()
+        if not self._validate_profile_exists(username, profiles):
+            return False
+        
+        directory = self._normalize_binding_directory(directory)
+        for other, profile in profiles.items():
+            directories = profile.get('directories', [])
+            if other == username and directory not in directories:
+                profiles[other] = {**profile, 'directories': directories + [directory]}
+            elif other != username and directory in directories:
+                profiles[other] = {**profile, 'directories': [d for d in directories if d != directory]}
+        
+        return self.save_profiles(profiles) and self.sync_directory_bindings(profiles)
+    
+    def unbind_directory(self, directory: Union[str, Path]) -> Optional[str]:
+        """Remove a directory binding. Returns the profile it was bound to, if any."""
+        profiles = self.load_profiles()
+        directory = self._normalize_binding_directory(directory)
+        for username, profile in profiles.items():
+            directories = profile.get('directories', [])
+            if directory in directories:
+                profiles[username] = {**profile, 'directories': [d for d in directories if d != directory]}
+                if self.save_profiles(profiles) and self.sync_directory_bindings(profiles):
+                    return username
+                return None
+        return None
+    
+    def explain_directory(self, path: Union[str, Path]) -> Tuple[Optional[str], Optional[str], str]:
+        """Work out which binding git applies at path, without running git.
+        
+        Returns (username, bound directory, git dir matched against). Outside
+        a repository the git dir a repository at path would have is used.
+        """
+        git_dir = find_git_dir(Path(path)) or Path(os.path.abspath(path)) / '.git'
+        candidates = {self._normalize_binding_directory(git_dir),
+                      self._normalize_binding_directory(os.path.realpath(git_dir))}
+        
+        match: Tuple[Optional[str], Optional[str]] = (None, None)
+        for directory, username in self.get_directory_bindings():
+            if any(candidate.startswith(directory) for candidate in candidates):
+                match = (username, directory)
+        return match[0], match[1], str(git_dir)
+    
+    def _is_managed_include(self, path: str) -> bool:
+        """Return True if an include path points at one of our generated files."""
+        parent = os.path.dirname(os.path.expanduser(path))
+        return os.path.realpath(parent) == os.path.realpath(INCLUDE_DIR)
+    
+    def _render_include_file(self, username: str, profile: Dict[str, Any]) -> str:
+        """Render the identity a bound directory switches to."""
+        import shlex
+        config = GitConfigFile(f"# Generated by gitsw for profile '{username}'; edits are overwritten.\n")
+        config.append_section('user', None, [('name', profile['name']), ('email', profile['email'])])
+        if 'ssh_key' in profile:
+            key = shlex.quote(Path(profile['ssh_key']).as_posix())
+            config.append_section('core', None, [('sshCommand', f"ssh -i {key} -o IdentitiesOnly=yes")])
+        return config.render()
+    
+    def _write_include_file(self, path: Path, text: str) -> bool:
+        """Replace an include file's content under the config lock."""
+        def mutate(config: GitConfigFile) -> bool:
+            if config.render() == text:
+                return False
+            config.lines = text.splitlines(keepends=True)
+            return True
+        
+        return update_config_file(path, mutate)
+    
+    def sync_directory_bindings(self, profiles: Optional[Dict[str, Any]] = None) -> bool:
+        """Regenerate include files and the includeIf rules in the global Git config.
+        
+        Managed rules are removed and re-appended at the end of the file, most
+        specific last, in one locked write. An empty [user] section is kept
+        above them so `git config --global user.*` edits land before the rules
+        instead of after them.
+        """
+        profiles = self.load_profiles() if profiles is None else profiles
+        bindings = self.get_directory_bindings(profiles)
+        bound = {username for _, username in bindings}
+        
+        def mutate(config: GitConfigFile) -> bool:
+            before = config.render()
+            for subsection in config.subsections('includeif'):
+                path = config.get('includeif', subsection, 'path')
+                if path and self._is_managed_include(path):
+                    config.remove_section('includeif', subsection)
+            if bindings and not config.has_section('user'):
+                config.append_section('user', None, [])
+            for directory, username in bindings:
+                config.append_section('includeIf', f"gitdir:{directory}",
+                                      [('path', self.include_file_for(username).as_posix())])
+            return config.render() != before
+        
+        try:
+            if bound:
+                INCLUDE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+            for username in bound:
+                self._write_include_file(self.include_file_for(username),
+                                         self._render_include_file(username, profiles[username]))
+            update_config_file(global_config_target(), mutate)
+            if INCLUDE_DIR.exists():
+                for stale in INCLUDE_DIR.glob('*.gitconfig'):
+                    if stale.stem not in bound:
+                        stale.unlink()
+            return True
+        except (ConfigLockedError, OSError) as e:
+            self.print_error(f"Error updating directory bindings: {e}")
+            return False
+        finally:
+            self.git_config.invalidate()
+    
     def test_github_connection(self, username: str) -> bool:
         """Test SSH connection to GitHub for a specific profile."""
         profiles = self.load_profiles()
@@ -428,15 +1417,35 @@ Host github.com-{username}
         
         self.print_info(f"Testing GitHub connection for profile '{username}'...")
         
+        start = time.monotonic()
         try:
             self.add_github_to_known_hosts()
-            return self._perform_ssh_test(username, profile)
+            success = self._perform_ssh_test(username, profile)
+            error = '' if success else 'connection failed'
         except subprocess.TimeoutExpired:
             self.print_error("Connection timeout! Check your internet connection.")
-            return False
+            success, error = False, 'timeout'
         except Exception as e:
             self.print_error(f"Error testing connection: {e}")
-            return False
+            success, error = False, str(e)
+        
+        self.record_connection_health([ConnectionResult(username, success, time.monotonic() - start, error)])
+        return success
+    
+    def record_connection_health(self, results: List[ConnectionResult]) -> None:
+        """Remember test outcomes so later switches can skip the live test."""
+        try:
+            self.health.record_many(results)
+        except OSError:
+            pass
+    
+    def get_connection_health(self, username: str) -> Optional[Dict[str, Any]]:
+        """Get the last recorded test outcome for a profile (no network I/O)."""
+        return self.health.get(username)
+    
+    def is_health_fresh(self, entry: Optional[Dict[str, Any]], max_age: float = HEALTH_TTL) -> bool:
+        """Check whether a recorded outcome is recent enough to trust."""
+        return is_fresh(entry, max_age)
     
     def _validate_profile_exists(self, username: str, profiles: Dict[str, Any]) -> bool:
         """Validate that the profile exists."""
@@ -454,19 +1463,81 @@ Host github.com-{username}
     
     def _perform_ssh_test(self, username: str, profile: Dict[str, Any]) -> bool:
         """Perform the actual SSH connection test."""
+        result = self._run_ssh_test(username, profile, SSH_TEST_TIMEOUT)
+        return self._handle_ssh_test_result(result, username, profile)
+    
+    def _run_ssh_test(self, username: str, profile: Dict[str, Any], timeout: float) -> subprocess.CompletedProcess:
+        """Run `ssh -T` against the profile's host alias."""
         cmd = ['ssh', '-T', f'git@github.com-{username}']
         env = self._prepare_ssh_environment(profile)
         
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            env=env,
-            timeout=15,
-            shell=self.platform == "Windows"
-        )
+        with tracing.phase('ssh-test'):
+            return tracing.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                env=env,
+                timeout=timeout,
+                shell=self.platform == "Windows"
+            )
+    
+    def check_github_connection(self, username: str, profile: Dict[str, Any],
+                                timeout: float = SSH_TEST_TIMEOUT) -> ConnectionResult:
+        """Test a profile's SSH connection without printing anything."""
+        if 'ssh_key' not in profile:
+            return ConnectionResult(username, False, 0.0, 'no SSH key')
         
-        return self._handle_ssh_test_result(result, username, profile)
+        start = time.monotonic()
+        try:
+            result = self._run_ssh_test(username, profile, timeout)
+        except subprocess.TimeoutExpired:
+            return ConnectionResult(username, False, time.monotonic() - start, f'timeout after {timeout:.1f}s')
+        except OSError as e:
+            return ConnectionResult(username, False, time.monotonic() - start, str(e))
+        
+        latency = time.monotonic() - start
+        if "successfully authenticated" in result.stderr.lower():
+            return ConnectionResult(username, True, latency)
+        
+        lines = [line.strip() for line in result.stderr.splitlines() if line.strip()]
+        return ConnectionResult(username, False, latency, lines[-1] if lines else f'exit code {result.returncode}')
+    
+    def test_connections(self, usernames: List[str], max_workers: int = SSH_TEST_WORKERS,
+                         timeout: float = SSH_TEST_TIMEOUT, deadline: Optional[float] = SSH_TEST_DEADLINE,
+                         on_result: Optional[Callable[[ConnectionResult], None]] = None) -> List[ConnectionResult]:
+        """Test many profiles concurrently.
+        
+        At most max_workers tests run at once. Each test gets the smaller of
+        timeout and the time left before the global deadline, so the whole
+        run finishes within deadline seconds. Results are passed to on_result
+        as they complete and returned in completion order.
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        profiles = self.load_profiles()
+        self.add_github_to_known_hosts()
+        deadline_at = time.monotonic() + deadline if deadline else None
+        
+        def run_one(username: str) -> ConnectionResult:
+            budget = timeout
+            if deadline_at is not None:
+                budget = min(timeout, deadline_at - time.monotonic())
+                if budget <= 0:
+                    return ConnectionResult(username, False, 0.0, 'deadline exceeded')
+            if username not in profiles:
+                return ConnectionResult(username, False, 0.0, 'profile not found')
+            return self.check_github_connection(username, profiles[username], budget)
+        
+        results = []
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = [pool.submit(run_one, username) for username in usernames]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if on_result:
+                    on_result(result)
+        
+        self.record_connection_health([result for result in results if result.error != 'deadline exceeded'])
+        return results
     
     def _prepare_ssh_environment(self, profile: Dict[str, Any]) -> Dict[str, str]:
         """Prepare environment for SSH command."""
@@ -498,41 +1569,41 @@ Host github.com-{username}
         print(f"{colors.YELLOW}Email: {profile['email']}{colors.ENDC}")
     
     def add_github_to_known_hosts(self) -> None:
-        """Add GitHub to SSH known_hosts with Windows support."""
+        """Pin GitHub's published host keys in known_hosts (no network access)."""
+        from known_hosts import GITHUB_HOST_KEYS, HOST_MISMATCH, HOST_MISSING, HOST_REVOKED, check_host
+        from file_lock import locked
         known_hosts = SSH_DIR / 'known_hosts'
         
-        if self._is_github_in_known_hosts(known_hosts):
-            return
-        
-        self._add_github_host_key(known_hosts)
-    
-    def _is_github_in_known_hosts(self, known_hosts: Path) -> bool:
-        """Check if GitHub is already in known_hosts."""
-        if not known_hosts.exists():
-            return False
-        
         try:
-            with open(known_hosts, 'r', encoding='utf-8') as f:
-                content = f.read()
-            return GITHUB_HOST_KEY in content
+            # Check and append as one step, so concurrent runs add the keys once
+            with locked(known_hosts):
+                with tracing.phase('known-hosts'):
+                    status = check_host(known_hosts, GITHUB_HOST_KEY, GITHUB_HOST_KEYS)
+                if status == HOST_REVOKED:
+                    self.print_warning(f"A GitHub host key is marked @revoked in {known_hosts}; not re-adding it.")
+                elif status == HOST_MISMATCH:
+                    # Never add keys next to a conflicting entry; the user has to decide which is right
+                    self.print_warning(f"{known_hosts} lists {GITHUB_HOST_KEY} with a key GitHub does not publish; "
+                                       f"not adding the pinned keys. If GitHub rotated its key, run "
+                                       f"`ssh-keygen -R {GITHUB_HOST_KEY}` and try again.")
+                elif status == HOST_MISSING:
+                    self._add_github_host_key(known_hosts)
         except IOError:
-            return False
+            return
     
     def _add_github_host_key(self, known_hosts: Path) -> None:
-        """Add GitHub host key to known_hosts."""
+        """Append GitHub's pinned host keys to known_hosts."""
+        from known_hosts import GITHUB_HOST_KEYS, format_entries
         try:
-            cmd = ['ssh-keyscan', '-t', 'rsa', GITHUB_HOST_KEY]
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                shell=self.platform == "Windows"
-            )
-            
-            if result.returncode == 0 and result.stdout:
-                with open(known_hosts, 'a', encoding='utf-8') as f:
-                    f.write(result.stdout)
-        except (IOError, subprocess.CalledProcessError):
+            with open(known_hosts, 'a+b') as f:
+                # Make sure our lines don't get glued onto an unterminated last line
+                size = f.seek(0, os.SEEK_END)
+                if size:
+                    f.seek(size - 1)
+                    if f.read(1) != b'\n':
+                        f.write(b'\n')
+                f.write(''.join(format_entries(GITHUB_HOST_KEY, GITHUB_HOST_KEYS)).encode('utf-8'))
+        except IOError:
             pass
     
     def print_troubleshooting_tips(self) -> None:
@@ -554,10 +1625,18 @@ Host github.com-{username}
             print(f"{colors.CYAN}2. Check SSH key permissions (chmod 600){colors.ENDC}")
     
     # Utility methods for consistent output
+    @property
+    def screen(self) -> 'Screen':
+        """The frame renderer for stdout, created on first use."""
+        if self._screen is None:
+            from screen import Screen
+            # Colors are disabled exactly when the console can't do escapes
+            self._screen = Screen(ansi=bool(colors.ENDC))
+        return self._screen
+    
     def clear_screen(self) -> None:
-        """Clear the terminal screen with cross-platform support."""
-        clear_cmd = 'cls' if self.platform == "Windows" else 'clear'
-        os.system(clear_cmd)
+        """Clear the terminal with ANSI escapes (no-op when stdout is not a terminal)."""
+        self.screen.clear()
     
     def print_header(self, title: str) -> None:
         """Print a formatted header."""
@@ -580,4 +1659,7 @@ Host github.com-{username}
         print(f"{colors.CYAN}ℹ️  {message}{colors.ENDC}")
 
 # Export the main class
-__all__ = ['GitProfileManager', 'colors'] 
\ No newline at end of file
+__all__ = [
+    'DEFAULT_KEY_TYPE', 'SSH_KEY_TYPES', 'ConnectionResult', 'GitProfileManager', 'IdentityMatch', 'ImportResult',
+    'RemoteRewrite', 'colors',
+] 
\ No newline at end of file
@@ -5,22 +5,44 @@ Git Profiles - CLI Interface
 Command-line interface for Git Profile Manager.
 """
 
+import argparse
+import os
 import subprocess
 import sys
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 
-from git_profile_manager import GitProfileManager, colors
+from git_profile_manager import (
+    DEFAULT_KEY_TYPE, HEALTH_TTL, IMPORT_KEYGEN_WORKERS, REWRITE_MAX_DEPTH, REWRITE_WORKERS, SSH_KEY_TYPES,
+    SSH_AGENT_LIFETIME, SSH_TEST_DEADLINE, SSH_TEST_TIMEOUT, SSH_TEST_WORKERS, UPDATE_CACHE_FILE,
+    DRIFT_ACTIONS, ConnectionResult, GitProfileManager, IdentityMatch, RemoteRewrite, colors
+)
+from profile_store import BACKENDS, backend_name
+from manifest import FORMATS, ManifestError, detect_format, read_manifest
+import tracing
+
+VERSION = "2.3.0"
 
 class GitProfileCLI:
     """CLI interface for Git Profile Manager."""
     
-    def __init__(self) -> None:
-        """Initialize the CLI."""
-        self.manager = GitProfileManager()
+    def __init__(self, manager: Optional[GitProfileManager] = None) -> None:
+        """Initialize the CLI.
+        
+        Environment checks (tool probes, ~/.ssh permissions) are deferred
+        until a key is generated, so browsing and switching start fast.
+        """
+        self.manager = manager or GitProfileManager(setup_environment=False)
+        self._updates: Any = None
+        self._notice = ''
     
     def print_ascii_header(self) -> None:
         """Print ASCII art header."""
+        print('\n'.join(self._header_lines()))
+    
+    def _header_lines(self) -> List[str]:
+        """ASCII art header, one string per screen line."""
         header = f"""
 {colors.GREEN}   _______ _____ _______     {colors.CYAN}____  ____   ____  ______ _____ __    _____ _____
 {colors.GREEN}  / ____(_) __/_  __(_)    {colors.CYAN}/ __ \/ __ \ / __ \/ ____//   _// /   / ___// ___/
@@ -31,44 +53,79 @@ class GitProfileCLI:
 {colors.BOLD}{colors.CYAN}                    🚀 Git Profile Manager v2.3 🚀{colors.ENDC}
 {colors.YELLOW}              Switch between multiple GitHub accounts seamlessly{colors.ENDC}
 """
-        print(header)
+        return header.split('\n')
     
     def print_status_bar(self) -> None:
         """Print current Git configuration status."""
+        print('\n'.join(self._status_lines()))
+    
+    def _status_lines(self) -> List[str]:
+        """Current Git configuration status, one string per screen line."""
         current = self.manager.get_current_git_config()
+        if not current:
+            return ['', f"{colors.YELLOW}⚠️  No Git configuration found!{colors.ENDC}"]
         
-        if current:
-            self._print_current_profile(current)
-        else:
-            print(f"\n{colors.YELLOW}⚠️  No Git configuration found!{colors.ENDC}")
+        lines = [
+            '',
+            f"{colors.BOLD}Current Profile:{colors.ENDC}",
+            f"{colors.GREEN}📝 Name: {current['name']}{colors.ENDC}",
+            f"{colors.BLUE}📧 Email: {current['email']}{colors.ENDC}",
+        ]
+        
+        # Find matching profile, or the closest one when only the name or email matches
+        match = self.manager.match_identity(current['name'], current['email'])
+        if match and match.matched == 'identity':
+            lines.append(f"{colors.CYAN}👤 Profile: {match.username}{colors.ENDC}")
+            lines.append(self._cached_health_line(match.username))
+        elif match:
+            note = self._partial_match_note(match)
+            lines.append(f"{colors.YELLOW}👤 Closest profile: {match.username} ({note}){colors.ENDC}")
+        return lines
+    
+    def _partial_match_note(self, match: IdentityMatch) -> str:
+        """Say which half of the identity a partial match agrees on."""
+        other = 'name' if match.matched == 'email' else 'email'
+        return f"same {match.matched}, different {other}"
+    
+    def _print_cached_health(self, username: str) -> None:
+        """Print the last recorded connection result without any network I/O."""
+        print(self._cached_health_line(username))
     
-    def _print_current_profile(self, current: Dict[str, str]) -> None:
-        """Print current profile information."""
-        print(f"\n{colors.BOLD}Current Profile:{colors.ENDC}")
-        print(f"{colors.GREEN}📝 Name: {current['name']}{colors.ENDC}")
-        print(f"{colors.BLUE}📧 Email: {current['email']}{colors.ENDC}")
+    def _cached_health_line(self, username: str) -> str:
+        """The last recorded connection result as one colored line."""
+        entry = self.manager.get_connection_health(username)
+        if not entry:
+            return f"{colors.YELLOW}🩺 Connection: not tested yet{colors.ENDC}"
         
-        # Find matching profile
-        profile_name = self._find_matching_profile(current)
-        if profile_name:
-            print(f"{colors.CYAN}👤 Profile: {profile_name}{colors.ENDC}")
+        age = self._format_age(time.time() - entry.get('checked_at', 0))
+        stale = "" if self.manager.is_health_fresh(entry) else ", stale"
+        if entry.get('success'):
+            return f"{colors.GREEN}🩺 Connection: OK ({age}{stale}){colors.ENDC}"
+        return f"{colors.RED}🩺 Connection: failed ({age}{stale}){colors.ENDC}"
+    
+    def _format_age(self, seconds: float) -> str:
+        """Format an age in seconds as a short 'ago' string."""
+        if seconds < 60:
+            return "just now"
+        if seconds < 3600:
+            return f"{int(seconds // 60)}m ago"
+        if seconds < 86400:
+            return f"{int(seconds // 3600)}h ago"
+        return f"{int(seconds // 86400)}d ago"
     
     def _find_matching_profile(self, current: Dict[str, str]) -> Optional[str]:
         """Find the profile name that matches current Git config."""
-        profiles = self.manager.load_profiles()
-        for username, profile in profiles.items():
-            if (profile['name'] == current['name'] and 
-                profile['email'] == current['email']):
-                return username
-        return None
+        return self.manager.find_profile_by_identity(current['name'], current['email'])
     
     def print_menu(self) -> None:
         """Print the main menu."""
+        print('\n'.join(self._menu_lines()))
+    
+    def _menu_lines(self) -> List[str]:
+        """The main menu, one string per screen line."""
         profiles = self.manager.load_profiles()
         profile_count = len(profiles)
         
-        print(f"\n{colors.BOLD}Choose an option:{colors.ENDC}")
-        
         menu_items = [
             ("1", "📝 Add new profile", colors.GREEN),
             ("2", "🔄 Switch profile", colors.BLUE, profile_count),
@@ -77,13 +134,12 @@ class GitProfileCLI:
             ("0", "🚪 Exit", colors.RED),
         ]
         
-        for item in menu_items:
-            self._print_menu_item(*item)
+        return ['', f"{colors.BOLD}Choose an option:{colors.ENDC}"] + [self._menu_item(*item) for item in menu_items]
     
-    def _print_menu_item(self, number: str, text: str, color: str, count: Optional[int] = None) -> None:
-        """Print a single menu item."""
+    def _menu_item(self, number: str, text: str, color: str, count: Optional[int] = None) -> str:
+        """Format a single menu item."""
         count_text = f" {colors.YELLOW}({count} available){colors.ENDC}" if count else ""
-        print(f"{color}{number}. {text}{colors.ENDC}{count_text}")
+        return f"{color}{number}. {text}{colors.ENDC}{count_text}"
     
     def add_profile(self) -> None:
         """Add a new Git profile."""
@@ -140,9 +196,12 @@ class GitProfileCLI:
         profiles = self.manager.load_profiles()
         return username in profiles
     
-    def _create_profile(self, username: str, email: str) -> bool:
+    def _create_profile(self, username: str, email: str, use_passphrase: bool = True,
+                        multiplex: bool = False, key_type: str = DEFAULT_KEY_TYPE,
+                        bits: Optional[int] = None) -> bool:
         """Create the profile with SSH key."""
-        key_file = self.manager.generate_ssh_key(email, username)
+        self.manager.ensure_environment()
+        key_file = self.manager.generate_ssh_key(email, username, use_passphrase, multiplex, key_type, bits)
         if not key_file:
             self.manager.print_error("Failed to generate SSH key!")
             return False
@@ -154,6 +213,8 @@ class GitProfileCLI:
             'email': email,
             'ssh_key': key_file
         }
+        if multiplex:
+            profiles[username]['ssh_multiplex'] = True
         
         if not self.manager.save_profiles(profiles):
             self.manager.print_error("Failed to save profile!")
@@ -193,10 +254,9 @@ class GitProfileCLI:
             self.manager.print_error("No profiles found! Add a profile first.")
             return
         
-        self.manager.print_header("Switch Git Profile")
-        self._list_available_profiles(profiles)
-        
-        username = input(f"\n{colors.CYAN}Enter profile name: {colors.ENDC}").strip()
+        username = self._choose_profile(profiles, "Switch Git Profile", "Enter profile name: ")
+        if not username:
+            return
         
         if not self._perform_profile_switch(username, profiles):
             return
@@ -204,6 +264,28 @@ class GitProfileCLI:
         self.manager.print_success(f"Switched to profile '{username}'!")
         self._post_switch_actions(username, profiles)
     
+    def _choose_profile(self, profiles: Dict[str, Any], title: str, prompt: str,
+                        pinned: Tuple[Tuple[str, str], ...] = ()) -> str:
+        """Ask for a profile: filter-as-you-type on a terminal, a typed name otherwise.
+        
+        pinned (key, description) choices such as ('all', ...) are offered first.
+        Returns '' when the picker is cancelled.
+        """
+        from picker import interactive
+        if not (interactive() and self.manager.screen.ansi):
+            self.manager.print_header(title)
+            self._list_available_profiles(profiles)
+            return input(f"\n{colors.CYAN}{prompt}{colors.ENDC}").strip()
+        
+        from picker import Picker, ProfileIndex
+        index = ProfileIndex(profiles, self.manager.last_used(), pinned)
+        
+        def style(line: str, selected: bool) -> str:
+            return f"{colors.GREEN}❯ {line}{colors.ENDC}" if selected else f"  {line}"
+        
+        title_lines = ['', f"{colors.BOLD}=== {title} ==={colors.ENDC}", '']
+        return Picker(index, self.manager.screen, title_lines, prompt, style).run() or ''
+    
     def _list_available_profiles(self, profiles: Dict[str, Any]) -> None:
         """List available profiles."""
         print(f"{colors.YELLOW}Available profiles:{colors.ENDC}")
@@ -217,26 +299,61 @@ class GitProfileCLI:
             return False
         
         profile = profiles[username]
-        return self.manager.set_git_config(profile['name'], profile['email'])
+        if not self.manager.set_git_config(profile['name'], profile['email']):
+            return False
+        self.manager.record_profile_use(username)
+        return True
     
     def _post_switch_actions(self, username: str, profiles: Dict[str, Any]) -> None:
         """Perform actions after successful profile switch."""
+        profile = profiles[username]
+        
+        # Start the SSH master early so the handshake overlaps with the rest
+        if profile.get('ssh_multiplex'):
+            self.manager.warm_ssh_connection(username)
+        
+        # Profiles created with --agent keep their key loaded while in use
+        if profile.get('ssh_agent'):
+            self.manager.load_key_into_agent(username, profile['ssh_agent'])
+        
         # Update repository URL if in a Git repo
         self.update_repository_url_for_profile(username)
         
-        # Test connection
-        profile = profiles[username]
+        # Reuse a recent test result, otherwise re-test without blocking
         if 'ssh_key' in profile:
+            self._check_health_without_blocking(username)
+    
+    def _check_health_without_blocking(self, username: str) -> None:
+        """Show cached connection health and refresh it in the background if stale."""
+        entry = self.manager.get_connection_health(username)
+        if self.manager.is_health_fresh(entry):
+            self._print_cached_health(username)
+            return
+        
+        if self._refresh_health_in_background([username]):
+            print(f"\n{colors.CYAN}Testing GitHub connection in the background...{colors.ENDC}")
+        else:
             print(f"\n{colors.CYAN}Testing GitHub connection...{colors.ENDC}")
             self.manager.test_github_connection(username)
     
+    def _refresh_health_in_background(self, usernames: List[str]) -> bool:
+        """Re-test profiles in a detached process that outlives this one."""
+        try:
+            tracing.popen(
+                [sys.executable, str(Path(__file__).resolve()), 'health', '--refresh', '--quiet'] + usernames,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True
+            )
+            return True
+        except OSError:
+            return False
+    
     def _find_profile_by_config(self, config: Dict[str, str], profiles: Dict[str, Any]) -> Optional[tuple]:
         """Find profile that matches the current config."""
-        for username, profile in profiles.items():
-            if (profile['name'] == config['name'] and 
-                profile['email'] == config['email']):
-                return username, profile
-        return None
+        username = self.manager.find_profile_by_identity(config['name'], config['email'])
+        return (username, profiles[username]) if username in profiles else None
     
     def remove_profile(self) -> None:
         """Remove a Git profile completely from the system."""
@@ -246,10 +363,9 @@ class GitProfileCLI:
             self.manager.print_error("No profiles to remove!")
             return
         
-        self.manager.print_header("Remove Git Profile")
-        self._list_available_profiles(profiles)
-        
-        username = input(f"\n{colors.CYAN}Enter profile name to PERMANENTLY DELETE: {colors.ENDC}").strip()
+        username = self._choose_profile(profiles, "Remove Git Profile", "Enter profile name to PERMANENTLY DELETE: ")
+        if not username:
+            return
         
         if not self._validate_profile_for_removal(username, profiles):
             return
@@ -306,6 +422,10 @@ class GitProfileCLI:
         # Step 3: Remove profile from config
         del profiles[username]
         if self.manager.save_profiles(profiles):
+            self.manager.health.remove(username)
+            self.manager.usage.remove(username)
+            if profile.get('directories'):
+                self.manager.sync_directory_bindings(profiles)
             self.manager.print_success(f"Profile configuration removed")
         else:
             self.manager.print_error("Failed to update profile configuration!")
@@ -319,8 +439,7 @@ class GitProfileCLI:
         current_config = self.manager.get_current_git_config()
         
         if (current_config and 
-            current_config['name'] == profile['name'] and 
-            current_config['email'] == profile['email']):
+            username in self.manager.profiles_with_identity(current_config['name'], current_config['email'])):
             
             print(f"{colors.BLUE}🔄 Clearing global Git configuration...{colors.ENDC}")
             self._clear_git_global_config()
@@ -373,45 +492,22 @@ class GitProfileCLI:
     def _clear_git_global_config(self) -> None:
         """Clear Git global configuration."""
         try:
-            subprocess.run(['git', 'config', '--global', '--unset', 'user.name'], check=True)
-            subprocess.run(['git', 'config', '--global', '--unset', 'user.email'], check=True)
+            with tracing.phase('git-config'):
+                tracing.run(['git', 'config', '--global', '--unset', 'user.name'], check=True)
+                tracing.run(['git', 'config', '--global', '--unset', 'user.email'], check=True)
             self.manager.print_success("Cleared Git global configuration")
         except subprocess.CalledProcessError:
             self.manager.print_warning("Could not clear Git configuration")
+        finally:
+            self.manager.git_config.invalidate()
 
     def remove_from_ssh_config(self, username: str) -> None:
         """Remove profile from SSH config."""
-        config_file = Path.home() / '.ssh' / 'config'
-        if not config_file.exists():
-            return
-        
         try:
-            self._update_ssh_config_file(config_file, username)
+            self.manager.remove_ssh_config_entry(username)
         except IOError as e:
             self.manager.print_warning(f"Could not update SSH config: {e}")
     
-    def _update_ssh_config_file(self, config_file: Path, username: str) -> None:
-        """Update SSH config file by removing profile entry."""
-        with open(config_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        # Filter out the profile's configuration
-        new_lines = []
-        skip = False
-        
-        for line in lines:
-            if f"Git profile: {username}" in line:
-                skip = True
-                continue
-            if skip and line.strip() == "":
-                skip = False
-                continue
-            if not skip:
-                new_lines.append(line)
-        
-        with open(config_file, 'w', encoding='utf-8') as f:
-            f.writelines(new_lines)
-    
     def test_connection(self) -> None:
         """Test GitHub connection for a profile."""
         profiles = self.manager.load_profiles()
@@ -420,10 +516,11 @@ class GitProfileCLI:
             self.manager.print_error("No profiles found!")
             return
         
-        self.manager.print_header("Test GitHub Connection")
-        self._list_available_profiles(profiles)
-        
-        username_input = input(f"\n{colors.CYAN}Enter profile name (or 'all' for all profiles): {colors.ENDC}").strip()
+        username_input = self._choose_profile(profiles, "Test GitHub Connection",
+                                              "Enter profile name (or 'all' for all profiles): ",
+                                              pinned=(('all', 'test every profile'),))
+        if not username_input:
+            return
         
         if username_input.lower() == 'all':
             self._test_all_connections(profiles)
@@ -432,13 +529,42 @@ class GitProfileCLI:
         else:
             self.manager.print_error(f"Profile '{username_input}' not found!")
     
-    def _test_all_connections(self, profiles: Dict[str, Any]) -> None:
-        """Test connections for all profiles."""
+    def _test_all_connections(self, profiles: Dict[str, Any], max_workers: int = SSH_TEST_WORKERS,
+                              timeout: float = SSH_TEST_TIMEOUT,
+                              deadline: Optional[float] = SSH_TEST_DEADLINE) -> bool:
+        """Test connections for all profiles concurrently."""
         self.manager.print_header("Testing All Connections")
-        for profile_name in profiles:
-            print(f"\n{colors.YELLOW}Testing {profile_name}...{colors.ENDC}")
-            self.manager.test_github_connection(profile_name)
-            print("-" * 50)
+        print(f"{colors.CYAN}Testing {len(profiles)} profiles, up to {max_workers} at a time...{colors.ENDC}")
+        
+        results = self.manager.test_connections(
+            list(profiles), max_workers, timeout, deadline,
+            on_result=self._print_connection_result
+        )
+        
+        self._print_connection_summary(results, list(profiles))
+        return all(result.success for result in results)
+    
+    def _print_connection_result(self, result: ConnectionResult) -> None:
+        """Print one connection result as soon as it completes, even into a pipe."""
+        if result.success:
+            print(f"{colors.GREEN}✅ {result.username} ({result.latency:.2f}s){colors.ENDC}", flush=True)
+        else:
+            print(f"{colors.RED}❌ {result.username} ({result.latency:.2f}s): {result.error}{colors.ENDC}", flush=True)
+    
+    def _print_connection_summary(self, results: List[ConnectionResult], order: List[str]) -> None:
+        """Print a summary table of connection results in profile order."""
+        position = {username: index for index, username in enumerate(order)}
+        rows = sorted(results, key=lambda result: position.get(result.username, len(order)))
+        width = max([len('Profile')] + [len(result.username) for result in rows])
+        
+        print(f"\n{colors.BOLD}{'Profile':<{width}}  {'Result':<6}  {'Latency':>8}  Error{colors.ENDC}")
+        for result in rows:
+            color = colors.GREEN if result.success else colors.RED
+            status = 'OK' if result.success else 'FAIL'
+            print(f"{color}{result.username:<{width}}  {status:<6}  {result.latency:>7.2f}s  {result.error}{colors.ENDC}")
+        
+        passed = sum(1 for result in rows if result.success)
+        print(f"\n{colors.BOLD}{passed}/{len(rows)} connections succeeded{colors.ENDC}")
     
     def update_repository_url(self) -> None:
         """Update repository URL for current profile."""
@@ -455,7 +581,8 @@ class GitProfileCLI:
     def _is_in_git_repository(self) -> bool:
         """Check if current directory is in a Git repository."""
         try:
-            subprocess.run(['git', 'rev-parse', '--git-dir'], check=True, capture_output=True)
+            with tracing.phase('rewrite-remote'):
+                tracing.run(['git', 'rev-parse', '--git-dir'], check=True, capture_output=True)
             return True
         except subprocess.CalledProcessError:
             self.manager.print_error("Not in a Git repository!")
@@ -496,43 +623,25 @@ class GitProfileCLI:
     def _get_current_remote_url(self) -> Optional[str]:
         """Get current remote URL."""
         try:
-            result = subprocess.run(['git', 'remote', 'get-url', 'origin'], 
-                                  capture_output=True, text=True, check=True)
+            with tracing.phase('rewrite-remote'):
+                result = tracing.run(['git', 'remote', 'get-url', 'origin'],
+                                     capture_output=True, text=True, check=True)
             return result.stdout.strip()
         except subprocess.CalledProcessError:
             return None
     
     def _convert_url_for_profile(self, current_url: str, username: str) -> Optional[str]:
         """Convert URL format for specific profile."""
-        if current_url.startswith('git@github.com'):
-            return self._convert_ssh_url(current_url, username)
-        elif current_url.startswith('https://github.com/'):
-            return self._convert_https_url(current_url, username)
-        else:
+        new_url = self.manager.convert_url_for_profile(current_url, username)
+        if new_url is None:
             self.manager.print_warning("Unsupported repository URL format")
-            return None
-    
-    def _convert_ssh_url(self, current_url: str, username: str) -> str:
-        """Convert SSH URL for profile."""
-        if f'github.com-' in current_url:
-            # Replace existing profile
-            parts = current_url.split('github.com-')
-            old_profile = parts[1].split(':')[0]
-            return current_url.replace(f'github.com-{old_profile}:', f'github.com-{username}:')
-        else:
-            # Add profile to existing SSH URL
-            repo_part = current_url.split('github.com:')[1]
-            return f"git@github.com-{username}:{repo_part}"
-    
-    def _convert_https_url(self, current_url: str, username: str) -> str:
-        """Convert HTTPS URL to SSH with profile."""
-        repo_part = current_url.replace('https://github.com/', '')
-        return f"git@github.com-{username}:{repo_part}"
+        return new_url
     
     def _update_remote_url(self, new_url: str) -> bool:
         """Update the remote URL."""
         try:
-            subprocess.run(['git', 'remote', 'set-url', 'origin', new_url], check=True)
+            with tracing.phase('rewrite-remote'):
+                tracing.run(['git', 'remote', 'set-url', 'origin', new_url], check=True)
             self.manager.print_success("Repository URL updated!")
             print(f"{colors.BLUE}New URL: {new_url}{colors.ENDC}")
             return True
@@ -541,8 +650,6 @@ class GitProfileCLI:
     
     def handle_choice(self, choice: str) -> bool:
         """Handle menu choice. Returns False to exit."""
-        self.manager.clear_screen()
-        
         menu_actions = {
             "1": self.add_profile,
             "2": self.switch_profile,
@@ -552,90 +659,101 @@ class GitProfileCLI:
         }
         
         action = menu_actions.get(choice)
-        if action:
-            if choice == "0":
-                return action()
-            else:
-                action()
-        else:
-            self.manager.print_error("Invalid choice!")
+        if not action:
+            # Shown inside the next frame, so only that line is redrawn
+            self._notice = f"{colors.RED}❌ Invalid choice!{colors.ENDC}"
+            return True
         
-        if choice != "0":
-            input(f"\n{colors.YELLOW}Press Enter to continue...{colors.ENDC}")
+        self.manager.clear_screen()
+        if choice == "0":
+            return action()
         
-        return choice != "0"
+        action()
+        if choice != "4":
+            input(f"\n{colors.YELLOW}Press Enter to continue...{colors.ENDC}")
+        self.manager.screen.invalidate()
+        return True
+    
+    def _settings_lines(self) -> List[str]:
+        """The settings menu, one string per screen line."""
+        return [
+            '',
+            f"{colors.BOLD}=== Settings ==={colors.ENDC}",
+            '',
+            f"{colors.BOLD}Settings Menu:{colors.ENDC}",
+            f"{colors.BLUE}1. 🔗 Test GitHub connection{colors.ENDC}",
+            f"{colors.CYAN}2. 🌐 Update repository URL{colors.ENDC}",
+            f"{colors.YELLOW}3. 🔄 Check for updates{self._update_hint()}{colors.ENDC}",
+            f"{colors.RED}0. ⬅️  Back to main menu{colors.ENDC}",
+        ]
     
     def show_settings(self) -> None:
         """Show settings submenu."""
+        actions = {
+            "1": self.test_connection,
+            "2": self.update_repository_url,
+            "3": self.check_for_updates,
+        }
+        notice = ''
         while True:
-            self.manager.clear_screen()
-            self.manager.print_header("Settings")
-            
-            print(f"\n{colors.BOLD}Settings Menu:{colors.ENDC}")
-            print(f"{colors.BLUE}1. 🔗 Test GitHub connection{colors.ENDC}")
-            print(f"{colors.CYAN}2. 🌐 Update repository URL{colors.ENDC}")
-            print(f"{colors.YELLOW}3. 🔄 Check for updates{colors.ENDC}")
-            print(f"{colors.RED}0. ⬅️  Back to main menu{colors.ENDC}")
+            self.manager.screen.render(self._settings_lines() + [notice, ''])
+            notice = ''
             
-            choice = input(f"\n{colors.BOLD}Enter your choice (0-3): {colors.ENDC}").strip()
+            choice = input(f"{colors.BOLD}Enter your choice (0-3): {colors.ENDC}").strip()
             
-            if choice == "1":
-                self.test_connection()
-                input(f"\n{colors.YELLOW}Press Enter to continue...{colors.ENDC}")
-            elif choice == "2":
-                self.update_repository_url()
-                input(f"\n{colors.YELLOW}Press Enter to continue...{colors.ENDC}")
-            elif choice == "3":
-                self.check_for_updates()
-                input(f"\n{colors.YELLOW}Press Enter to continue...{colors.ENDC}")
-            elif choice == "0":
+            if choice == "0":
                 break
-            else:
-                self.manager.print_error("Invalid choice!")
-                input(f"\n{colors.YELLOW}Press Enter to continue...{colors.ENDC}")
+            if choice not in actions:
+                notice = f"{colors.RED}❌ Invalid choice!{colors.ENDC}"
+                continue
+            
+            # Output goes below the menu, as before; the next frame starts clean
+            actions[choice]()
+            input(f"\n{colors.YELLOW}Press Enter to continue...{colors.ENDC}")
+            self.manager.screen.invalidate()
+    
+    def _update_checker(self) -> Any:
+        """The release checker, created on first use (the menu never needs it otherwise)."""
+        if self._updates is None:
+            from update_check import UpdateChecker
+            self._updates = UpdateChecker(UPDATE_CACHE_FILE, VERSION)
+        return self._updates
+    
+    def _update_hint(self) -> str:
+        """' (vX available)' from the cached check, without touching the network."""
+        status = self._update_checker().status()
+        return f" (v{status.latest} available)" if status.available else ""
     
     def check_for_updates(self) -> None:
-        """Check for available updates."""
+        """Check for available updates, waiting at most the checker's timeout."""
+        from update_check import RELEASES_PAGE
         self.manager.print_header("Check for Updates")
+        print(f"{colors.BLUE}🔄 Checking for updates...{colors.ENDC}")
+        print(f"{colors.GREEN}Current version: v{VERSION}{colors.ENDC}")
         
-        try:
-            import urllib.request
-            import json
-            
-            print(f"{colors.BLUE}🔄 Checking for updates...{colors.ENDC}")
-            
-            # Get current version
-            current_version = "2.3.0"
-            print(f"{colors.GREEN}Current version: v{current_version}{colors.ENDC}")
-            
-            # Check GitHub releases API
-            try:
-                with urllib.request.urlopen("https://api.github.com/repos/nhatpm3124/git-switch/releases/latest") as response:
-                    data = json.loads(response.read().decode())
-                    latest_version = data.get('tag_name', '').lstrip('v')
-                    release_url = data.get('html_url', '')
-                    
-                    print(f"{colors.CYAN}Latest version: v{latest_version}{colors.ENDC}")
-                    
-                    if latest_version and latest_version != current_version:
-                        print(f"\n{colors.YELLOW}🎉 A new version is available!{colors.ENDC}")
-                        print(f"{colors.BLUE}Release notes: {release_url}{colors.ENDC}")
-                        
-                        print(f"\n{colors.BOLD}To update:{colors.ENDC}")
-                        print(f"{colors.GREEN}• If installed: run 'git-profile-update'{colors.ENDC}")
-                        print(f"{colors.GREEN}• Direct run: Just run the script again for latest version{colors.ENDC}")
-                    else:
-                        print(f"\n{colors.GREEN}✅ You are using the latest version!{colors.ENDC}")
-                        
-            except Exception as e:
-                print(f"{colors.YELLOW}Could not check GitHub releases: {e}{colors.ENDC}")
+        checker = self._update_checker()
+        checker.start(force=True)
+        status = checker.wait()
+        
+        if status.error:
+            print(f"{colors.YELLOW}Could not check GitHub releases: {status.error}{colors.ENDC}")
+            if not status.latest:
                 print(f"\n{colors.CYAN}You can manually check at:{colors.ENDC}")
-                print(f"{colors.BLUE}https://github.com/nhatpm3124/git-switch/releases{colors.ENDC}")
-                
-        except ImportError:
-            print(f"{colors.YELLOW}Update check requires internet connection{colors.ENDC}")
-            print(f"\n{colors.CYAN}Please check manually at:{colors.ENDC}")
-            print(f"{colors.BLUE}https://github.com/nhatpm3124/git-switch/releases{colors.ENDC}")
+                print(f"{colors.BLUE}{RELEASES_PAGE}{colors.ENDC}")
+                return
+            checked = time.strftime('%Y-%m-%d %H:%M', time.localtime(status.checked_at))
+            print(f"{colors.YELLOW}Showing the result cached at {checked}{colors.ENDC}")
+        
+        print(f"{colors.CYAN}Latest version: v{status.latest}{colors.ENDC}")
+        if status.available:
+            print(f"\n{colors.YELLOW}🎉 A new version is available!{colors.ENDC}")
+            print(f"{colors.BLUE}Release notes: {status.url}{colors.ENDC}")
+            
+            print(f"\n{colors.BOLD}To update:{colors.ENDC}")
+            print(f"{colors.GREEN}• If installed: run 'git-profile-update'{colors.ENDC}")
+            print(f"{colors.GREEN}• Direct run: Just run the script again for latest version{colors.ENDC}")
+        else:
+            print(f"\n{colors.GREEN}✅ You are using the latest version!{colors.ENDC}")
     
     def _exit_program(self) -> bool:
         """Exit the program gracefully."""
@@ -644,14 +762,15 @@ class GitProfileCLI:
     
     def run(self) -> None:
         """Run the main CLI loop."""
+        # Refresh a stale update check while the user reads the menu
+        self._update_checker().start()
         try:
             while True:
-                self.manager.clear_screen()
-                self.print_ascii_header()
-                self.print_status_bar()
-                self.print_menu()
+                frame = self._header_lines() + self._status_lines() + self._menu_lines()
+                self.manager.screen.render(frame + [self._notice, ''])
+                self._notice = ''
                 
-                choice = input(f"\n{colors.BOLD}Enter your choice (0-4): {colors.ENDC}").strip()
+                choice = input(f"{colors.BOLD}Enter your choice (0-4): {colors.ENDC}").strip()
                 
                 if not self.handle_choice(choice):
                     break
@@ -663,9 +782,603 @@ class GitProfileCLI:
             self.manager.print_error(f"An unexpected error occurred: {e}")
             sys.exit(1)
 
-def main() -> None:
+class SubcommandRunner:
+    """Non-interactive subcommands that skip the menu entirely.
+    
+    Each command does only the work it needs: the manager is created without
+    environment setup, and only commands that touch SSH keys request it.
+    """
+    
+    def __init__(self) -> None:
+        """Initialize the runner with a side-effect free manager."""
+        self.manager = GitProfileManager(setup_environment=False)
+        self.cli = GitProfileCLI(self.manager)
+    
+    def run(self, args: argparse.Namespace) -> int:
+        """Dispatch a parsed command line. Returns the process exit code."""
+        handler = getattr(self, 'cmd_' + args.command.replace('-', '_'))
+        with tracing.phase(args.command):
+            return handler(args)
+    
+    def cmd_use(self, args: argparse.Namespace) -> int:
+        """Switch the global Git identity (or, with --local, this repository's) to a profile."""
+        if args.agent and not self._check_lifetime(args.agent):
+            return 1
+        profiles = self.manager.load_profiles()
+        if args.local:
+            if not self._use_locally(args.profile):
+                return 1
+        elif self.cli._perform_profile_switch(args.profile, profiles):
+            self.manager.print_success(f"Switched to profile '{args.profile}'!")
+        else:
+            return 1
+        
+        profile = profiles[args.profile]
+        if profile.get('ssh_multiplex'):
+            self.manager.warm_ssh_connection(args.profile)
+        lifetime = args.agent or profile.get('ssh_agent')
+        if lifetime or args.agent_exclusive:
+            self.manager.load_key_into_agent(args.profile, lifetime or SSH_AGENT_LIFETIME, args.agent_exclusive)
+        if args.rewrite_remote and not args.local:
+            self.cli.update_repository_url_for_profile(args.profile)
+        if 'ssh_key' in profile and not self.manager.is_health_fresh(self.manager.get_connection_health(args.profile)):
+            self.cli._refresh_health_in_background([args.profile])
+        return 0
+    
+    def _use_locally(self, username: str) -> bool:
+        """Write a profile's identity and origin URL into this repository's config."""
+        switch = self.manager.set_local_git_config(username)
+        if switch is None:
+            return False
+        
+        self.manager.record_profile_use(username)
+        self.manager.print_success(f"Switched this repository to profile '{username}'!")
+        print(f"{colors.BLUE}Config: {switch.config_path}{colors.ENDC}")
+        if switch.new_url:
+            print(f"{colors.BLUE}{switch.remote}: {switch.new_url}{colors.ENDC}")
+        elif switch.old_url:
+            self.manager.print_warning(f"Left {switch.remote} alone: unsupported URL {switch.old_url}")
+        profile = self.manager.load_profiles()[username]
+        local = self.manager.get_local_identity() or {}
+        if (local.get('name'), local.get('email')) != (profile['name'], profile['email']):
+            # extensions.worktreeConfig: this worktree's config.worktree is read after the shared config
+            self.manager.print_warning("This worktree's config.worktree sets its own identity, which still applies")
+        override = self.manager.describe_local_override()
+        if override:
+            self.manager.print_info(override)
+        return True
+    
+    def _check_lifetime(self, lifetime: str) -> bool:
+        """Validate an ssh-add -t lifetime, reporting a bad one."""
+        from ssh_agent import valid_lifetime
+        if valid_lifetime(lifetime):
+            return True
+        self.manager.print_error(f"Invalid agent lifetime '{lifetime}' (use seconds or e.g. 30m, 1h30m, 2d)")
+        return False
+    
+    def cmd_list(self, args: argparse.Namespace) -> int:
+        """Print one profile per line: username, name and email."""
+        for username, profile in self.manager.load_profiles().items():
+            print(f"{username}\t{profile['name']}\t{profile['email']}")
+        return 0
+    
+    def cmd_current(self, args: argparse.Namespace) -> int:
+        """Print the profile matching the current Git identity."""
+        current = self.manager.get_current_git_config()
+        if not current:
+            self.manager.print_warning("No Git configuration found!")
+            return 1
+        
+        profile_name = self.cli._find_matching_profile(current)
+        if not profile_name:
+            match = self.manager.match_identity(current['name'], current['email'])
+            closest = f"; closest is '{match.username}' ({self.cli._partial_match_note(match)})" if match else ''
+            self.manager.print_warning(f"{current['name']} <{current['email']}> doesn't match any profile{closest}")
+            return 1
+        
+        print(profile_name)
+        # Scripts read stdout; say on stderr when this repository commits as someone else
+        override = self.manager.describe_local_override()
+        if override:
+            print(f"{colors.YELLOW}{override}{colors.ENDC}", file=sys.stderr)
+        return 0
+    
+    def cmd_add(self, args: argparse.Namespace) -> int:
+        """Create a profile and its SSH key without prompts."""
+        if not self.manager.validate_username(args.username):
+            self.manager.print_error("Invalid username format!")
+            return 1
+        if not self.manager.validate_email(args.email):
+            self.manager.print_error("Invalid email format!")
+            return 1
+        if self.cli._username_exists(args.username):
+            self.manager.print_error(f"Profile '{args.username}' already exists!")
+            return 1
+        if not self.manager.validate_key_type(args.key_type, args.bits):
+            return 1
+        if args.agent and not self._check_lifetime(args.agent):
+            return 1
+        
+        if not self.cli._create_profile(args.username, args.email, args.passphrase, args.multiplex,
+                                        args.key_type, args.bits):
+            return 1
+        
+        profiles = self.manager.load_profiles()
+        if args.agent:
+            profiles[args.username] = {**profiles[args.username], 'ssh_agent': args.agent}
+            if not self.manager.save_profiles(profiles):
+                return 1
+        key_file = profiles[args.username]['ssh_key']
+        print(f"{colors.YELLOW}Add {key_file}.pub to https://github.com/settings/keys{colors.ENDC}")
+        return 0
+    
+    def cmd_remove(self, args: argparse.Namespace) -> int:
+        """Remove a profile, its SSH keys and its SSH config entry."""
+        profiles = self.manager.load_profiles()
+        if not self.cli._validate_profile_for_removal(args.profile, profiles):
+            return 1
+        
+        profile = profiles[args.profile]
+        if not args.yes:
+            self.cli._show_deletion_preview(args.profile, profile)
+            if not self.cli._confirm_permanent_removal(args.profile):
+                return 1
+        
+        self.cli._perform_complete_profile_removal(args.profile, profile, profiles)
+        return 0
+    
+    def cmd_test(self, args: argparse.Namespace) -> int:
+        """Test the GitHub connection for one profile or 'all'."""
+        if args.profile.lower() != 'all':
+            return 0 if self.manager.test_github_connection(args.profile) else 1
+        
+        profiles = self.manager.load_profiles()
+        if not profiles:
+            self.manager.print_error("No profiles found!")
+            return 1
+        
+        passed = self.cli._test_all_connections(profiles, args.jobs, args.timeout, args.deadline or None)
+        return 0 if passed else 1
+    
+    def cmd_health(self, args: argparse.Namespace) -> int:
+        """Show cached connection health, or refresh stale entries."""
+        profiles = self.manager.load_profiles()
+        usernames = args.profiles or list(profiles)
+        unknown = [username for username in usernames if username not in profiles]
+        if unknown:
+            self.manager.print_error(f"Profile '{unknown[0]}' not found!")
+            return 1
+        
+        if args.refresh:
+            stale = [username for username in usernames
+                     if not self.manager.is_health_fresh(self.manager.get_connection_health(username), args.max_age)]
+            if stale:
+                self.manager.test_connections(stale)
+            if args.quiet:
+                return 0
+        
+        results = []
+        for username in usernames:
+            entry = self.manager.get_connection_health(username)
+            if entry:
+                results.append(ConnectionResult(username, entry['success'], entry['latency'], entry['error']))
+            else:
+                results.append(ConnectionResult(username, False, 0.0, 'not tested yet'))
+        
+        self.cli._print_connection_summary(results, usernames)
+        return 0 if all(result.success for result in results) else 1
+    
+    def cmd_rewrite_remote(self, args: argparse.Namespace) -> int:
+        """Rewrite the origin URL of the current repository for a profile."""
+        if args.profile:
+            if args.profile not in self.manager.load_profiles():
+                self.manager.print_error(f"Profile '{args.profile}' not found!")
+                return 1
+            username = args.profile
+        else:
+            current_profile = self.cli._get_current_profile()
+            if not current_profile:
+                return 1
+            username = current_profile[0]
+        
+        return 0 if self.cli.update_repository_url_for_profile(username) else 1
+
+    def cmd_rewrite_remotes(self, args: argparse.Namespace) -> int:
+        """Rewrite remotes of every repository under one or more directories."""
+        if args.profile:
+            if args.profile not in self.manager.load_profiles():
+                self.manager.print_error(f"Profile '{args.profile}' not found!")
+                return 1
+            username = args.profile
+        else:
+            current_profile = self.cli._get_current_profile()
+            if not current_profile:
+                return 1
+            username = current_profile[0]
+        
+        remotes = None if args.all_remotes else (args.remote or ['origin'])
+        start = time.monotonic()
+        results = self.manager.rewrite_remotes(
+            [Path(root).expanduser() for root in args.roots], username, remotes,
+            args.dry_run, args.jobs, args.max_depth
+        )
+        self._print_rewrite_report(results, time.monotonic() - start)
+        return 1 if any(result.status == 'error' for result in results) else 0
+    
+    def _print_rewrite_report(self, results: List[RemoteRewrite], elapsed: float) -> None:
+        """Print changed and failed remotes, then totals per status."""
+        for result in sorted(results, key=lambda result: (result.repository, result.remote)):
+            if result.status in ('updated', 'would update'):
+                print(f"{colors.GREEN}{result.status}: {result.repository} [{result.remote}]{colors.ENDC}")
+                print(f"    {result.old_url} -> {result.new_url}")
+            elif result.status == 'error':
+                print(f"{colors.RED}error: {result.repository}: {result.error}{colors.ENDC}")
+        
+        counts: Dict[str, int] = {}
+        for result in results:
+            counts[result.status] = counts.get(result.status, 0) + 1
+        repositories = len({result.repository for result in results})
+        summary = ', '.join(f"{count} {status}" for status, count in sorted(counts.items())) or 'nothing to do'
+        print(f"\n{colors.BOLD}{repositories} repositories in {elapsed:.2f}s: {summary}{colors.ENDC}")
+
+    def cmd_import(self, args: argparse.Namespace) -> int:
+        """Create profiles from a JSON, JSONL or CSV manifest."""
+        fmt = args.format or (detect_format(Path(args.manifest)) if args.manifest != '-' else 'jsonl')
+        start = time.monotonic()
+        try:
+            if args.manifest == '-':
+                result = self.manager.import_profiles(read_manifest(sys.stdin, fmt), args.skip_existing,
+                                                      args.dry_run, args.jobs)
+            else:
+                with open(args.manifest, 'r', encoding='utf-8', newline='') as f:
+                    result = self.manager.import_profiles(read_manifest(f, fmt), args.skip_existing,
+                                                          args.dry_run, args.jobs)
+        except (ManifestError, OSError) as e:
+            self.manager.print_error(f"Cannot read manifest: {e}")
+            return 1
+        
+        for error in result.errors:
+            self.manager.print_error(error)
+        if result.errors and not result.created:
+            self.manager.print_error("Nothing imported")
+            return 1
+        
+        verb = 'Would import' if args.dry_run else 'Imported'
+        self.manager.print_success(
+            f"{verb} {len(result.created)} profiles ({len(result.generated)} new keys, "
+            f"{len(result.skipped)} skipped) in {time.monotonic() - start:.2f}s"
+        )
+        return 1 if result.errors else 0
+    
+    def cmd_export(self, args: argparse.Namespace) -> int:
+        """Stream every profile to a manifest file or stdout."""
+        fmt = args.format or (detect_format(Path(args.output)) if args.output != '-' else 'jsonl')
+        if args.output == '-':
+            try:
+                self.manager.export_profiles(sys.stdout, fmt)
+                sys.stdout.flush()
+            except BrokenPipeError:
+                # Reader went away (e.g. `| head`); keep the interpreter from complaining at exit
+                sys.stdout = open(os.devnull, 'w')
+            return 0
+        
+        try:
+            with open(args.output, 'w', encoding='utf-8', newline='') as f:
+                count = self.manager.export_profiles(f, fmt)
+        except OSError as e:
+            self.manager.print_error(f"Cannot write {args.output}: {e}")
+            return 1
+        self.manager.print_success(f"Exported {count} profiles to {args.output}")
+        return 0
+    
+    def cmd_store(self, args: argparse.Namespace) -> int:
+        """Show where profiles are stored, or migrate them to another backend."""
+        if args.migrate:
+            return 0 if self.manager.migrate_store(args.migrate) else 1
+        
+        print(f"{backend_name(self.manager.store)}\t{self.manager.store.path}\t{len(self.manager.load_profiles())} profiles")
+        return 0
+    
+    def cmd_reconcile(self, args: argparse.Namespace) -> int:
+        """Report drift between profiles, ~/.ssh and the SSH config, and fix it in one pass."""
+        drift = self.manager.find_drift()
+        if not drift:
+            self.manager.print_success("Profiles, SSH keys and SSH config agree")
+            return 0
+        
+        width = max(len(item.subject) for item in drift)
+        for item in drift:
+            action = DRIFT_ACTIONS[item.kind]
+            if item.kind == 'orphan-key' and not args.prune_keys:
+                action = 'report only (--prune-keys to delete)'
+            print(f"{colors.YELLOW}{item.kind:<12}{colors.ENDC} {item.subject:<{width}}  {item.detail} → {action}")
+        
+        fixable = [item for item in drift if args.prune_keys or item.kind != 'orphan-key']
+        if not fixable:
+            return 0
+        if args.dry_run:
+            return 1
+        if not args.yes:
+            if not sys.stdin.isatty():
+                self.manager.print_error("Not a terminal; pass --yes to apply the changes")
+                return 1
+            answer = input(f"{colors.RED}Apply {len(fixable)} change(s)? (yes/no): {colors.ENDC}").strip().lower()
+            if answer != 'yes':
+                print(f"{colors.YELLOW}Reconcile cancelled.{colors.ENDC}")
+                return 1
+        
+        current_config = self.manager.get_current_git_config()
+        active = (self.manager.profiles_with_identity(current_config['name'], current_config['email'])
+                  if current_config else [])
+        
+        fixed = self.manager.reconcile(drift, args.prune_keys)
+        if fixed is None:
+            return 1
+        for item in fixed:
+            print(f"{colors.GREEN}✓{colors.ENDC} {DRIFT_ACTIONS[item.kind]}: {item.subject}")
+        
+        # Like remove, leave no global identity behind that only a removed profile had
+        removed = {item.subject for item in fixed if item.kind == 'missing-key'}
+        if (removed.intersection(active) and
+                not self.manager.profiles_with_identity(current_config['name'], current_config['email'])):
+            self.cli._clear_git_global_config()
+        self.manager.print_success(f"Fixed {len(fixed)} of {len(fixable)} problem(s)")
+        return 0
+    
+    def cmd_prompt(self, args: argparse.Namespace) -> int:
+        """Print the active profile for PS1, or the shell function that does it without forking."""
+        if args.shell_init:
+            print(self.manager.prompt_shell_init(), end='')
+            return 0
+        
+        username = self.manager.get_prompt_profile()
+        if username:
+            print(username)
+        return 0
+    
+    def cmd_bind(self, args: argparse.Namespace) -> int:
+        """Bind a directory tree to a profile through an includeIf rule."""
+        if not self.manager.bind_directory(args.profile, args.directory):
+            return 1
+        
+        directory = self.manager._normalize_binding_directory(args.directory)
+        self.manager.print_success(f"Repositories under {directory} now commit as '{args.profile}'")
+        return 0
+    
+    def cmd_unbind(self, args: argparse.Namespace) -> int:
+        """Remove a directory binding."""
+        username = self.manager.unbind_directory(args.directory)
+        if not username:
+            self.manager.print_error(f"No binding for {self.manager._normalize_binding_directory(args.directory)}")
+            return 1
+        
+        self.manager.print_success(f"Removed binding to '{username}'")
+        return 0
+    
+    def cmd_bindings(self, args: argparse.Namespace) -> int:
+        """Print one binding per line: directory and profile."""
+        for directory, username in self.manager.get_directory_bindings():
+            print(f"{directory}\t{username}")
+        return 0
+    
+    def cmd_explain(self, args: argparse.Namespace) -> int:
+        """Explain which profile git uses for commits at a path."""
+        username, directory, git_dir = self.manager.explain_directory(args.path)
+        print(f"{colors.BLUE}Git directory:{colors.ENDC} {git_dir}")
+        if username:
+            print(f"{colors.GREEN}Profile:{colors.ENDC} {username} (bound to {directory})")
+            print(f"{colors.BLUE}Include file:{colors.ENDC} {self.manager.include_file_for(username)}")
+            return 0
+        
+        print(f"{colors.YELLOW}No directory binding applies; the global identity is used{colors.ENDC}")
+        current = self.manager.get_current_git_config()
+        profile_name = self.cli._find_matching_profile(current) if current else None
+        if profile_name:
+            print(f"{colors.GREEN}Profile:{colors.ENDC} {profile_name} (global)")
+        return 0
+
+class _HelpFormatter(argparse.HelpFormatter):
+    """Help formatter that finds the terminal width without importing shutil.
+    
+    argparse builds a formatter while arguments are added, and the stock one
+    imports shutil (and with it bz2 and lzma) just to read the width.
+    """
+    
+    def __init__(self, prog: str, indent_increment: int = 2, max_help_position: int = 24,
+                 width: Optional[int] = None) -> None:
+        if width is None:
+            try:
+                width = int(os.environ['COLUMNS']) - 2
+            except (KeyError, ValueError):
+                try:
+                    width = os.get_terminal_size(sys.__stdout__.fileno()).columns - 2
+                except (AttributeError, ValueError, OSError):
+                    width = 78
+        super().__init__(prog, indent_increment, max_help_position, width)
+
+class _ArgumentParser(argparse.ArgumentParser):
+    """ArgumentParser whose subparsers also default to _HelpFormatter."""
+    
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        kwargs.setdefault('formatter_class', _HelpFormatter)
+        super().__init__(*args, **kwargs)
+
+class _SkippedParser:
+    """Stands in for a subcommand parser that build_parser() was asked not to build.
+    
+    Building all the subcommand parsers costs more than parsing the one a
+    fast command like `use <profile>` needs, so the others get this instead.
+    """
+    
+    def add_argument(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+def _command_name(argv: List[str]) -> Optional[str]:
+    """The subcommand argv runs, or None when it asks for top-level help or the version."""
+    skip_value = False
+    for arg in argv:
+        if skip_value:
+            skip_value = False
+        elif arg == '--trace-file':
+            skip_value = True
+        elif arg in ('-h', '--help', '--version'):
+            return None
+        elif not arg.startswith('-'):
+            return arg
+    return None
+
+def build_parser(command: Optional[str] = None) -> argparse.ArgumentParser:
+    """Build the argument parser for the non-interactive subcommands.
+    
+    With command, only that subcommand's parser is built (an unknown name
+    falls back to the full parser, so the error lists every command).
+    """
+    parser = _ArgumentParser(
+        prog='gitsw',
+        description='Switch between multiple GitHub accounts. Run without arguments for the interactive menu.'
+    )
+    parser.add_argument('--version', action='version', version=f'%(prog)s {VERSION}')
+    parser.add_argument('--trace', action='store_true',
+                        help='time every subprocess and print a summary table to stderr when done')
+    parser.add_argument('--trace-file', type=Path, metavar='FILE',
+                        help='where --trace writes Chrome trace-event JSON (default: gitsw-trace.json in the temp dir)')
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+    names: List[str] = []
+    
+    def add_command(name: str, **kwargs: Any) -> Any:
+        names.append(name)
+        if command is not None and name != command:
+            return _SkippedParser()
+        return subparsers.add_parser(name, **kwargs)
+    
+    use = add_command('use', help='switch the global Git identity to a profile')
+    use.add_argument('profile')
+    use.add_argument('--rewrite-remote', action='store_true',
+                     help="also point this repository's origin at the profile host")
+    use.add_argument('--local', action='store_true',
+                     help="switch only this repository: identity and origin URL in its own .git/config")
+    use.add_argument('--agent', nargs='?', const=SSH_AGENT_LIFETIME, metavar='LIFETIME',
+                     help=f'load the profile key into ssh-agent (ssh-add -t, default: {SSH_AGENT_LIFETIME})')
+    use.add_argument('--agent-exclusive', action='store_true',
+                     help="load the key and unload other profiles' keys from ssh-agent")
+    
+    add_command('list', help='list profiles (username, name, email)')
+    add_command('current', help='print the active profile')
+    
+    add = add_command('add', help='create a profile and SSH key')
+    add.add_argument('username')
+    add.add_argument('email')
+    add.add_argument('--passphrase', action='store_true', help='prompt for an SSH key passphrase')
+    add.add_argument('--multiplex', action='store_true',
+                     help='reuse one SSH connection per profile (ControlMaster)')
+    add.add_argument('--agent', nargs='?', const=SSH_AGENT_LIFETIME, metavar='LIFETIME',
+                     help=f'load the key into ssh-agent whenever the profile is used (default: {SSH_AGENT_LIFETIME})')
+    add.add_argument('-t', '--key-type', choices=list(SSH_KEY_TYPES), default=DEFAULT_KEY_TYPE,
+                     help=f'SSH key algorithm (default: {DEFAULT_KEY_TYPE})')
+    add.add_argument('-b', '--bits', type=int, help='key size for rsa (default 4096) or ecdsa (default 256)')
+    
+    remove = add_command('remove', help='permanently delete a profile')
+    remove.add_argument('profile')
+    remove.add_argument('-y', '--yes', action='store_true', help='skip confirmation prompts')
+    
+    test = add_command('test', help="test the GitHub connection ('all' for every profile)")
+    test.add_argument('profile')
+    test.add_argument('-j', '--jobs', type=int, default=SSH_TEST_WORKERS,
+                      help=f'concurrent tests for all (default: {SSH_TEST_WORKERS})')
+    test.add_argument('--timeout', type=float, default=SSH_TEST_TIMEOUT,
+                      help=f'per-profile timeout in seconds (default: {SSH_TEST_TIMEOUT})')
+    test.add_argument('--deadline', type=float, default=SSH_TEST_DEADLINE,
+                      help=f'overall deadline in seconds, 0 for none (default: {SSH_TEST_DEADLINE})')
+    
+    health = add_command('health', help='show cached connection health')
+    health.add_argument('profiles', nargs='*', help='defaults to all profiles')
+    health.add_argument('--refresh', action='store_true', help='re-test entries older than --max-age')
+    health.add_argument('--max-age', type=float, default=HEALTH_TTL,
+                        help=f'seconds a result stays fresh (default: {HEALTH_TTL})')
+    health.add_argument('--quiet', action='store_true', help=argparse.SUPPRESS)
+    
+    rewrite = add_command('rewrite-remote', help='point origin at a profile host')
+    rewrite.add_argument('profile', nargs='?', help='defaults to the active profile')
+    
+    importer = add_command('import', help='create profiles from a JSON, JSONL or CSV manifest')
+    importer.add_argument('manifest', help="manifest file, or '-' for stdin")
+    importer.add_argument('--format', choices=FORMATS, help='default: from the file extension (stdin: jsonl)')
+    importer.add_argument('--skip-existing', action='store_true', help='ignore rows for existing profiles')
+    importer.add_argument('-n', '--dry-run', action='store_true', help='validate only')
+    importer.add_argument('-j', '--jobs', type=int, default=IMPORT_KEYGEN_WORKERS,
+                          help=f'parallel ssh-keygen runs (default: {IMPORT_KEYGEN_WORKERS})')
+    
+    exporter = add_command('export', help='write all profiles as a manifest')
+    exporter.add_argument('output', nargs='?', default='-', help="output file, or '-' for stdout (default)")
+    exporter.add_argument('--format', choices=FORMATS, help='default: from the file extension (stdout: jsonl)')
+    
+    store = add_command('store', help='show or change the profile store backend')
+    store.add_argument('--migrate', choices=list(BACKENDS), metavar='BACKEND',
+                       help=f"copy all profiles to another backend ({', '.join(BACKENDS)}) and switch to it")
+    
+    reconcile = add_command('reconcile', help='find and remove stale profiles, Host blocks and keys')
+    reconcile.add_argument('-y', '--yes', action='store_true', help='apply without asking')
+    reconcile.add_argument('--dry-run', action='store_true', help='only report drift (exit 1 if any of it can be fixed)')
+    reconcile.add_argument('--prune-keys', action='store_true',
+                           help='also delete id_<type>_* key pairs no profile uses')
+    
+    prompt = add_command('prompt', help='print the active profile for a shell prompt')
+    prompt.add_argument('--shell-init', action='store_true',
+                        help='print a __gitsw_ps1 shell function that reads the state file with builtins only')
+    
+    bind = add_command('bind', help='use a profile for every repository under a directory')
+    bind.add_argument('profile')
+    bind.add_argument('directory')
+    
+    unbind = add_command('unbind', help='remove a directory binding')
+    unbind.add_argument('directory')
+    
+    add_command('bindings', help='list directory bindings')
+    
+    explain = add_command('explain', help='show which profile applies to a path')
+    explain.add_argument('path', nargs='?', default='.')
+    
+    bulk = add_command('rewrite-remotes', help='point remotes of every repository under DIRs at a profile')
+    bulk.add_argument('roots', nargs='+', metavar='DIR')
+    bulk.add_argument('-p', '--profile', help='defaults to the active profile')
+    bulk.add_argument('--remote', action='append', help="remote to rewrite (repeatable, default: origin)")
+    bulk.add_argument('--all-remotes', action='store_true', help='rewrite every GitHub remote')
+    bulk.add_argument('-n', '--dry-run', action='store_true', help='report changes without writing')
+    bulk.add_argument('-j', '--jobs', type=int, default=REWRITE_WORKERS,
+                      help=f'worker threads (default: {REWRITE_WORKERS})')
+    bulk.add_argument('--max-depth', type=int, default=REWRITE_MAX_DEPTH,
+                      help=f'directory levels to search (default: {REWRITE_MAX_DEPTH})')
+    
+    if command is not None and command not in names:
+        return build_parser()
+    return parser
+
+def _report_trace(trace_file: Optional[Path]) -> None:
+    """Print the --trace summary and write the Chrome trace file."""
+    if trace_file is None:
+        import tempfile
+        trace_file = Path(tempfile.gettempdir()) / 'gitsw-trace.json'
+    
+    sys.stdout.flush()
+    tracing.TRACER.print_summary(sys.stderr)
+    try:
+        tracing.TRACER.write_chrome_trace(trace_file)
+        sys.stderr.write(f"Trace written to {trace_file} (open it in chrome://tracing or ui.perfetto.dev)\n")
+    except OSError as e:
+        sys.stderr.write(f"Could not write {trace_file}: {e}\n")
+
+def main(argv: Optional[List[str]] = None) -> None:
     """Main entry point."""
+    argv = sys.argv[1:] if argv is None else argv
+    args = None
     try:
+        if argv:
+            args = build_parser(_command_name(argv)).parse_args(argv)
+            if args.trace:
+                tracing.TRACER.enable()
+            if args.command:
+                sys.exit(SubcommandRunner().run(args))
+        
         cli = GitProfileCLI()
         cli.run()
     except KeyboardInterrupt:
@@ -674,6 +1387,9 @@ def main() -> None:
     except Exception as e:
         print(f"Fatal error: {e}")
         sys.exit(1)
+    finally:
+        if args is not None and args.trace:
+            _report_trace(args.trace_file)
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+gitsw
+=====
+Command entry point.
+
+Python never caches bytecode for the script it is started with, so running
+git_profiles.py directly recompiles the whole CLI (about 20 ms) on every
+call. This launcher is all that gets compiled; git_profiles is imported
+from __pycache__ like any other module.
+"""
+
+from git_profiles import main
+
+if __name__ == '__main__':
+    main()
@@ -16,7 +16,7 @@ class Gitsw < Formula
     # Create executable script
     (bin/"gitsw").write <<~EOS
       #!/bin/bash
-      exec "#{Formula["python@3.8"].opt_bin}/python3" "#{libexec}/git_profiles.py" "$@"
+      exec "#{Formula["python@3.8"].opt_bin}/python3" "#{libexec}/gitsw.py" "$@"
     EOS
     
     # Make executable
@@ -62,6 +62,9 @@ check_git() {
     fi
 }
 
+# Python modules that make up the application
+PY_FILES="gitsw.py git_profile_manager.py git_profiles.py profile_store.py git_config.py ssh_config.py known_hosts.py prompt_state.py manifest.py tracing.py update_check.py screen.py picker.py ssh_agent.py file_lock.py"
+
 # Download files
 download_files() {
     print_info "Downloading Git Profile Manager..."
@@ -71,8 +74,9 @@ download_files() {
     cd "$TEMP_DIR"
     
     # Download main files
-    curl -fsSL "https://raw.githubusercontent.com/nhatpmlab/git-switch/main/git_profile_manager.py" -o git_profile_manager.py
-curl -fsSL "https://raw.githubusercontent.com/nhatpmlab/git-switch/main/git_profiles.py" -o git_profiles.py
+    for file in $PY_FILES; do
+        curl -fsSL "https://raw.githubusercontent.com/nhatpmlab/git-switch/main/$file" -o "$file"
+    done
     
     print_success "Files downloaded successfully"
     echo "$TEMP_DIR"
@@ -89,11 +93,12 @@ install_files() {
     mkdir -p "$install_dir"
     
     # Copy files
-    cp "$temp_dir/git_profile_manager.py" "$install_dir/"
-    cp "$temp_dir/git_profiles.py" "$install_dir/"
+    for file in $PY_FILES; do
+        cp "$temp_dir/$file" "$install_dir/"
+    done
     
     # Make executable
-    chmod +x "$install_dir/git_profiles.py"
+    chmod +x "$install_dir/gitsw.py" "$install_dir/git_profiles.py"
     
     print_success "Files installed"
 }
@@ -113,13 +118,13 @@ setup_commands() {
     mkdir -p "$BIN_DIR" 2>/dev/null || true
     
     # Create symlinks (try local first, then global)
-    if ln -sf "$install_dir/git_profiles.py" "$BIN_DIR/git-profile" 2>/dev/null; then
+    if ln -sf "$install_dir/gitsw.py" "$BIN_DIR/git-profile" 2>/dev/null; then
         print_success "Command 'git-profile' installed to $BIN_DIR"
-    elif sudo ln -sf "$install_dir/git_profiles.py" "/usr/local/bin/git-profile" 2>/dev/null; then
+    elif sudo ln -sf "$install_dir/gitsw.py" "/usr/local/bin/git-profile" 2>/dev/null; then
         print_success "Command 'git-profile' installed to /usr/local/bin (with sudo)"
     else
         print_warning "Could not create symlink. You can run the program with:"
-        print_info "python3 $install_dir/git_profiles.py"
+        print_info "python3 $install_dir/gitsw.py"
     fi
     
     # Create update command
@@ -167,7 +172,7 @@ main() {
     echo "  git-profile-update       # Update to latest version"
     echo
     print_info "Or run directly with:"
-    echo "  python3 ~/.git-profile-manager/git_profiles.py"
+    echo "  python3 ~/.git-profile-manager/gitsw.py"
     echo
     print_warning "Note: You may need to restart your terminal or run 'source ~/.bashrc' for commands to work"
 }
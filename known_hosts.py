@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Known Hosts
+===========
+Streaming matcher for OpenSSH known_hosts files and GitHub's pinned host keys.
+"""
+
+import base64
+import fnmatch
+import hashlib
+import hmac
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+# GitHub's published SSH host keys:
+# https://docs.github.com/en/authentication/keeping-your-account-and-data-secure/githubs-ssh-key-fingerprints
+GITHUB_HOST_KEYS: Tuple[Tuple[str, str], ...] = (
+    ('ssh-ed25519',
+     'AAAAC3NzaC1lZDI1NTE5AAAAIOMqqnkVzrm0SdG6UOoqKLsabgH5C9okWi0dh2l9GKJl'),
+    ('ecdsa-sha2-nistp256',
+     'AAAAE2VjZHNhLXNoYTItbmlzdHAyNTYAAAAIbmlzdHAyNTYAAABBBEmKSENjQEezOmxkZMy7opKgwFB9nkt5YRrYMjNuG5N87uR'
+     'gg6CLrbo5wAdT/y6v0mKV0U2w0WZ2YB/++Tpockg='),
+    ('ssh-rsa',
+     'AAAAB3NzaC1yc2EAAAADAQABAAABgQCj7ndNxQowgcQnjshcLrqPEiiphnt+VTTvDP6mHBL9j1aNUkY4Ue1gvwnGLVlOhGeYrnZaMgR'
+     'K6+PKCUXaDbC7qtbW8gIkhL7aGCsOr/C56SJMy/BCZfxd1nWzAOxSDPgVsmerOBYfNqltV9/hWCqBywINIR+5dIg6JTJ72pcEpEjcYgX'
+     'kE2YEFXV1JHnsKgbLWNlhScqb2UmyRkQyytRLtL+38TGxkxCflmO+5Z8CSSNY7GidjMIZ7Q4zMjA2n1nGrlTDkzwDCsw+wqFPGQA179cn'
+     'fGWOWRVruj16z6XyvxvjJwbz0wQZ75XK5tKSb7FNyeIEs4TT4jk+S4dhPeAUC5y+bDYirYgM4GC7uEnztnZyaVWQ7B381AK4Qdrwt51Zq'
+     'ExKbQpTUNn+EjqoTwvqNj4kqx5QUCI0ThS/YkOxJCXmPUWZbhjpCg56i+2aB6CmK2JGhn57K5mj0MNdBXA4/WnwH6XoPWJzK5Nyu2zB3n'
+     'AZp+S5hpQs+p1vN1/wsjk='),
+)
+
+# Results of check_host()
+HOST_KNOWN = 'known'          # a plain host-key line carries one of the expected keys
+HOST_MISMATCH = 'mismatch'    # the host is listed, but only with other keys
+HOST_REVOKED = 'revoked'      # an expected key is marked @revoked
+HOST_MISSING = 'missing'      # the host is not listed at all
+
+class KnownHostEntry(NamedTuple):
+    """One known_hosts line."""
+    marker: str          # '', '@cert-authority' or '@revoked'
+    hosts: str           # comma-separated patterns or a |1|salt|hash entry
+    key_type: str
+    key: str
+
+def _parse_line(line: str) -> Optional[KnownHostEntry]:
+    """Parse one known_hosts line; comments and malformed lines give None."""
+    fields = line.split()
+    if not fields or fields[0].startswith('#'):
+        return None
+    marker = ''
+    if fields[0].startswith('@'):
+        marker, fields = fields[0], fields[1:]
+    if len(fields) < 3:
+        return None
+    return KnownHostEntry(marker, fields[0], fields[1], fields[2])
+
+def _iter_lines(path: Path) -> Iterator[str]:
+    """Stream raw lines; a missing file yields nothing."""
+    try:
+        f = open(path, 'r', encoding='utf-8', errors='replace')
+    except FileNotFoundError:
+        return
+    with f:
+        yield from f
+
+def _host_key(hostname: str, port: int) -> str:
+    """Return the name OpenSSH records for a host and port."""
+    return hostname if port == 22 else f'[{hostname}]:{port}'
+
+def _hashed_match(entry: str, name: str) -> bool:
+    """Check a HashKnownHosts entry (|1|base64 salt|base64 HMAC-SHA1)."""
+    parts = entry.split('|')
+    if len(parts) != 4 or parts[1] != '1':
+        return False
+    try:
+        salt = base64.b64decode(parts[2])
+        expected = base64.b64decode(parts[3])
+    except ValueError:
+        return False
+    digest = hmac.new(salt, name.encode('utf-8'), hashlib.sha1).digest()
+    return hmac.compare_digest(digest, expected)
+
+def host_matches(hosts: str, hostname: str, port: int = 22) -> bool:
+    """Return True if a known_hosts host field applies to hostname:port.
+
+    Supports hashed entries, comma-separated patterns, `*`/`?` wildcards,
+    `[host]:port` forms and `!` negation (a negated match always wins).
+    """
+    name = _host_key(hostname.lower(), port)
+    if hosts.startswith('|'):
+        return _hashed_match(hosts, name)
+
+    matched = False
+    for pattern in hosts.lower().split(','):
+        negated = pattern.startswith('!')
+        if negated:
+            pattern = pattern[1:]
+        wildcard = '*' in pattern or '?' in pattern
+        if pattern == name or (wildcard and fnmatch.fnmatchcase(name, pattern)):
+            if negated:
+                return False
+            matched = True
+    return matched
+
+def check_host(path: Path, hostname: str, expected_keys: Sequence[Tuple[str, str]],
+               port: int = 22) -> str:
+    """Classify how known_hosts vouches for a host, reading it line by line.
+
+    Only plain host-key lines count as known; @cert-authority lines trust
+    certificates rather than keys, and @revoked lines veto a key wherever
+    they appear. Lines are rejected on the key or a substring test before
+    any pattern matching, and hashed names are only HMAC'd when the line
+    carries an expected key or another key of an expected type, so a full
+    pass stays cheap on huge files.
+    """
+    expected = {key for _, key in expected_keys}
+    expected_types = {key_type for key_type, _ in expected_keys}
+    needle = hostname.lower()
+    known = listed = False
+
+    for line in _iter_lines(path):
+        # Substring scans run in C; most lines of a big file stop here
+        if needle not in line.lower() and '*' not in line and '?' not in line and not line.startswith('|') \
+                and not any(key in line for key in expected):
+            continue
+        entry = _parse_line(line)
+        if entry is None or entry.marker not in ('', '@revoked'):
+            continue
+        hashed = entry.hosts.startswith('|')
+        if entry.key in expected:
+            if host_matches(entry.hosts, hostname, port):
+                if entry.marker == '@revoked':
+                    return HOST_REVOKED
+                known = True
+        elif not entry.marker and not listed and (
+                (hashed and entry.key_type in expected_types) or
+                needle in entry.hosts.lower() or '*' in entry.hosts or '?' in entry.hosts):
+            listed = host_matches(entry.hosts, hostname, port)
+
+    if known:
+        return HOST_KNOWN
+    return HOST_MISMATCH if listed else HOST_MISSING
+
+def format_entries(hostname: str, keys: Sequence[Tuple[str, str]], port: int = 22) -> List[str]:
+    """Format known_hosts lines for a host."""
+    name = _host_key(hostname, port)
+    return [f"{name} {key_type} {key}\n" for key_type, key in keys]
+
+__all__ = [
+    'GITHUB_HOST_KEYS', 'HOST_KNOWN', 'HOST_MISMATCH', 'HOST_MISSING', 'HOST_REVOKED',
+    'KnownHostEntry', 'check_host', 'format_entries', 'host_matches',
+]
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Profile Manifests
+=================
+Streaming readers and writers for bulk profile import and export.
+
+Three formats are understood, picked from the file extension unless given:
+a JSON array (or an object keyed by username), JSON Lines, and CSV with a
+header row. Rows are plain dicts; validation is left to the caller.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+FORMATS = ('json', 'jsonl', 'csv')
+
+# Columns written for CSV exports, in order
+CSV_FIELDS = ('username', 'name', 'email', 'ssh_key', 'ssh_multiplex')
+
+TRUE_VALUES = ('1', 'true', 'yes', 'y', 'on')
+
+class ManifestError(Exception):
+    """Raised when a manifest cannot be parsed."""
+
+def detect_format(path: Path, default: str = 'jsonl') -> str:
+    """Pick a format from a file extension."""
+    suffix = path.suffix.lower().lstrip('.')
+    if suffix == 'ndjson':
+        return 'jsonl'
+    return suffix if suffix in FORMATS else default
+
+def parse_bool(value: Any) -> bool:
+    """Interpret manifest booleans, which arrive as strings from CSV."""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+def read_manifest(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (row number, row) pairs; row numbers are 1-based lines or items."""
+    if fmt == 'jsonl':
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise ManifestError(f"line {number}: {e}")
+            if not isinstance(row, dict):
+                raise ManifestError(f"line {number}: expected an object")
+            yield number, row
+    elif fmt == 'csv':
+        import csv
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # DictReader counts the header, so line_num is the file line
+            yield reader.line_num, {key.strip(): value.strip() for key, value in row.items()
+                                    if key and value is not None and value.strip()}
+    elif fmt == 'json':
+        try:
+            document = json.load(stream)
+        except ValueError as e:
+            raise ManifestError(str(e))
+        if isinstance(document, dict):
+            document = [{'username': username, **row} for username, row in document.items()]
+        if not isinstance(document, list):
+            raise ManifestError("expected an array of profiles or an object keyed by username")
+        for number, row in enumerate(document, 1):
+            if not isinstance(row, dict):
+                raise ManifestError(f"item {number}: expected an object")
+            yield number, row
+    else:
+        raise ManifestError(f"unknown format '{fmt}'")
+
+def write_manifest(stream: TextIO, rows: Iterable[Dict[str, Any]], fmt: str) -> int:
+    """Write rows one at a time without building the document. Returns the row count."""
+    count = 0
+    if fmt == 'csv':
+        import csv
+        writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({key: row.get(key, '') for key in CSV_FIELDS})
+            count += 1
+    elif fmt == 'jsonl':
+        for row in rows:
+            stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+            count += 1
+    elif fmt == 'json':
+        stream.write('[')
+        for row in rows:
+            stream.write(',\n  ' if count else '\n  ')
+            stream.write(json.dumps(row, ensure_ascii=False))
+            count += 1
+        stream.write('\n]\n' if count else ']\n')
+    else:
+        raise ManifestError(f"unknown format '{fmt}'")
+    return count
+
+def manifest_rows(profiles: Dict[str, Dict[str, Any]], fields: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Turn stored profiles into manifest rows, username first."""
+    for username, profile in profiles.items():
+        row = {'username': username, **profile}
+        yield {key: row[key] for key in fields if key in row} if fields is not None else row
+
+__all__ = [
+    'CSV_FIELDS', 'FORMATS', 'ManifestError', 'detect_format', 'manifest_rows', 'parse_bool',
+    'read_manifest', 'write_manifest',
+]
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Profile Picker
+==============
+Filter-as-you-type selection over a precomputed search index.
+
+ProfileIndex lower-cases username, name and email once. Each keystroke
+filters only the matches of the longest query it extends (typing narrows,
+backspace reuses an earlier result), and ranks by match quality, then most
+recent use. Picker draws a fixed-height window of the top results through
+screen.Screen, so a keystroke repaints the same few lines whether there are
+ten profiles or ten thousand.
+"""
+
+import os
+import sys
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from screen import Screen, clip, visible_width
+
+# Match tiers, best first
+EXACT, PREFIX, WORD, SUBSTRING, FUZZY = range(5)
+
+# Keys read_key() reports besides printable characters
+KEY_UP, KEY_DOWN, KEY_ENTER, KEY_BACKSPACE, KEY_ESCAPE = 'up', 'down', 'enter', 'backspace', 'escape'
+
+class ProfileIndex:
+    """Lower-cased (username, name, email) fields for every choice, built once."""
+
+    def __init__(self, profiles: Mapping[str, Mapping[str, Any]], last_used: Optional[Mapping[str, float]] = None,
+                 pinned: Sequence[Tuple[str, str]] = ()) -> None:
+        """pinned (key, description) choices, such as 'all', sort ahead of profiles."""
+        last_used = last_used or {}
+        self.keys: List[str] = []
+        self.labels: List[str] = []
+        self.fields: List[Tuple[str, ...]] = []
+        self.recency: List[float] = []
+        for key, description in pinned:
+            self._add(key, description, (key.lower(),), float('inf'))
+        for username, profile in profiles.items():
+            name, email = profile.get('name', ''), profile.get('email', '')
+            self._add(username, f"{name} <{email}>", (username.lower(), name.lower(), email.lower()),
+                      float(last_used.get(username, 0)))
+
+    def _add(self, key: str, label: str, fields: Tuple[str, ...], recency: float) -> None:
+        """Append one choice."""
+        self.keys.append(key)
+        self.labels.append(label)
+        self.fields.append(fields)
+        self.recency.append(recency)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def score(self, position: int, query: str) -> Optional[Tuple[int, int]]:
+        """(tier, offset) for a lower-cased query, or None if the choice doesn't match."""
+        fields = self.fields[position]
+        username = fields[0]
+        if username == query:
+            return EXACT, 0
+        if username.startswith(query):
+            return PREFIX, 0
+
+        best: Optional[Tuple[int, int]] = None
+        for field in fields:
+            offset = field.find(query)
+            if offset < 0:
+                continue
+            # A match at a word start (after '.', '-', '@', ' ' ...) reads as intended
+            tier = WORD if offset == 0 or not field[offset - 1].isalnum() else SUBSTRING
+            if best is None or (tier, offset) < best:
+                best = (tier, offset)
+        if best is not None:
+            return best
+
+        for field in fields:
+            span = _subsequence_span(field, query)
+            if span is not None and (best is None or span < best[1]):
+                best = (FUZZY, span)
+        return best
+
+    def search(self, query: str, candidates: Optional[Sequence[int]] = None) -> List[int]:
+        """Positions matching a lower-cased query, best first: tier, recent use, offset, name.
+
+        Pass the results of a query this one extends as candidates to skip
+        everything that already failed to match.
+        """
+        positions = range(len(self.keys)) if candidates is None else candidates
+        ranked = []
+        for position in positions:
+            match = self.score(position, query) if query else (EXACT, 0)
+            if match is not None:
+                ranked.append((match[0], -self.recency[position], match[1], self.fields[position][0], position))
+        ranked.sort()
+        return [entry[-1] for entry in ranked]
+
+def _subsequence_span(text: str, query: str) -> Optional[int]:
+    """Length of the shortest leading window of text containing query in order, or None."""
+    position = start = -1
+    for char in query:
+        position = text.find(char, position + 1)
+        if position < 0:
+            return None
+        if start < 0:
+            start = position
+    return position - start + 1
+
+class Picker:
+    """Interactive filter-as-you-type chooser."""
+
+    def __init__(self, index: ProfileIndex, screen: Screen, title: Sequence[str], prompt: str,
+                 style: Optional[Callable[[str, bool], str]] = None) -> None:
+        """style(line, selected) decorates a result line (colors); the default marks the selection."""
+        self.index = index
+        self.screen = screen
+        self.title = list(title)
+        self.prompt = prompt
+        self.style = style or (lambda line, selected: ('> ' if selected else '  ') + line)
+        self.query = ''
+        self.selected = 0
+        self.top = 0
+        # Ranked results per query; only prefixes of the current query are kept
+        self._results: Dict[str, List[int]] = {'': index.search('')}
+
+    def results(self) -> List[int]:
+        """Ranked matches for the current query, narrowing the best cached prefix."""
+        query = self.query.lower()
+        for stale in [cached for cached in self._results if not query.startswith(cached)]:
+            del self._results[stale]
+        if query not in self._results:
+            base = max(self._results, key=len)
+            self._results[query] = self.index.search(query, self._results[base])
+        return self._results[query]
+
+    def window_size(self) -> int:
+        """Result rows that fit under the title and prompt."""
+        try:
+            rows = os.get_terminal_size(self.screen.stream.fileno()).lines
+        except (AttributeError, ValueError, OSError):
+            rows = 24
+        return max(3, min(15, rows - len(self.title) - 5))
+
+    def frame(self, results: List[int], height: int, width: int) -> List[str]:
+        """Title, prompt line, a fixed-height window of results and a count line."""
+        if self.selected < self.top:
+            self.top = self.selected
+        elif self.selected >= self.top + height:
+            self.top = self.selected - height + 1
+
+        lines = self.title + [f"{self.prompt}{self.query}"]
+        for row in range(self.top, self.top + height):
+            if row < len(results):
+                position = results[row]
+                text = clip(f"{self.index.keys[position]}  {self.index.labels[position]}", width - 3)
+                lines.append(self.style(text, row == self.selected))
+            else:
+                lines.append('')
+        lines.append(f"  {len(results)}/{len(self.index)}  ↑/↓ select, Enter choose, Esc cancel")
+        return lines
+
+    def handle(self, key: str) -> Optional[str]:
+        """Apply one key; returns 'choose' or 'cancel' when the picker is done."""
+        if key == KEY_ENTER:
+            return 'choose'
+        if key == KEY_ESCAPE:
+            return 'cancel'
+        if key == KEY_UP:
+            self.selected = max(0, self.selected - 1)
+        elif key == KEY_DOWN:
+            self.selected = min(max(0, len(self.results()) - 1), self.selected + 1)
+        elif key == KEY_BACKSPACE:
+            self.query = self.query[:-1]
+            self.selected = self.top = 0
+        elif len(key) == 1 and key.isprintable():
+            self.query += key
+            self.selected = self.top = 0
+        return None
+
+    def run(self) -> Optional[str]:
+        """Show the picker until a choice is made; None when cancelled or nothing matches."""
+        height = self.window_size()
+        try:
+            width = os.get_terminal_size(self.screen.stream.fileno()).columns
+        except (AttributeError, ValueError, OSError):
+            width = 80
+        title_row = len(self.title)
+
+        with raw_terminal():
+            while True:
+                results = self.results()
+                self.screen.render(self.frame(results, height, width),
+                                   cursor=(title_row, visible_width(self.prompt + self.query)))
+                outcome = self.handle(read_key())
+                if outcome is not None:
+                    break
+
+        # Leave the cursor below the frame for whatever is printed next
+        self.screen.render(self.frame(results, height, width))
+        if outcome == 'choose' and results:
+            return self.index.keys[results[self.selected]]
+        return None
+
+def interactive() -> bool:
+    """Whether the picker can take over the terminal (a TTY on both ends and raw key input)."""
+    try:
+        if not (sys.stdin.isatty() and sys.stdout.isatty()) or os.environ.get('TERM') == 'dumb':
+            return False
+    except (AttributeError, ValueError):
+        return False
+    if os.name == 'nt':
+        return True
+    try:
+        import termios  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+class raw_terminal:
+    """Context manager: unbuffered, unechoed key input (POSIX cbreak; a no-op on Windows)."""
+
+    def __enter__(self) -> 'raw_terminal':
+        self._saved: Any = None
+        if os.name != 'nt':
+            import termios
+            import tty
+            fd = sys.stdin.fileno()
+            self._saved = termios.tcgetattr(fd)
+            tty.setcbreak(fd)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._saved is not None:
+            import termios
+            termios.tcsetattr(sys.stdin.fileno(), termios.TCSADRAIN, self._saved)
+
+def read_key() -> str:
+    """Read one key press: a printable character or one of the KEY_* names."""
+    if os.name == 'nt':
+        import msvcrt
+        char = msvcrt.getwch()
+        if char in ('\x00', '\xe0'):
+            return {'H': KEY_UP, 'P': KEY_DOWN}.get(msvcrt.getwch(), '')
+        return _plain_key(char)
+
+    import select
+    fd = sys.stdin.fileno()
+    data = os.read(fd, 1)
+    if data and data[0] >= 0xc0:
+        # The rest of a multi-byte UTF-8 character
+        data += os.read(fd, 1 if data[0] < 0xe0 else 2 if data[0] < 0xf0 else 3)
+    char = data.decode('utf-8', 'replace')
+    if char == '\x1b':
+        # A lone Escape, or the start of an arrow sequence (ESC [ A / ESC O A)
+        if not select.select([fd], [], [], 0.05)[0]:
+            return KEY_ESCAPE
+        sequence = os.read(fd, 2).decode('ascii', 'replace')
+        return {'[A': KEY_UP, 'OA': KEY_UP, '[B': KEY_DOWN, 'OB': KEY_DOWN}.get(sequence, '')
+    return _plain_key(char)
+
+def _plain_key(char: str) -> str:
+    """Map control characters shared by every platform."""
+    if char in ('\r', '\n'):
+        return KEY_ENTER
+    if char in ('\x7f', '\x08'):
+        return KEY_BACKSPACE
+    if char == '\x1b':
+        return KEY_ESCAPE
+    if char == '\x10':  # Ctrl-P
+        return KEY_UP
+    if char == '\x0e':  # Ctrl-N
+        return KEY_DOWN
+    if char == '\x03':
+        raise KeyboardInterrupt
+    return char
+
+__all__ = ['KEY_BACKSPACE', 'KEY_DOWN', 'KEY_ENTER', 'KEY_ESCAPE', 'KEY_UP', 'Picker', 'ProfileIndex',
+           'interactive', 'raw_terminal', 'read_key']
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Profile Store
+=============
+Persistence layer for Git profiles with an in-process cache.
+
+Two interchangeable backends share one interface (load, save, invalidate,
+version, find_identity, find_email, find_name): a JSON document, the default, and a SQLite
+database for large profile counts that indexes identities and writes only
+the rows that changed.
+
+Saves are safe against concurrent gitsw processes: each runs under the
+store's file lock, and load() hands out a ProfileDocument that remembers
+the stored document it was copied from. If another process saved in the
+meantime, only the profiles this caller changed are applied on top of the
+current document (an optimistic check per profile); when both changed the
+same profile, save() raises ConflictError instead of overwriting it.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from file_lock import atomic_write, locked
+
+# (inode, size, mtime_ns) identifying one version of the store on disk
+FileSignature = Tuple[int, int, int]
+
+# Usernames by (name, email), by email and by name, each in store order
+LookupIndex = Tuple[Dict[Tuple[str, str], List[str]], Dict[str, List[str]], Dict[str, List[str]]]
+
+class StoreError(IOError):
+    """Raised when a store backend fails; callers handle it like any I/O error."""
+
+class ConflictError(StoreError):
+    """Raised when a save would overwrite a profile another process changed since it was loaded."""
+
+class ProfileDocument(dict):
+    """The dict load() returns: profiles plus the stored document they were copied from."""
+
+    def __init__(self, profiles: Mapping[str, Any]) -> None:
+        super().__init__(profiles)
+        self.base = profiles
+
+_MISSING = object()
+
+def merge_profiles(base: Mapping[str, Any], mine: Mapping[str, Any], current: Mapping[str, Any]) -> Dict[str, Any]:
+    """Apply the changes between base and mine on top of current.
+
+    Profiles this caller did not touch keep their current value, so another
+    process's additions and edits survive. Raises ConflictError when a
+    profile this caller changed was also changed there, even to the same
+    value: two processes that both read 1 and wrote 2 must not count as one.
+    """
+    merged = dict(current)
+    for username in list(base) + [name for name in mine if name not in base]:
+        ours = mine.get(username, _MISSING)
+        original = base.get(username, _MISSING)
+        if ours is original or ours == original:
+            continue
+        theirs = current.get(username, _MISSING)
+        if theirs is not original and theirs != original:
+            raise ConflictError(f"profile '{username}' was changed by another process; reload and retry")
+        if ours is _MISSING:
+            merged.pop(username, None)
+        else:
+            merged[username] = ours
+    return merged
+
+class ProfileStore:
+    """JSON profile store that re-parses the file only when it changes on disk."""
+
+    def __init__(self, path: Path) -> None:
+        """Initialize the store for a profile file."""
+        self.path = path
+        self._signature: Optional[FileSignature] = None
+        self._profiles: Dict[str, Any] = {}
+        # (name, email), email and name indexes over _profiles, built on first lookup
+        self._index: Optional[LookupIndex] = None
+
+    def _stat_signature(self) -> Optional[FileSignature]:
+        """Return the current on-disk signature, or None if the file is missing."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def version(self) -> Optional[FileSignature]:
+        """Return a token that changes whenever the stored document does (one stat)."""
+        return self._stat_signature()
+
+    def load(self) -> Dict[str, Any]:
+        """Load profiles, reusing the cached document while the file is unchanged.
+
+        The returned dict is a fresh top-level copy, so callers may add or
+        delete profiles freely; the profile entries themselves are shared
+        with the cache and must be replaced rather than mutated in place.
+        """
+        signature = self._stat_signature()
+        if signature is None:
+            self.invalidate()
+            return ProfileDocument(self._profiles)
+
+        if signature != self._signature:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                profiles = json.load(f)
+            self._profiles = profiles
+            self._signature = signature
+            self._index = None
+
+        return ProfileDocument(self._profiles)
+
+    def save(self, profiles: Dict[str, Any]) -> None:
+        """Save profiles under the store lock and prime the cache with the written document.
+
+        A ProfileDocument from load() is merged onto whatever another process
+        saved since (see merge_profiles); a plain dict replaces the store.
+        The file is replaced atomically (temp file, fsync, rename).
+        """
+        with locked(self.path):
+            # Re-read: a file replaced within one mtime tick can reuse the old inode and size
+            self.invalidate()
+            try:
+                current = self.load()
+            except ValueError as e:
+                raise StoreError(f"{self.path}: {e}") from e
+            base = getattr(profiles, 'base', None)
+            if base is not None:
+                profiles = merge_profiles(base, profiles, current)
+            atomic_write(self.path, json.dumps(profiles, indent=2, ensure_ascii=False))
+
+            self._profiles = {username: dict(profile) for username, profile in profiles.items()}
+            self._signature = self._stat_signature()
+            self._index = None
+
+    def invalidate(self) -> None:
+        """Drop the cached document so the next load re-reads the file."""
+        self._signature = None
+        self._profiles = {}
+        self._index = None
+
+    def _lookup_index(self) -> LookupIndex:
+        """Return the identity, email and name indexes, rebuilt only when the file has changed."""
+        if self._stat_signature() != self._signature:
+            self.load()
+        if self._index is None:
+            by_identity: Dict[Tuple[str, str], List[str]] = {}
+            by_email: Dict[str, List[str]] = {}
+            by_name: Dict[str, List[str]] = {}
+            for username, profile in self._profiles.items():
+                by_identity.setdefault((profile['name'], profile['email']), []).append(username)
+                by_email.setdefault(profile['email'], []).append(username)
+                by_name.setdefault(profile['name'], []).append(username)
+            self._index = (by_identity, by_email, by_name)
+        return self._index
+
+    def find_identity(self, name: str, email: str) -> List[str]:
+        """Return the profiles with this name and email, in store order (dict lookup)."""
+        return list(self._lookup_index()[0].get((name, email), []))
+
+    def find_email(self, email: str) -> List[str]:
+        """Return the profiles using an email, in store order (dict lookup)."""
+        return list(self._lookup_index()[1].get(email, []))
+
+    def find_name(self, name: str) -> List[str]:
+        """Return the profiles using a name, in store order (dict lookup)."""
+        return list(self._lookup_index()[2].get(name, []))
+
+class SQLiteProfileStore:
+    """SQLite profile store with indexed identity lookups and row-level writes.
+
+    Each profile is one row: username (primary key), name and email as
+    indexed columns, and the full profile as JSON. save() diffs against the
+    last document it saw and only touches changed rows, in one transaction.
+    The rollback journal (not WAL) is used so every commit updates the
+    database file's mtime, which the caches here and the prompt rely on.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS profiles ("
+        " username TEXT PRIMARY KEY, name TEXT NOT NULL, email TEXT NOT NULL, data TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS profiles_email ON profiles (email)",
+        "CREATE INDEX IF NOT EXISTS profiles_identity ON profiles (name, email)",
+    )
+
+    def __init__(self, path: Path) -> None:
+        """Initialize the store for a database file (created on first write)."""
+        self.path = path
+        self._signature: Optional[FileSignature] = None
+        self._profiles: Dict[str, Any] = {}
+        self._counter: Optional[bytes] = None
+
+    def _change_counter(self) -> Optional[bytes]:
+        """Return the database header's file change counter, bumped by every commit."""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(24)
+                return f.read(4)
+        except OSError:
+            return None
+
+    def _stat_signature(self) -> Optional[FileSignature]:
+        """Return the current on-disk signature, or None if the file is missing."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def version(self) -> Optional[FileSignature]:
+        """Return a token that changes whenever the stored document does (one stat)."""
+        return self._stat_signature()
+
+    def _connect(self) -> Any:
+        """Open the database and make sure the schema exists.
+
+        sqlite3 is imported here so JSON-store users never pay for it.
+        """
+        import sqlite3
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            connection = sqlite3.connect(str(self.path))
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+        except sqlite3.Error as e:
+            raise StoreError(f"{self.path}: {e}") from e
+        return connection
+
+    def _execute(self, action: Callable[[Any], Any]) -> Any:
+        """Run action(connection) and close the connection, mapping sqlite errors to StoreError."""
+        import sqlite3
+        connection = self._connect()
+        try:
+            return action(connection)
+        except sqlite3.Error as e:
+            raise StoreError(f"{self.path}: {e}") from e
+        finally:
+            connection.close()
+
+    def load(self) -> Dict[str, Any]:
+        """Load profiles in insertion order, reusing the cache while the file is unchanged.
+
+        As with ProfileStore, the top-level dict is a fresh copy and the
+        profile entries are shared with the cache.
+        """
+        signature = self._stat_signature()
+        if signature is None:
+            self.invalidate()
+            return ProfileDocument(self._profiles)
+
+        if signature != self._signature:
+            # Read before the rows: a commit in between makes the cache look older, never newer
+            self._counter = self._change_counter()
+            rows = self._execute(
+                lambda connection: connection.execute("SELECT username, data FROM profiles ORDER BY rowid").fetchall())
+            self._profiles = {username: json.loads(data) for username, data in rows}
+            self._signature = self._stat_signature()
+
+        return ProfileDocument(self._profiles)
+
+    def save(self, profiles: Dict[str, Any]) -> None:
+        """Write the rows that differ from the stored document, in one transaction.
+
+        Runs under the store lock, merging a ProfileDocument onto concurrent
+        changes the same way ProfileStore.save() does.
+        """
+        with locked(self.path):
+            # mtime can miss a commit made within the same tick; the change counter can't
+            if self._change_counter() != self._counter:
+                self.invalidate()
+            current = self.load()
+            base = getattr(profiles, 'base', None)
+            if base is not None:
+                profiles = merge_profiles(base, profiles, current)
+            upserts = [(username, profile['name'], profile['email'], json.dumps(profile, ensure_ascii=False))
+                       for username, profile in profiles.items()
+                       if current.get(username) is not profile and current.get(username) != profile]
+            deletes = [(username,) for username in current if username not in profiles]
+            def write(connection: Any) -> None:
+                with connection:
+                    connection.executemany("DELETE FROM profiles WHERE username = ?", deletes)
+                    connection.executemany(
+                        "INSERT INTO profiles (username, name, email, data) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (username) DO UPDATE SET name = excluded.name, "
+                        "email = excluded.email, data = excluded.data",
+                        upserts
+                    )
+
+            if upserts or deletes or not self.path.exists():
+                self._execute(write)
+
+            self._profiles = {username: dict(profile) for username, profile in profiles.items()}
+            self._signature = self._stat_signature()
+            self._counter = self._change_counter()
+
+    def invalidate(self) -> None:
+        """Drop the cached document so the next load re-reads the database."""
+        self._signature = None
+        self._profiles = {}
+        self._counter = None
+
+    def _query(self, sql: str, params: Tuple[str, ...]) -> List[str]:
+        """Run an indexed lookup returning usernames."""
+        if not self.path.exists():
+            return []
+        return self._execute(lambda connection: [row[0] for row in connection.execute(sql, params)])
+
+    def find_identity(self, name: str, email: str) -> List[str]:
+        """Return the profiles with this name and email, in store order (index lookup)."""
+        return self._query("SELECT username FROM profiles WHERE name = ? AND email = ? ORDER BY rowid", (name, email))
+
+    def find_email(self, email: str) -> List[str]:
+        """Return the profiles using an email, in store order (index lookup)."""
+        return self._query("SELECT username FROM profiles WHERE email = ? ORDER BY rowid", (email,))
+
+    def find_name(self, name: str) -> List[str]:
+        """Return the profiles using a name, in store order (the (name, email) index's prefix)."""
+        return self._query("SELECT username FROM profiles WHERE name = ? ORDER BY rowid", (name,))
+
+# Store backends by name, for selection and migration
+BACKENDS = {'json': ProfileStore, 'sqlite': SQLiteProfileStore}
+
+AnyProfileStore = Union[ProfileStore, SQLiteProfileStore]
+
+def open_profile_store(json_path: Path, sqlite_path: Path, backend: Optional[str] = None) -> AnyProfileStore:
+    """Open the configured backend.
+
+    An explicit backend (or GITSW_STORE) wins; otherwise the SQLite database
+    is used once it exists, and the JSON file before that.
+    """
+    backend = backend or os.environ.get('GITSW_STORE')
+    if backend not in BACKENDS:
+        backend = 'sqlite' if sqlite_path.exists() else 'json'
+    return SQLiteProfileStore(sqlite_path) if backend == 'sqlite' else ProfileStore(json_path)
+
+def backend_name(store: AnyProfileStore) -> str:
+    """Return the BACKENDS key of a store."""
+    return 'sqlite' if isinstance(store, SQLiteProfileStore) else 'json'
+
+class _JSONDocument:
+    """A small JSON object file shared between processes.
+    
+    Updates re-read the file under its lock and replace it atomically, so a
+    background writer and the foreground process neither observe a
+    half-written document nor drop each other's entries. These are caches,
+    so writes skip fsync.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Initialize the store for a file."""
+        self.path = path
+
+    def load(self) -> Dict[str, Any]:
+        """Load the document; a missing or corrupt file reads as empty."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (IOError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _update(self, mutate: Callable[[Dict[str, Any]], bool]) -> None:
+        """Apply mutate(data) to the current document under the lock; write if it returns True."""
+        with locked(self.path):
+            data = self.load()
+            if mutate(data):
+                atomic_write(self.path, json.dumps(data, indent=2), durable=False)
+
+    def remove(self, username: str) -> None:
+        """Forget a profile."""
+        self.remove_many([username])
+
+    def remove_many(self, usernames: Iterable[str]) -> None:
+        """Forget several profiles in one write."""
+        usernames = list(usernames)
+        if not usernames:
+            return
+
+        def mutate(data: Dict[str, Any]) -> bool:
+            present = [username for username in usernames if username in data]
+            for username in present:
+                del data[username]
+            return bool(present)
+
+        self._update(mutate)
+
+class HealthStore(_JSONDocument):
+    """Last connection-test outcome per profile, shared between processes."""
+
+    def get(self, username: str) -> Optional[Dict[str, Any]]:
+        """Get the last recorded result for a profile."""
+        return self.load().get(username)
+
+    def record(self, username: str, success: bool, latency: float, error: str = '') -> None:
+        """Record a test result stamped with the current time."""
+        self.record_many([(username, success, latency, error)])
+
+    def record_many(self, results: Iterable[Tuple[str, bool, float, str]]) -> None:
+        """Record (username, success, latency, error) results in one write."""
+        checked_at = time.time()
+        entries = {username: {
+            'success': success,
+            'latency': round(latency, 3),
+            'error': error,
+            'checked_at': checked_at
+        } for username, success, latency, error in results}
+
+        def mutate(data: Dict[str, Any]) -> bool:
+            data.update(entries)
+            return True
+
+        self._update(mutate)
+
+class UsageStore(_JSONDocument):
+    """When each profile was last switched to, for ranking pickers."""
+
+    def touch(self, username: str) -> None:
+        """Record that a profile was just used."""
+        used_at = time.time()
+
+        def mutate(data: Dict[str, Any]) -> bool:
+            data[username] = used_at
+            return True
+
+        self._update(mutate)
+
+def is_fresh(entry: Optional[Dict[str, Any]], max_age: float) -> bool:
+    """Return True if a health entry is younger than max_age seconds."""
+    return bool(entry) and time.time() - entry.get('checked_at', 0) < max_age
+
+__all__ = [
+    'BACKENDS', 'ConflictError', 'HealthStore', 'ProfileDocument', 'ProfileStore', 'SQLiteProfileStore', 'StoreError',
+    'UsageStore', 'backend_name', 'is_fresh', 'merge_profiles', 'open_profile_store',
+]
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Prompt State
+============
+A tiny file naming the active profile, so shell prompts can show it
+without starting git or loading the profile store.
+
+The file holds three lines: username (empty when the identity matches no
+profile), name and email. It is trusted only while it is at least as new
+as every watched file (the global Git config and the profile store);
+anything else means someone changed them behind our back and the caller
+must recompute it.
+
+Inside a repository the identity can differ (includeIf bindings, a local
+user.email), so each repository gets its own state file in its git
+directory, which also watches the repository's config.
+"""
+
+import os
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional
+
+class PromptState(NamedTuple):
+    """The identity the state file records."""
+    username: str
+    name: str
+    email: str
+
+def read_state(path: Path, watched: Iterable[Path]) -> Optional[PromptState]:
+    """Return the recorded state, or None if it is missing or stale."""
+    try:
+        state_mtime = os.stat(path).st_mtime_ns
+        for config_path in watched:
+            try:
+                if os.stat(config_path).st_mtime_ns > state_mtime:
+                    return None
+            except FileNotFoundError:
+                continue
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().split('\n')
+    except OSError:
+        return None
+    if len(lines) < 3:
+        return None
+    return PromptState(lines[0], lines[1], lines[2])
+
+def write_state(path: Path, state: PromptState) -> None:
+    """Replace the state file atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # A pid-suffixed sibling instead of tempfile, which costs more to import
+    # than the stale-prompt path spends on everything else
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(f"{state.username}\n{state.name}\n{state.email}\n")
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def shell_init(path: Path, watched: Iterable[Path], command: str = 'gitsw',
+               repo_state: Optional[str] = None) -> str:
+    """Return a POSIX shell function printing the profile for PS1.
+
+    The fresh-state path uses only shell builtins (`test -ot` and `read`),
+    so a prompt render costs no fork; a stale or missing file falls back to
+    `<command> prompt`, which recomputes and rewrites it. With repo_state,
+    the function walks up from $PWD and, inside a repository, reads that
+    file in its .git directory instead (a linked worktree, whose .git is a
+    file, always asks `<command> prompt`).
+    """
+    import shlex
+    fresh = ''.join(f' && ! [ "$__gitsw_state" -ot {shlex.quote(str(config_path))} ]' for config_path in watched)
+    lookup = ''
+    if repo_state is not None:
+        state_name = shlex.quote(repo_state)
+        fresh += ''.join(f' && ! [ "$__gitsw_state" -ot "{config_path}" ]'
+                         for config_path in ('$__gitsw_config', '$__gitsw_config.worktree'))
+        lookup = (
+            "    __gitsw_config=$__gitsw_state\n"
+            "    __gitsw_dir=$PWD\n"
+            "    while :; do\n"
+            "        if [ -d \"$__gitsw_dir/.git\" ]; then\n"
+            f"            __gitsw_state=\"$__gitsw_dir/.git/\"{state_name}\n"
+            "            __gitsw_config=\"$__gitsw_dir/.git/config\"\n"
+            "            break\n"
+            "        elif [ -e \"$__gitsw_dir/.git\" ]; then\n"
+            "            __gitsw_state=\n"
+            "            break\n"
+            "        fi\n"
+            "        [ -n \"$__gitsw_dir\" ] || break\n"
+            "        __gitsw_dir=${__gitsw_dir%/*}\n"
+            "    done\n"
+        )
+    return (
+        "__gitsw_ps1() {\n"
+        f"    __gitsw_state={shlex.quote(str(path))}\n"
+        f"{lookup}"
+        f"    if [ -f \"$__gitsw_state\" ]{fresh}; then\n"
+        "        IFS= read -r __gitsw_profile < \"$__gitsw_state\"\n"
+        "        printf '%s' \"$__gitsw_profile\"\n"
+        "    else\n"
+        f"        {command} prompt 2>/dev/null\n"
+        "    fi\n"
+        "}\n"
+    )
+
+__all__ = ['PromptState', 'read_state', 'shell_init', 'write_state']
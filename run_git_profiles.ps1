@@ -132,20 +132,14 @@ function Start-GitProfiles {
     
     try {
         # Download main files
-        Write-Info "Downloading git_profile_manager.py..."
-        try {
-            Invoke-WebRequest -Uri "https://raw.githubusercontent.com/nhatpmlab/git-switch/main/git_profile_manager.py" -OutFile "git_profile_manager.py"
-        } catch {
-            Write-Error "Failed to download git_profile_manager.py"
-            throw
-        }
-        
-        Write-Info "Downloading git_profiles.py..."
-        try {
-            Invoke-WebRequest -Uri "https://raw.githubusercontent.com/nhatpmlab/git-switch/main/git_profiles.py" -OutFile "git_profiles.py"
-        } catch {
-            Write-Error "Failed to download git_profiles.py"
-            throw
+        foreach ($file in @("gitsw.py", "git_profile_manager.py", "git_profiles.py", "profile_store.py", "git_config.py", "ssh_config.py", "known_hosts.py", "prompt_state.py", "manifest.py", "tracing.py", "update_check.py", "screen.py", "picker.py", "ssh_agent.py", "file_lock.py")) {
+            Write-Info "Downloading $file..."
+            try {
+                Invoke-WebRequest -Uri "https://raw.githubusercontent.com/nhatpmlab/git-switch/main/$file" -OutFile $file
+            } catch {
+                Write-Error "Failed to download $file"
+                throw
+            }
         }
         
         Write-Success "Files downloaded successfully"
@@ -156,7 +150,7 @@ function Start-GitProfiles {
         Write-Host ""
         
         # Run the application
-        & $PythonCmd "git_profiles.py"
+        & $PythonCmd "gitsw.py"
         
     } finally {
         # Cleanup
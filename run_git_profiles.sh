@@ -95,22 +95,18 @@ run_git_profiles() {
     PYTHON_CMD=${PYTHON_CMD:-python3}
     
     # Download main files
-    print_info "Downloading git_profile_manager.py..."
-    if ! curl -fsSL "https://raw.githubusercontent.com/nhatpmlab/git-switch/main/git_profile_manager.py" -o git_profile_manager.py; then
-        print_error "Failed to download git_profile_manager.py"
-        cleanup_and_exit 1
-    fi
-    
-    print_info "Downloading git_profiles.py..."
-    if ! curl -fsSL "https://raw.githubusercontent.com/nhatpmlab/git-switch/main/git_profiles.py" -o git_profiles.py; then
-        print_error "Failed to download git_profiles.py"
-        cleanup_and_exit 1
-    fi
+    for file in gitsw.py git_profile_manager.py git_profiles.py profile_store.py git_config.py ssh_config.py known_hosts.py prompt_state.py manifest.py tracing.py update_check.py screen.py picker.py ssh_agent.py file_lock.py; do
+        print_info "Downloading $file..."
+        if ! curl -fsSL "https://raw.githubusercontent.com/nhatpmlab/git-switch/main/$file" -o "$file"; then
+            print_error "Failed to download $file"
+            cleanup_and_exit 1
+        fi
+    done
     
     print_success "Files downloaded successfully"
     
     # Make executable
-    chmod +x git_profiles.py
+    chmod +x gitsw.py git_profiles.py
     
     print_info "Starting Git Profile Manager..."
     echo -e "${CYAN}${BOLD}Note: This is running from temporary directory. No files will be installed.${NC}"
@@ -118,7 +114,7 @@ run_git_profiles() {
     echo ""
     
     # Run the application
-    $PYTHON_CMD git_profiles.py
+    $PYTHON_CMD gitsw.py
     
     # Cleanup
     cleanup_and_exit 0
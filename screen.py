@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Screen
+======
+Frame renderer for the interactive menu.
+
+A screen is built as a list of lines and written with a single write():
+the first frame (or any frame after other output) clears the terminal with
+ANSI escapes and draws everything; later frames rewrite only the lines that
+differ from the previous one. When stdout is not a terminal, frames are
+written as plain lines with no escapes at all, so piped or logged sessions
+read top to bottom.
+"""
+
+import os
+import re
+import sys
+from typing import Iterable, List, Optional, TextIO, Tuple
+
+# Home the cursor, erase the screen and the scrollback, as `clear` does
+CLEAR = '\033[H\033[2J\033[3J'
+
+ANSI_ESCAPE = re.compile(r'\033\[[0-9;]*[A-Za-z]')
+
+def visible_width(line: str) -> int:
+    """Columns a line needs, ignoring escapes; non-ASCII counts as two (emoji)."""
+    text = ANSI_ESCAPE.sub('', line)
+    return sum(1 if ord(char) < 128 else 2 for char in text)
+
+def clip(text: str, width: int) -> str:
+    """Cut plain text (no escapes) to at most width columns, as visible_width counts them."""
+    used = 0
+    for index, char in enumerate(text):
+        used += 1 if ord(char) < 128 else 2
+        if used > width:
+            return text[:index]
+    return text
+
+class Screen:
+    """Draws whole frames to a stream, redrawing only changed lines on a terminal."""
+
+    def __init__(self, stream: Optional[TextIO] = None, ansi: bool = True) -> None:
+        """ansi=False is for consoles without escape support (old Windows hosts)."""
+        self.stream = stream or sys.stdout
+        try:
+            tty = self.stream.isatty()
+        except (AttributeError, ValueError):
+            tty = False
+        self.interactive = tty and os.environ.get('TERM') != 'dumb'
+        self.ansi = ansi
+        self._frame: Optional[List[str]] = None
+        self._size: Optional[os.terminal_size] = None
+
+    def invalidate(self) -> None:
+        """Forget the last frame; call after printing outside render()."""
+        self._frame = None
+
+    def clear(self) -> None:
+        """Clear the terminal (nothing to do when output is not one)."""
+        self._frame = None
+        if not self.interactive:
+            return
+        if self.ansi:
+            self._write(CLEAR)
+        else:
+            os.system('cls' if os.name == 'nt' else 'clear')
+
+    def render(self, lines: Iterable[str], cursor: Optional[Tuple[int, int]] = None) -> None:
+        """Show a frame; the cursor ends on the line below it, or at (row, column) in the frame."""
+        lines = list(lines)
+        if not self.interactive or not self.ansi:
+            if self.interactive:
+                self.clear()
+            self._write(''.join(line + '\n' for line in lines))
+            return
+
+        previous = self._frame
+        size = self._terminal_size()
+        # A resize reflows what is on screen, so row addressing is only safe at the same size
+        if previous is None or size is None or size != self._size or not self._fits(lines, size):
+            output = [CLEAR] + [line + '\n' for line in lines]
+        else:
+            output = [f'\033[{row + 1};1H{line}\033[K' for row, line in enumerate(lines)
+                      if row >= len(previous) or previous[row] != line]
+            # Drop whatever was typed below the old frame, and any lines it had beyond this one
+            output.append(f'\033[{len(lines) + 1};1H\033[J')
+        if cursor is not None:
+            output.append(f'\033[{cursor[0] + 1};{cursor[1] + 1}H')
+        self._write(''.join(output))
+        self._frame = lines
+        self._size = size
+
+    def _terminal_size(self) -> Optional[os.terminal_size]:
+        """The terminal's size, or None if it can't be read."""
+        try:
+            return os.get_terminal_size(self.stream.fileno())
+        except (AttributeError, ValueError, OSError):
+            return None
+
+    def _fits(self, lines: List[str], size: os.terminal_size) -> bool:
+        """Whether row addressing is safe: no line wraps and the prompt below doesn't scroll."""
+        # The frame, the input prompt and the newline after the answer
+        if len(lines) + 2 > size.lines:
+            return False
+        return all(visible_width(line) < size.columns for line in lines)
+
+    def _write(self, text: str) -> None:
+        """One write and one flush per frame."""
+        self.stream.write(text)
+        self.stream.flush()
+
+__all__ = ['CLEAR', 'Screen', 'clip', 'visible_width']
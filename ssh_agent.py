@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+SSH Agent
+=========
+Finds or starts an ssh-agent and loads profile keys into it.
+
+The agent named by SSH_AUTH_SOCK is used when it answers; otherwise gitsw
+keeps its own agent on a fixed socket, so later switches find it again
+without any saved state. Loaded keys are recognised by SHA256 fingerprint,
+computed in-process from the .pub file (the same value `ssh-add -l` prints),
+so a key that is already loaded costs one `ssh-add -l` and nothing else.
+"""
+
+import base64
+import hashlib
+import os
+import re
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import tracing
+
+# ssh-add -t accepts seconds or sshd_config time format (90, 30m, 1h30m, 2d)
+LIFETIME_PATTERN = re.compile(r'^(?:\d+[sSmMhHdDwW]?)+$')
+
+class AgentError(Exception):
+    """Raised when no agent can be reached or started, or ssh-add fails."""
+
+def valid_lifetime(lifetime: str) -> bool:
+    """Whether ssh-add -t will accept lifetime."""
+    return bool(LIFETIME_PATTERN.match(lifetime))
+
+def public_key_fingerprint(public_key_file: Path) -> Optional[str]:
+    """SHA256 fingerprint of an OpenSSH public key file, or None if unreadable."""
+    try:
+        with open(public_key_file, 'r', encoding='utf-8') as f:
+            fields = f.readline().split()
+        blob = base64.b64decode(fields[1], validate=True)
+    except (OSError, IndexError, ValueError):
+        return None
+    digest = base64.b64encode(hashlib.sha256(blob).digest()).decode('ascii').rstrip('=')
+    return f'SHA256:{digest}'
+
+def _agent_env(socket: str) -> Dict[str, str]:
+    """The environment for talking to the agent on socket."""
+    env = os.environ.copy()
+    env['SSH_AUTH_SOCK'] = socket
+    return env
+
+def _list_keys(socket: str) -> Tuple[int, str]:
+    """Run `ssh-add -l`; exit code 0 = keys, 1 = no keys, 2 = no agent."""
+    result = tracing.run(['ssh-add', '-l', '-E', 'sha256'], env=_agent_env(socket),
+                         capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    return result.returncode, result.stdout
+
+def _probe(socket: Optional[str]) -> Optional[Set[str]]:
+    """Fingerprints of the keys the agent on socket holds, or None if no agent answers."""
+    if not socket or not os.path.exists(socket):
+        return None
+    code, output = _list_keys(socket)
+    if code not in (0, 1):
+        return None
+    # Exit 1 is "The agent has no identities."
+    return {line.split()[1] for line in output.splitlines() if len(line.split()) > 1} if code == 0 else set()
+
+def ensure_agent(socket_path: Path) -> Tuple[str, bool, Set[str]]:
+    """Return (socket, started, loaded fingerprints) for a running agent.
+
+    The session's agent comes first, then gitsw's agent at socket_path; if
+    neither answers a new one is started there. Finding the agent lists its
+    keys, so callers don't need a second `ssh-add -l`.
+    """
+    current = os.environ.get('SSH_AUTH_SOCK')
+    for socket in (current, str(socket_path)):
+        loaded = _probe(socket)
+        if loaded is not None:
+            return socket, False, loaded
+    if os.name == 'nt':
+        raise AgentError("no ssh-agent is running; start the 'OpenSSH Authentication Agent' service")
+
+    # A socket left behind by a dead agent would make -a fail
+    try:
+        socket_path.unlink()
+    except FileNotFoundError:
+        pass
+    result = tracing.run(['ssh-agent', '-s', '-a', str(socket_path)], capture_output=True, text=True,
+                         stdin=subprocess.DEVNULL)
+    if result.returncode != 0 or not socket_path.exists():
+        raise AgentError(result.stderr.strip() or f"ssh-agent exited with {result.returncode}")
+    return str(socket_path), True, set()
+
+def add_key(socket: str, key_file: str, lifetime: str) -> None:
+    """Load a key for lifetime; ssh-add asks for the passphrase on the terminal if it needs one."""
+    result = tracing.run(['ssh-add', '-t', lifetime, key_file], env=_agent_env(socket),
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        raise AgentError(result.stderr.strip() or f"ssh-add exited with {result.returncode}")
+
+def remove_keys(socket: str, key_files: Iterable[str]) -> None:
+    """Unload keys, all in one ssh-add call."""
+    key_files = list(key_files)
+    if not key_files:
+        return
+    result = tracing.run(['ssh-add', '-d'] + key_files, env=_agent_env(socket),
+                         capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    if result.returncode != 0:
+        raise AgentError(result.stderr.strip() or f"ssh-add -d exited with {result.returncode}")
+
+__all__ = ['AgentError', 'add_key', 'ensure_agent', 'public_key_fingerprint', 'remove_keys', 'valid_lifetime']
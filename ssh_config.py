@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+SSH Config
+==========
+Round-trip model of ~/.ssh/config with indexed Host lookup.
+
+Unknown directives, comments, Match blocks and formatting are preserved
+byte for byte; only the blocks that are explicitly changed are rewritten.
+update_ssh_config_file() does the read-modify-write under the file's lock,
+so concurrent gitsw processes don't drop each other's blocks.
+"""
+
+import re
+import shlex
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from file_lock import atomic_write, locked
+
+# "Keyword value" or "Keyword=value", as accepted by ssh_config(5)
+OPTION_PATTERN = re.compile(r'^\s*([A-Za-z][A-Za-z0-9]*)\s*(?:=\s*|\s+)(.*?)\s*$')
+BLOCK_KEYWORDS = ('host', 'match')
+INDENT = '    '
+
+def _parse_option(line: str) -> Optional[Tuple[str, str]]:
+    """Return (keyword, value) for a directive line, or None for blanks/comments."""
+    stripped = line.strip()
+    if not stripped or stripped.startswith('#'):
+        return None
+    match = OPTION_PATTERN.match(line)
+    if not match:
+        return None
+    return match.group(1), match.group(2)
+
+def _is_comment(line: str) -> bool:
+    """Return True for a comment line."""
+    return line.lstrip().startswith('#')
+
+def _quote(value: str) -> str:
+    """Quote a value containing whitespace."""
+    return f'"{value}"' if any(ch.isspace() for ch in value) else value
+
+class HostBlock:
+    """A Host or Match section with its raw lines.
+
+    Comment lines directly above the header belong to the block, so the
+    "# Git profile: <name>" marker travels with the block it describes.
+    """
+
+    def __init__(self, lines: List[str], header_index: int) -> None:
+        """Initialize a block from raw lines; lines[header_index] is the header."""
+        self.lines = lines
+        self.header_index = header_index
+
+    @property
+    def keyword(self) -> str:
+        """Return 'host' or 'match'."""
+        return _parse_option(self.lines[self.header_index])[0].lower()
+
+    @property
+    def patterns(self) -> List[str]:
+        """Return the Host patterns (empty for Match blocks)."""
+        if self.keyword != 'host':
+            return []
+        value = _parse_option(self.lines[self.header_index])[1]
+        try:
+            return shlex.split(value)
+        except ValueError:
+            return value.split()
+
+    @property
+    def comments(self) -> List[str]:
+        """Return the leading comment lines, stripped."""
+        return [line.strip() for line in self.lines[:self.header_index]]
+
+    def options(self) -> List[Tuple[str, str]]:
+        """Return (keyword, value) pairs in the block body."""
+        body = self.lines[self.header_index + 1:]
+        return [option for option in map(_parse_option, body) if option]
+
+    def get(self, keyword: str) -> Optional[str]:
+        """Return the first value for a keyword (ssh uses the first one)."""
+        for key, value in self.options():
+            if key.lower() == keyword.lower():
+                return value.strip('"')
+        return None
+
+    def set_options(self, options: Sequence[Tuple[str, str]], managed: Sequence[str],
+                    newline: str = '\n') -> bool:
+        """Make the block contain exactly `options` among the `managed` keywords.
+
+        Existing lines for a keyword are updated in place, managed keywords
+        missing from `options` are dropped, and anything else is untouched.
+        Returns True if the block changed.
+        """
+        wanted = {key.lower(): (key, value) for key, value in options}
+        managed_keys = {key.lower() for key in managed} | set(wanted)
+        seen = set()
+        new_lines = self.lines[:self.header_index + 1]
+
+        for line in self.lines[self.header_index + 1:]:
+            option = _parse_option(line)
+            key = option[0].lower() if option else None
+            if key not in managed_keys:
+                new_lines.append(line)
+            elif key in wanted and key not in seen:
+                seen.add(key)
+                indent = line[:len(line) - len(line.lstrip())] or INDENT
+                new_lines.append(f"{indent}{wanted[key][0]} {_quote(wanted[key][1])}{newline}")
+
+        missing = [wanted[key] for key in wanted if key not in seen]
+        if missing:
+            # Insert after the last directive so trailing blanks stay trailing
+            insert_at = self.header_index + 1
+            for index in range(self.header_index + 1, len(new_lines)):
+                if _parse_option(new_lines[index]):
+                    insert_at = index + 1
+            new_lines[insert_at:insert_at] = [f"{INDENT}{key} {_quote(value)}{newline}" for key, value in missing]
+
+        changed = new_lines != self.lines
+        self.lines = new_lines
+        return changed
+
+class SSHConfig:
+    """Parsed ~/.ssh/config with Host blocks indexed by alias."""
+
+    def __init__(self, preamble: List[str], blocks: List[HostBlock], newline: str = '\n') -> None:
+        """Initialize from parsed parts; use parse() or load() instead."""
+        self.preamble = preamble
+        self.blocks = blocks
+        self.newline = newline
+        self._index: Dict[str, HostBlock] = {}
+        for block in blocks:
+            self._index_block(block)
+
+    @classmethod
+    def parse(cls, text: str) -> 'SSHConfig':
+        """Parse config text in one pass."""
+        lines = text.splitlines(keepends=True)
+        newline = '\r\n' if lines and lines[0].endswith('\r\n') else '\n'
+        preamble: List[str] = []
+        blocks: List[HostBlock] = []
+        current = preamble
+
+        for line in lines:
+            option = _parse_option(line)
+            if option and option[0].lower() in BLOCK_KEYWORDS:
+                # Pull directly preceding comment lines into the new block
+                start = len(current)
+                while start > 0 and _is_comment(current[start - 1]):
+                    start -= 1
+                leading = current[start:]
+                del current[start:]
+                block = HostBlock(leading + [line], len(leading))
+                blocks.append(block)
+                current = block.lines
+            else:
+                current.append(line)
+
+        return cls(preamble, blocks, newline)
+
+    @classmethod
+    def load(cls, path: Path) -> 'SSHConfig':
+        """Load a config file; a missing file yields an empty config."""
+        try:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                return cls.parse(f.read())
+        except FileNotFoundError:
+            return cls([], [])
+
+    def _index_block(self, block: HostBlock) -> None:
+        """Register a block's aliases; the first definition wins, as in ssh."""
+        for alias in block.patterns:
+            self._index.setdefault(alias, block)
+
+    def _reindex(self) -> None:
+        """Rebuild the alias index after a structural change."""
+        self._index = {}
+        for block in self.blocks:
+            self._index_block(block)
+
+    def find(self, alias: str) -> Optional[HostBlock]:
+        """Return the block whose Host line lists `alias`."""
+        return self._index.get(alias)
+
+    def hosts(self) -> Iterator[HostBlock]:
+        """Iterate over Host blocks (Match blocks are skipped)."""
+        return (block for block in self.blocks if block.keyword == 'host')
+
+    def set_host(self, alias: str, options: Sequence[Tuple[str, str]],
+                 comment: Optional[str] = None, managed: Sequence[str] = ()) -> bool:
+        """Add or update the Host block for `alias`. Returns True if anything changed."""
+        block = self.find(alias)
+        if block is not None:
+            return block.set_options(options, managed, self.newline)
+
+        nl = self.newline
+        tail = self.blocks[-1].lines if self.blocks else self.preamble
+        if tail and not tail[-1].endswith('\n'):
+            tail[-1] += nl
+        if tail and tail[-1].strip():
+            tail.append(nl)
+
+        lines = [f"# {comment}{nl}"] if comment else []
+        lines.append(f"Host {alias}{nl}")
+        lines.extend(f"{INDENT}{key} {_quote(value)}{nl}" for key, value in options)
+        lines.append(nl)
+
+        block = HostBlock(lines, 1 if comment else 0)
+        self.blocks.append(block)
+        self._index_block(block)
+        return True
+
+    def remove_host(self, alias: str) -> bool:
+        """Remove `alias`. Blocks shared with other aliases only lose the alias."""
+        block = self.find(alias)
+        if block is None:
+            return False
+
+        patterns = block.patterns
+        if patterns == [alias]:
+            self.blocks.remove(block)
+        else:
+            remaining = ' '.join(_quote(pattern) for pattern in patterns if pattern != alias)
+            block.lines[block.header_index] = f"Host {remaining}{self.newline}"
+        self._reindex()
+        return True
+
+    def render(self) -> str:
+        """Render the config; unchanged parts round-trip exactly."""
+        return ''.join(self.preamble) + ''.join(''.join(block.lines) for block in self.blocks)
+
+    def save(self, path: Path) -> None:
+        """Write atomically: temp file in the same directory, fsync, rename.
+
+        A symlinked config (common with dotfile managers) is written through
+        to its target rather than replaced by a regular file.
+        """
+        atomic_write(path, self.render())
+
+def update_ssh_config_file(path: Path, mutate: Callable[[SSHConfig], bool]) -> bool:
+    """Load the config at path, apply mutate and save if it reports a change, all under the lock.
+
+    Returns whatever mutate returned.
+    """
+    with locked(path):
+        config = SSHConfig.load(path)
+        if not mutate(config):
+            return False
+        config.save(path)
+        return True
+
+__all__ = ['HostBlock', 'SSHConfig', 'update_ssh_config_file']
@@ -0,0 +1,61 @@
+"""
+Shared fixtures: a throwaway HOME with a profile store, and a way to run gitsw in it.
+
+Commands run as separate processes through the installed entry point, so the
+module-level paths (~/.ssh, the profile store) follow HOME like they do for
+a real user.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ENTRY_POINT = REPO_ROOT / 'gitsw.py'
+
+sys.path.insert(0, str(REPO_ROOT))
+
+class Home:
+    """A HOME directory with its own ~/.ssh, profile store and environment."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.ssh_dir = root / '.ssh'
+        self.ssh_dir.mkdir(mode=0o700)
+        self.env = os.environ.copy()
+        self.env.update({'HOME': str(root), 'USERPROFILE': str(root), 'GIT_CONFIG_NOSYSTEM': '1'})
+        for name in ('GIT_CONFIG_GLOBAL', 'SSH_AUTH_SOCK', 'GITSW_RELEASES_URL', 'PYTHONUNBUFFERED'):
+            self.env.pop(name, None)
+
+    def write_profiles(self, profiles: Dict[str, Dict[str, Any]]) -> None:
+        """Write the JSON profile store, with fresh health so no background test starts."""
+        (self.root / '.git_profiles.json').write_text(json.dumps(profiles, indent=2), encoding='utf-8')
+        health = {username: {'success': True, 'latency': 0.1, 'error': '', 'checked_at': time.time()}
+                  for username in profiles}
+        (self.root / '.git_profiles_health.json').write_text(json.dumps(health), encoding='utf-8')
+
+    def prepend_path(self, directory: Path) -> None:
+        """Put directory first on PATH, so its stubs shadow the real tools."""
+        self.env['PATH'] = f"{directory}{os.pathsep}{self.env.get('PATH', '')}"
+
+    def command(self, *argv: str) -> List[str]:
+        """The command line that runs gitsw with argv."""
+        return [sys.executable, str(ENTRY_POINT)] + list(argv)
+
+    def run(self, *argv: str, timeout: float = 60) -> subprocess.CompletedProcess:
+        """Run gitsw with argv and capture its output."""
+        return subprocess.run(self.command(*argv), env=self.env, cwd=str(self.root),
+                              capture_output=True, text=True, stdin=subprocess.DEVNULL, timeout=timeout)
+
+@pytest.fixture
+def home(tmp_path: Path) -> Home:
+    """A fresh HOME for one test."""
+    root = tmp_path / 'home'
+    root.mkdir()
+    return Home(root)
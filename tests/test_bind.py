@@ -0,0 +1,50 @@
+"""
+`bind` writes its includeIf rules into the file `git config --global` uses.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+def git_config(home, *argv: str, cwd=None) -> str:
+    result = subprocess.run(['git', 'config'] + list(argv), env=home.env, cwd=str(cwd or home.root),
+                            capture_output=True, text=True)
+    return result.stdout.strip()
+
+@pytest.fixture
+def alice(home):
+    home.write_profiles({'alice': {'name': 'Alice', 'email': 'alice@example.com',
+                                   'ssh_key': str(home.ssh_dir / 'id_ed25519_alice')}})
+    work = home.root / 'work' / 'repo'
+    work.mkdir(parents=True)
+    subprocess.run(['git', 'init', '-q', str(work)], env=home.env, check=True)
+    return work
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='symlinks need privileges on Windows')
+def test_bind_keeps_a_symlinked_global_config(home, alice):
+    dotfiles = home.root / 'dotfiles' / 'gitconfig'
+    dotfiles.parent.mkdir()
+    dotfiles.write_text('[core]\n\teditor = vi\n', encoding='utf-8')
+    link = home.root / '.gitconfig'
+    link.symlink_to(dotfiles)
+
+    result = home.run('bind', 'alice', str(alice.parent))
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert link.is_symlink() and os.readlink(link) == str(dotfiles)
+    assert 'includeIf' in dotfiles.read_text(encoding='utf-8')
+    assert git_config(home, 'user.email', cwd=alice) == 'alice@example.com'
+
+def test_bind_writes_the_xdg_config_when_it_is_the_only_one(home, alice):
+    xdg = home.root / '.config' / 'git' / 'config'
+    xdg.parent.mkdir(parents=True)
+    xdg.write_text('[core]\n\teditor = vi\n', encoding='utf-8')
+
+    result = home.run('bind', 'alice', str(alice.parent))
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert not (home.root / '.gitconfig').exists()
+    assert 'includeIf' in xdg.read_text(encoding='utf-8')
+    assert git_config(home, 'user.email', cwd=alice) == 'alice@example.com'
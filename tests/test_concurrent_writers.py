@@ -0,0 +1,20 @@
+"""
+Concurrent writers lose nothing: a small run of benchmarks/stress_writers.py.
+
+Each worker is a separate process writing the profile store, ~/.ssh/config and
+the usage file, plus a shared counter guarded by ConflictError retries.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'benchmarks'))
+
+import stress_writers  # noqa: E402
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def test_concurrent_writers_lose_nothing(backend):
+    result = stress_writers.stress(backend, workers=6, iterations=4)
+    assert result['problems'] == []
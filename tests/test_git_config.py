@@ -0,0 +1,223 @@
+"""
+GitConfigFile reads values the way git does and rewrites only the lines it changes;
+linked worktrees resolve to their own git directory and the shared config.
+"""
+
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from git_config import (
+    ConfigLockedError, GitConfigFile, common_dir, find_git_dir, local_config_paths, update_config_file,
+)
+
+needs_git = pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+
+CONFIG = """\
+# Repository settings
+[core]
+\trepositoryformatversion = 0
+\tbare = false ; trailing comment
+\tfilemode
+[remote "origin"]
+\turl = git@github.com-alice:alice/repo.git
+\tfetch = +refs/heads/*:refs/remotes/origin/*
+[user] name = Alice Example
+\temail = "alice@example.com" # work
+[alias]
+\tlg = log --graph \\
+\t\t--oneline
+[remote "origin"]
+\tpushurl = git@github.com-alice:alice/repo.git
+"""
+
+def git_get(path: Path, key: str) -> str:
+    result = subprocess.run(['git', 'config', '-f', str(path), '--get', key],
+                            capture_output=True, text=True, check=True)
+    return result.stdout.rstrip('\n')
+
+def test_render_round_trips_exactly():
+    assert GitConfigFile(CONFIG).render() == CONFIG
+    assert GitConfigFile(CONFIG.replace('\n', '\r\n')).render() == CONFIG.replace('\n', '\r\n')
+
+def test_get_decodes_values():
+    config = GitConfigFile(CONFIG)
+    assert config.get('core', None, 'bare') == 'false'
+    assert config.get('CORE', None, 'FileMode') == 'true'
+    assert config.get('user', None, 'email') == 'alice@example.com'
+    assert config.get('remote', 'origin', 'pushurl') == 'git@github.com-alice:alice/repo.git'
+    assert config.get('remote', 'Origin', 'url') is None
+    assert config.get_all('remote', 'origin', 'fetch') == ['+refs/heads/*:refs/remotes/origin/*']
+    assert config.subsections('remote') == ['origin']
+
+def test_key_on_the_header_line():
+    config = GitConfigFile(CONFIG)
+    assert config.get('user', None, 'name') == 'Alice Example'
+
+    assert config.set('user', None, 'name', 'Alice B. Example')
+    assert '[user] name = Alice B. Example\n' in config.render()
+    assert config.get('user', None, 'name') == 'Alice B. Example'
+    assert config.get('user', None, 'email') == 'alice@example.com'
+
+def test_continued_value_is_joined_and_collapsed_on_set():
+    config = GitConfigFile(CONFIG)
+    assert config.get('alias', None, 'lg') == 'log --graph   --oneline'
+
+    assert config.set('alias', None, 'lg', 'log --oneline')
+    assert '\tlg = log --oneline\n[remote "origin"]\n' in config.render()
+    assert '--graph' not in config.render()
+
+@needs_git
+def test_values_match_git(tmp_path):
+    path = tmp_path / 'config'
+    path.write_text(CONFIG, encoding='utf-8')
+    config = GitConfigFile.read(path)
+    for section, subsection, key in [('core', None, 'bare'), ('user', None, 'name'), ('user', None, 'email'),
+                                     ('alias', None, 'lg'), ('remote', 'origin', 'url')]:
+        dotted = '.'.join(part for part in (section, subsection, key) if part is not None)
+        assert config.get(section, subsection, key) == git_get(path, dotted)
+
+def test_set_rewrites_only_the_changed_line():
+    config = GitConfigFile(CONFIG)
+    assert not config.set('core', None, 'bare', 'false')
+    assert config.set('core', None, 'bare', 'true')
+
+    before, after = CONFIG.splitlines(), config.render().splitlines()
+    changed = [(old, new) for old, new in zip(before, after) if old != new]
+    assert changed == [('\tbare = false ; trailing comment', '\tbare = true')]
+
+def test_bare_key_is_rewritten_to_an_explicit_true():
+    config = GitConfigFile(CONFIG)
+    assert config.set('core', None, 'filemode', 'true')
+    assert '\tfilemode = true\n' in config.render()
+
+def test_set_appends_to_the_last_block_or_a_new_section():
+    config = GitConfigFile(CONFIG)
+    assert config.set('remote', 'origin', 'tagopt', '--no-tags')
+    assert config.render().endswith('\tpushurl = git@github.com-alice:alice/repo.git\n\ttagopt = --no-tags\n')
+
+    assert config.set('branch', 'we"ird\\name', 'remote', 'origin')
+    assert config.render().endswith('[branch "we\\"ird\\\\name"]\n\tremote = origin\n')
+    assert config.get('branch', 'we"ird\\name', 'remote') == 'origin'
+
+def test_set_on_an_unterminated_last_line():
+    config = GitConfigFile('[core]\n\tbare = false')
+    assert config.set('core', None, 'editor', 'vi')
+    assert config.render() == '[core]\n\tbare = false\n\teditor = vi\n'
+
+def test_set_quotes_values_git_would_misread():
+    config = GitConfigFile('')
+    config.set('user', None, 'name', ' Alice; "AE" ')
+    assert config.render() == '[user]\n\tname = " Alice; \\"AE\\" "\n'
+    assert config.get('user', None, 'name') == ' Alice; "AE" '
+
+def test_remove_and_append_section():
+    config = GitConfigFile(CONFIG)
+    assert config.remove_section('remote', 'origin')
+    assert not config.remove_section('remote', 'origin')
+    assert 'origin' not in config.render()
+    assert config.get('alias', None, 'lg') == 'log --graph   --oneline'
+
+    config.append_section('remote', 'upstream', [('url', 'https://example.com/r.git')])
+    assert config.render().endswith('[remote "upstream"]\n\turl = https://example.com/r.git\n')
+    assert config.has_section('remote')
+    assert config.get('remote', 'upstream', 'url') == 'https://example.com/r.git'
+
+def test_crlf_is_kept_for_new_lines():
+    config = GitConfigFile('[core]\r\n\tbare = false\r\n')
+    config.set('core', None, 'editor', 'vi')
+    config.append_section('user', None, [('name', 'Alice')])
+    assert config.render() == '[core]\r\n\tbare = false\r\n\teditor = vi\r\n[user]\r\n\tname = Alice\r\n'
+
+@needs_git
+def test_edits_read_back_through_git(tmp_path):
+    path = tmp_path / 'config'
+    path.write_text(CONFIG, encoding='utf-8')
+    assert update_config_file(path, lambda config: config.set('user', None, 'email', 'a#b@example.com'))
+    assert update_config_file(path, lambda config: config.set('alias', None, 'lg', 'log -1'))
+    assert git_get(path, 'user.email') == 'a#b@example.com'
+    assert git_get(path, 'user.name') == 'Alice Example'
+    assert git_get(path, 'alias.lg') == 'log -1'
+    assert git_get(path, 'remote.origin.pushurl') == 'git@github.com-alice:alice/repo.git'
+
+def test_update_config_file_locking(tmp_path):
+    path = tmp_path / 'config'
+    path.write_text(CONFIG, encoding='utf-8')
+    mtime = path.stat().st_mtime_ns
+
+    assert not update_config_file(path, lambda config: config.set('core', None, 'bare', 'false'))
+    assert path.stat().st_mtime_ns == mtime
+    assert update_config_file(path, lambda config: config.set('core', None, 'bare', 'true'), dry_run=True)
+    assert path.read_text(encoding='utf-8') == CONFIG
+
+    lock = tmp_path / 'config.lock'
+    lock.write_text('', encoding='utf-8')
+    with pytest.raises(ConfigLockedError):
+        update_config_file(path, lambda config: config.set('core', None, 'bare', 'true'))
+    assert lock.exists()
+    lock.unlink()
+
+    with pytest.raises(RuntimeError):
+        update_config_file(path, lambda config: (_ for _ in ()).throw(RuntimeError('boom')))
+    assert not lock.exists()
+    assert path.read_text(encoding='utf-8') == CONFIG
+
+def make_worktree(tmp_path: Path):
+    """Lay out a main repository and a linked worktree the way `git worktree add` does."""
+    main = tmp_path / 'main'
+    (main / '.git' / 'worktrees' / 'wt').mkdir(parents=True)
+    (main / '.git' / 'config').write_text('[core]\n\tbare = false\n[user]\n\temail = shared@example.com\n',
+                                          encoding='utf-8')
+    private = main / '.git' / 'worktrees' / 'wt'
+    (private / 'commondir').write_text('../..\n', encoding='utf-8')
+    worktree = tmp_path / 'wt'
+    (worktree / 'src').mkdir(parents=True)
+    (worktree / '.git').write_text(f'gitdir: {private}\n', encoding='utf-8')
+    return main, worktree, private
+
+def test_linked_worktree_resolves_its_git_dir_and_shared_config(tmp_path):
+    main, worktree, private = make_worktree(tmp_path)
+
+    assert find_git_dir(main / 'anything') == main / '.git'
+    assert find_git_dir(worktree / 'src') == private
+    assert os.path.samefile(common_dir(private), main / '.git')
+    assert common_dir(main / '.git') == main / '.git'
+
+    paths = local_config_paths(private)
+    assert len(paths) == 1 and os.path.samefile(paths[0], main / '.git' / 'config')
+
+def test_worktree_config_is_read_last_with_the_extension(tmp_path):
+    main, worktree, private = make_worktree(tmp_path)
+    update_config_file(main / '.git' / 'config', lambda config: config.set('extensions', None, 'worktreeConfig', 'true'))
+
+    paths = local_config_paths(find_git_dir(worktree))
+    assert paths[-1] == private / 'config.worktree'
+    assert os.path.samefile(paths[0], main / '.git' / 'config')
+
+def test_relative_gitdir_file(tmp_path):
+    main, worktree, private = make_worktree(tmp_path)
+    (worktree / '.git').write_text('gitdir: ../main/.git/worktrees/wt\n', encoding='utf-8')
+    assert os.path.samefile(find_git_dir(worktree), private)
+
+@needs_git
+def test_matches_git_worktree_add(tmp_path):
+    env = dict(os.environ, GIT_CONFIG_NOSYSTEM='1', HOME=str(tmp_path),
+               GIT_AUTHOR_NAME='A', GIT_AUTHOR_EMAIL='a@example.com',
+               GIT_COMMITTER_NAME='A', GIT_COMMITTER_EMAIL='a@example.com')
+    env.pop('GIT_CONFIG_GLOBAL', None)
+    main = tmp_path / 'main'
+    subprocess.run(['git', 'init', '-q', str(main)], env=env, check=True)
+    subprocess.run(['git', 'commit', '-q', '--allow-empty', '-m', 'init'], cwd=str(main), env=env, check=True)
+    subprocess.run(['git', 'worktree', 'add', '-q', str(tmp_path / 'wt')], cwd=str(main), env=env, check=True)
+
+    def rev_parse(*flags: str) -> Path:
+        result = subprocess.run(['git', 'rev-parse', *flags], cwd=str(tmp_path / 'wt'), env=env,
+                                capture_output=True, text=True, check=True)
+        return Path(result.stdout.strip())
+
+    git_dir = find_git_dir(tmp_path / 'wt')
+    assert os.path.samefile(git_dir, rev_parse('--absolute-git-dir'))
+    assert os.path.samefile(common_dir(git_dir), (tmp_path / 'wt') / rev_parse('--git-common-dir'))
@@ -0,0 +1,63 @@
+"""
+Identity lookups answered from the store's indexes, exact and partial.
+"""
+
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from git_profile_manager import GitProfileManager, IdentityMatch
+from profile_store import ProfileStore, SQLiteProfileStore
+
+PROFILES = {
+    'work': {'name': 'Alice', 'email': 'alice@corp.example'},
+    'home': {'name': 'Alice', 'email': 'alice@home.example'},
+    'oss': {'name': 'Al', 'email': 'alice@home.example'},
+}
+
+@pytest.fixture(params=['json', 'sqlite'])
+def store(request, tmp_path: Path):
+    store = (ProfileStore(tmp_path / 'profiles.json') if request.param == 'json'
+             else SQLiteProfileStore(tmp_path / 'profiles.db'))
+    store.save(dict(PROFILES))
+    return store
+
+@pytest.fixture
+def manager(store) -> GitProfileManager:
+    manager = GitProfileManager(setup_environment=False)
+    manager.store = store
+    return manager
+
+def test_store_indexes(store):
+    assert store.find_identity('Alice', 'alice@home.example') == ['home']
+    assert store.find_identity('Al', 'alice@corp.example') == []
+    assert store.find_email('alice@home.example') == ['home', 'oss']
+    assert store.find_name('Alice') == ['work', 'home']
+    assert store.find_name('Bob') == []
+
+def test_indexes_follow_changes_made_by_another_process(store):
+    assert store.find_name('Bob') == []
+    other = type(store)(store.path)
+    other.save({**other.load(), 'bob': {'name': 'Bob', 'email': 'bob@example.com'}})
+
+    assert store.find_name('Bob') == ['bob']
+    assert store.find_email('bob@example.com') == ['bob']
+
+def test_match_prefers_exact_then_email_then_name(manager):
+    assert manager.match_identity('Al', 'alice@home.example') == IdentityMatch('oss', 'identity')
+    assert manager.match_identity('Alice Smith', 'alice@home.example') == IdentityMatch('home', 'email')
+    assert manager.match_identity('Alice', 'alice@new.example') == IdentityMatch('work', 'name')
+    assert manager.match_identity('Bob', 'bob@example.com') is None
+    assert manager.match_identity('', '') is None
+
+def test_current_names_the_closest_profile(home):
+    home.write_profiles({'work': {'name': 'Alice', 'email': 'alice@corp.example',
+                                  'ssh_key': str(home.ssh_dir / 'id_ed25519_work')}})
+    for key, value in (('user.name', 'Alice Smith'), ('user.email', 'alice@corp.example')):
+        subprocess.run(['git', 'config', '--global', key, value], env=home.env, check=True)
+
+    result = home.run('current')
+
+    assert result.returncode == 1
+    assert "closest is 'work' (same email, different name)" in result.stdout
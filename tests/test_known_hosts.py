@@ -0,0 +1,96 @@
+"""
+known_hosts matching: patterns, hashed names, markers and mismatches.
+"""
+
+import base64
+import hashlib
+import hmac
+import sys
+from pathlib import Path
+
+import pytest
+
+from known_hosts import (
+    GITHUB_HOST_KEYS, HOST_KNOWN, HOST_MISMATCH, HOST_MISSING, HOST_REVOKED, check_host, format_entries,
+    host_matches,
+)
+
+ED25519 = GITHUB_HOST_KEYS[0]
+OTHER_KEY = ('ssh-ed25519', 'AAAAC3NzaC1lZDI1NTE5AAAAIE2pwB7dQ4nVExGfR9xjhtyE8uOMXM2jvZFIK4XzIP4N')
+
+def hashed(name: str, salt: bytes = b'0123456789abcdefghij') -> str:
+    """A HashKnownHosts host field for name, as ssh-keygen -H writes it."""
+    digest = hmac.new(salt, name.encode(), hashlib.sha1).digest()
+    return f"|1|{base64.b64encode(salt).decode()}|{base64.b64encode(digest).decode()}"
+
+def write(tmp_path: Path, *lines: str) -> Path:
+    path = tmp_path / 'known_hosts'
+    path.write_text(''.join(f'{line}\n' for line in lines), encoding='utf-8')
+    return path
+
+@pytest.mark.parametrize('hosts, hostname, port, expected', [
+    ('github.com', 'github.com', 22, True),
+    ('GitHub.com,140.82.112.3', 'github.com', 22, True),
+    ('github.com', 'github.com', 2222, False),
+    ('[github.com]:2222', 'github.com', 2222, True),
+    ('*.github.com', 'ssh.github.com', 22, True),
+    ('*.github.com', 'github.com', 22, False),
+    ('git?ub.com', 'github.com', 22, True),
+    ('*.com,!github.com', 'github.com', 22, False),
+    ('github.com.evil', 'github.com', 22, False),
+])
+def test_host_patterns(hosts, hostname, port, expected):
+    assert host_matches(hosts, hostname, port) is expected
+
+def test_hashed_entries():
+    assert host_matches(hashed('github.com'), 'github.com')
+    assert host_matches(hashed('[github.com]:2222'), 'github.com', 2222)
+    assert not host_matches(hashed('github.com'), 'gitlab.com')
+    assert not host_matches('|1|not-base64|x', 'github.com')
+
+def test_missing_file_and_unlisted_host(tmp_path):
+    assert check_host(tmp_path / 'absent', 'github.com', GITHUB_HOST_KEYS) == HOST_MISSING
+    path = write(tmp_path, '# comment', 'gitlab.com ssh-ed25519 AAAAkey')
+    assert check_host(path, 'github.com', GITHUB_HOST_KEYS) == HOST_MISSING
+
+def test_pinned_entries_are_known(tmp_path):
+    path = write(tmp_path, *[line.strip() for line in format_entries('github.com', GITHUB_HOST_KEYS)])
+    assert check_host(path, 'github.com', GITHUB_HOST_KEYS) == HOST_KNOWN
+
+def test_hashed_pinned_key_is_known(tmp_path):
+    path = write(tmp_path, f'{hashed("github.com")} {ED25519[0]} {ED25519[1]}')
+    assert check_host(path, 'github.com', GITHUB_HOST_KEYS) == HOST_KNOWN
+
+def test_other_key_is_a_mismatch(tmp_path):
+    path = write(tmp_path, f'github.com {OTHER_KEY[0]} {OTHER_KEY[1]}')
+    assert check_host(path, 'github.com', GITHUB_HOST_KEYS) == HOST_MISMATCH
+
+def test_hashed_other_key_is_a_mismatch(tmp_path):
+    path = write(tmp_path, f'{hashed("github.com")} {OTHER_KEY[0]} {OTHER_KEY[1]}')
+    assert check_host(path, 'github.com', GITHUB_HOST_KEYS) == HOST_MISMATCH
+
+def test_revoked_key_wins(tmp_path):
+    path = write(tmp_path, f'github.com {ED25519[0]} {ED25519[1]}', f'@revoked * {ED25519[0]} {ED25519[1]}')
+    assert check_host(path, 'github.com', GITHUB_HOST_KEYS) == HOST_REVOKED
+
+def test_cert_authority_does_not_vouch_for_a_key(tmp_path):
+    path = write(tmp_path, f'@cert-authority *.com {ED25519[0]} {ED25519[1]}',
+                 f'@cert-authority github.com {OTHER_KEY[0]} {OTHER_KEY[1]}')
+    assert check_host(path, 'github.com', GITHUB_HOST_KEYS) == HOST_MISSING
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='the stub ssh is a POSIX script')
+def test_mismatch_is_reported_not_appended_to(home):
+    known_hosts = home.ssh_dir / 'known_hosts'
+    known_hosts.write_text(f'github.com {OTHER_KEY[0]} {OTHER_KEY[1]}\n', encoding='utf-8')
+    home.write_profiles({'alice': {'name': 'Alice', 'email': 'alice@example.com',
+                                   'ssh_key': str(home.ssh_dir / 'id_ed25519_alice')}})
+    stub = home.root / 'bin'
+    stub.mkdir()
+    (stub / 'ssh').write_text('#!/bin/sh\nexit 255\n', encoding='utf-8')
+    (stub / 'ssh').chmod(0o755)
+    home.prepend_path(stub)
+
+    result = home.run('test', 'all', '--timeout', '5')
+
+    assert 'ssh-keygen -R github.com' in result.stdout
+    assert known_hosts.read_text(encoding='utf-8') == f'github.com {OTHER_KEY[0]} {OTHER_KEY[1]}\n'
@@ -0,0 +1,27 @@
+"""
+build_parser() builds only the subcommand being run, without changing what parses.
+"""
+
+import pytest
+
+from git_profiles import _command_name, build_parser
+
+def test_command_name_skips_options_and_their_values():
+    assert _command_name(['--trace', '--trace-file', 'use', 'list']) == 'list'
+    assert _command_name(['use', 'alice']) == 'use'
+    assert _command_name(['--help']) is None
+    assert _command_name([]) is None
+
+def test_selected_parser_matches_the_full_parser():
+    argv = ['use', 'alice', '--agent', '30m']
+    assert vars(build_parser('use').parse_args(argv)) == vars(build_parser().parse_args(argv))
+
+def test_other_subcommands_are_not_built():
+    with pytest.raises(SystemExit):
+        build_parser('use').parse_args(['list'])
+
+def test_unknown_command_lists_every_command(capsys):
+    with pytest.raises(SystemExit):
+        build_parser('bogus').parse_args(['bogus'])
+    error = capsys.readouterr().err
+    assert "'use'" in error and "'rewrite-remotes'" in error
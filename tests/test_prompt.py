@@ -0,0 +1,88 @@
+"""
+The prompt shows the profile git commits as in the current directory: the global
+identity, an includeIf binding, or a repository-local user.name/user.email.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+def git(home, *argv: str, cwd) -> None:
+    subprocess.run(['git'] + list(argv), env=home.env, cwd=str(cwd), check=True, capture_output=True)
+
+def prompt(home, cwd) -> str:
+    result = subprocess.run(home.command('prompt'), env=home.env, cwd=str(cwd),
+                            capture_output=True, text=True, stdin=subprocess.DEVNULL, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip()
+
+def ps1(home, cwd) -> str:
+    """Render __gitsw_ps1 in cwd; its fallback is a stub that prints `fallback`."""
+    init = subprocess.run(home.command('prompt', '--shell-init'), env=home.env,
+                          capture_output=True, text=True, check=True).stdout
+    result = subprocess.run(['sh', '-c', init + '__gitsw_ps1'], env=home.env, cwd=str(cwd),
+                            capture_output=True, text=True, check=True)
+    return result.stdout
+
+@pytest.fixture
+def repo(home):
+    home.write_profiles({
+        'alice': {'name': 'Alice', 'email': 'alice@example.com', 'ssh_key': str(home.ssh_dir / 'id_ed25519_alice')},
+        'bob': {'name': 'Bob', 'email': 'bob@example.com', 'ssh_key': str(home.ssh_dir / 'id_ed25519_bob')},
+    })
+    (home.root / '.gitconfig').write_text('[user]\n\tname = Alice\n\temail = alice@example.com\n', encoding='utf-8')
+    stubs = home.root / 'bin'
+    stubs.mkdir()
+    (stubs / 'gitsw').write_text('#!/bin/sh\nprintf fallback\n', encoding='utf-8')
+    (stubs / 'gitsw').chmod(0o755)
+    home.prepend_path(stubs)
+
+    work = home.root / 'work' / 'repo'
+    (work / 'src').mkdir(parents=True)
+    git(home, 'init', '-q', '.', cwd=work)
+    return work
+
+def test_outside_a_repository_the_global_identity_is_shown(home, repo):
+    assert prompt(home, home.root) == 'alice'
+    assert (home.root / '.git_profiles_state').exists()
+    assert ps1(home, home.root) == 'alice'
+
+def test_a_bound_directory_shows_its_profile(home, repo):
+    result = home.run('bind', 'bob', str(repo.parent))
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    assert prompt(home, repo / 'src') == 'bob'
+    assert (repo / '.git' / 'gitsw-prompt').exists()
+    assert prompt(home, home.root) == 'alice'
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='the shell function is POSIX sh')
+def test_repository_local_identity_is_shown_and_tracked(home, repo):
+    git(home, 'config', 'user.name', 'Bob', cwd=repo)
+    git(home, 'config', 'user.email', 'bob@example.com', cwd=repo)
+    assert prompt(home, repo) == 'bob'
+    # Fresh: served by the shell function without running gitsw
+    assert ps1(home, repo / 'src') == 'bob'
+    assert ps1(home, home.root) == 'fallback'
+
+    # Editing the repository config makes its state stale
+    git(home, 'config', '--unset', 'user.name', cwd=repo)
+    git(home, 'config', '--unset', 'user.email', cwd=repo)
+    state = repo / '.git' / 'gitsw-prompt'
+    os.utime(state, (0, 0))
+    assert ps1(home, repo) == 'fallback'
+    assert prompt(home, repo) == 'alice'
+    assert ps1(home, repo) == 'alice'
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='the shell function is POSIX sh')
+def test_linked_worktree_asks_gitsw(home, repo):
+    git(home, '-c', 'user.name=A', '-c', 'user.email=a@example.com', 'commit', '-q', '--allow-empty', '-m', 'init',
+        cwd=repo)
+    worktree = home.root / 'work' / 'wt'
+    git(home, 'worktree', 'add', '-q', str(worktree), cwd=repo)
+    git(home, 'config', 'user.email', 'bob@example.com', cwd=worktree)
+    git(home, 'config', 'user.name', 'Bob', cwd=worktree)
+
+    assert prompt(home, worktree) == 'bob'
+    assert ps1(home, worktree) == 'fallback'
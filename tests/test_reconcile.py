@@ -0,0 +1,97 @@
+"""
+`reconcile` reports and repairs drift, and only ever deletes keys gitsw generated.
+"""
+
+import json
+import re
+import shutil
+import subprocess
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not shutil.which('ssh-keygen'), reason='needs ssh-keygen')
+
+ANSI = re.compile(r'\033\[[0-9;]*m')
+
+def reported(result: subprocess.CompletedProcess) -> dict:
+    """{subject: kind} for every drift line reconcile printed."""
+    drift = {}
+    for line in ANSI.sub('', result.stdout).splitlines():
+        fields = line.split()
+        if fields and fields[0] in ('missing-key', 'missing-host', 'orphan-host', 'orphan-key'):
+            drift[fields[1]] = fields[0]
+    return drift
+
+def drop_profile(home, username: str) -> None:
+    """Delete a profile from the store behind gitsw's back."""
+    store = home.root / '.git_profiles.json'
+    profiles = json.loads(store.read_text(encoding='utf-8'))
+    del profiles[username]
+    store.write_text(json.dumps(profiles), encoding='utf-8')
+
+@pytest.fixture
+def keys(home):
+    """Profiles alice and bob made by gitsw, next to keys the user made by hand."""
+    for username in ('alice', 'bob'):
+        result = home.run('add', username, f'{username}@example.com')
+        assert result.returncode == 0, result.stdout + result.stderr
+    subprocess.run(['ssh-keygen', '-q', '-t', 'rsa', '-b', '2048', '-N', '', '-C', 'me@laptop',
+                    '-f', str(home.ssh_dir / 'id_rsa_personal')], check=True)
+    # OpenSSH's default FIDO key names are never gitsw's, whatever their comment says
+    for name in ('id_ed25519_sk', 'id_ecdsa_sk'):
+        (home.ssh_dir / name).write_text('private\n', encoding='utf-8')
+        (home.ssh_dir / f'{name}.pub').write_text('sk-ssh-ed25519@openssh.com AAAA gitsw:sk\n', encoding='utf-8')
+    return home.ssh_dir
+
+def test_clean_tree_reports_nothing(home, keys):
+    result = home.run('reconcile', '--dry-run')
+
+    assert result.returncode == 0
+    assert reported(result) == {}
+
+def test_dry_run_lists_only_gitsw_keys(home, keys):
+    drop_profile(home, 'bob')
+
+    result = home.run('reconcile', '--dry-run')
+
+    assert result.returncode == 1
+    assert reported(result) == {'github.com-bob': 'orphan-host', str(keys / 'id_ed25519_bob'): 'orphan-key'}
+    assert (keys / 'id_ed25519_bob').exists()
+
+def test_only_orphan_keys_left_exits_zero(home, keys):
+    drop_profile(home, 'bob')
+    assert home.run('reconcile', '--yes').returncode == 0
+
+    result = home.run('reconcile', '--dry-run')
+
+    assert result.returncode == 0
+    assert reported(result) == {str(keys / 'id_ed25519_bob'): 'orphan-key'}
+    assert home.run('reconcile', '--yes').returncode == 0
+    assert (keys / 'id_ed25519_bob').exists()
+
+def test_prune_keys_deletes_only_orphaned_gitsw_keys(home, keys):
+    drop_profile(home, 'bob')
+
+    result = home.run('reconcile', '--prune-keys', '--yes')
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert sorted(path.name for path in keys.iterdir() if path.name.startswith('id_')) == [
+        'id_ecdsa_sk', 'id_ecdsa_sk.pub', 'id_ed25519_alice', 'id_ed25519_alice.pub',
+        'id_ed25519_sk', 'id_ed25519_sk.pub', 'id_rsa_personal', 'id_rsa_personal.pub',
+    ]
+    assert 'github.com-bob' not in (keys / 'config').read_text(encoding='utf-8')
+    assert home.run('reconcile', '--dry-run').returncode == 0
+
+def test_missing_key_removes_profile_public_key_and_active_identity(home, keys):
+    assert home.run('use', 'alice').returncode == 0
+    (keys / 'id_ed25519_alice').unlink()
+
+    result = home.run('reconcile', '--yes')
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert reported(result) == {'alice': 'missing-key'}
+    assert not (keys / 'id_ed25519_alice.pub').exists()
+    assert 'alice' not in json.loads((home.root / '.git_profiles.json').read_text(encoding='utf-8'))
+    identity = subprocess.run(['git', 'config', '--global', 'user.email'], env=home.env,
+                              capture_output=True, text=True)
+    assert identity.stdout.strip() == ''
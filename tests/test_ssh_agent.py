@@ -0,0 +1,79 @@
+"""
+`use --agent` against a real ssh-agent started for the test.
+"""
+
+import os
+import re
+import shutil
+import signal
+import subprocess
+import time
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+
+from ssh_agent import public_key_fingerprint
+
+pytestmark = pytest.mark.skipif(
+    os.name == 'nt' or not all(shutil.which(tool) for tool in ('ssh-agent', 'ssh-add', 'ssh-keygen')),
+    reason='needs OpenSSH ssh-agent, ssh-add and ssh-keygen'
+)
+
+@pytest.fixture
+def agent(home, tmp_path: Path) -> Iterator[str]:
+    """An ssh-agent on a private socket, exported to gitsw as the session's agent."""
+    socket = tmp_path / 'agent.sock'
+    result = subprocess.run(['ssh-agent', '-s', '-a', str(socket)], capture_output=True, text=True, check=True)
+    pid = int(re.search(r'SSH_AGENT_PID=(\d+)', result.stdout).group(1))
+    home.env['SSH_AUTH_SOCK'] = str(socket)
+    try:
+        yield str(socket)
+    finally:
+        os.kill(pid, signal.SIGTERM)
+
+@pytest.fixture
+def alice(home) -> Path:
+    """A profile with a fresh passphrase-less key."""
+    key_file = home.ssh_dir / 'id_ed25519_alice'
+    subprocess.run(['ssh-keygen', '-q', '-t', 'ed25519', '-N', '', '-C', 'alice@example.com', '-f', str(key_file)],
+                   check=True)
+    home.write_profiles({'alice': {'name': 'Alice', 'email': 'alice@example.com', 'ssh_key': str(key_file)}})
+    return key_file
+
+def loaded(socket: str) -> List[str]:
+    """Fingerprints the agent holds, as `ssh-add -l` lists them."""
+    result = subprocess.run(['ssh-add', '-l', '-E', 'sha256'], env={**os.environ, 'SSH_AUTH_SOCK': socket},
+                            capture_output=True, text=True)
+    return [line.split()[1] for line in result.stdout.splitlines()] if result.returncode == 0 else []
+
+def test_fingerprint_matches_ssh_keygen(alice):
+    output = subprocess.run(['ssh-keygen', '-l', '-E', 'sha256', '-f', f'{alice}.pub'],
+                            capture_output=True, text=True, check=True).stdout
+    assert public_key_fingerprint(Path(f'{alice}.pub')) == output.split()[1]
+
+def test_loaded_key_is_not_added_twice(home, agent, alice):
+    first = home.run('use', 'alice', '--agent', '1h')
+    assert first.returncode == 0, first.stdout + first.stderr
+    assert "Loaded key for 'alice'" in first.stdout
+
+    second = home.run('use', 'alice', '--agent', '1h')
+    assert second.returncode == 0, second.stdout + second.stderr
+    assert "already in ssh-agent" in second.stdout
+    assert loaded(agent) == [public_key_fingerprint(Path(f'{alice}.pub'))]
+
+def test_key_expires_after_lifetime(home, agent, alice):
+    result = home.run('use', 'alice', '--agent', '2')
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert loaded(agent)
+
+    deadline = time.monotonic() + 15
+    while loaded(agent) and time.monotonic() < deadline:
+        time.sleep(0.5)
+    assert loaded(agent) == []
+
+def test_invalid_lifetime_is_rejected(home, agent, alice):
+    result = home.run('use', 'alice', '--agent', 'soon')
+    assert result.returncode == 1
+    assert "Invalid agent lifetime" in result.stdout + result.stderr
+    assert loaded(agent) == []
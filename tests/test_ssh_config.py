@@ -0,0 +1,116 @@
+"""
+SSHConfig round-trips files it doesn't change and removes only the alias asked for.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from ssh_config import SSHConfig, update_ssh_config_file
+
+CONFIG = """\
+# Personal settings
+Include ~/.ssh/config.d/*
+AddKeysToAgent yes
+
+Host github.com-foo
+    HostName github.com
+    User git
+    IdentityFile ~/.ssh/id_ed25519_foo
+
+# Git profile: foobar
+Host github.com-foobar
+\tHostName=github.com
+\tIdentityFile "~/.ssh/my keys/id_ed25519_foobar"
+
+Match host *.corp exec "test -f ~/.vpn"
+    ProxyJump bastion
+    Include corp.conf
+
+Host bastion github.com-foo-mirror github.com-foo
+    User admin
+
+Host *
+    ServerAliveInterval 60"""
+
+def test_parse_and_render_round_trip_exactly():
+    assert SSHConfig.parse(CONFIG).render() == CONFIG
+
+def test_crlf_round_trips_exactly():
+    text = CONFIG.replace('\n', '\r\n')
+    assert SSHConfig.parse(text).render() == text
+
+def test_unchanged_file_is_not_rewritten(tmp_path: Path):
+    path = tmp_path / 'config'
+    path.write_text(CONFIG, encoding='utf-8')
+    before = path.stat()
+
+    assert update_ssh_config_file(path, lambda config: False) is False
+    assert path.stat().st_mtime_ns == before.st_mtime_ns
+    assert path.read_text(encoding='utf-8') == CONFIG
+
+def test_blocks_and_match_sections_are_found():
+    config = SSHConfig.parse(CONFIG)
+
+    assert [block.patterns for block in config.hosts()] == [
+        ['github.com-foo'], ['github.com-foobar'], ['bastion', 'github.com-foo-mirror', 'github.com-foo'], ['*'],
+    ]
+    assert [block.keyword for block in config.blocks] == ['host', 'host', 'match', 'host', 'host']
+    assert config.find('github.com-foobar').get('IdentityFile') == '~/.ssh/my keys/id_ed25519_foobar'
+    # ssh uses the first block that lists an alias
+    assert config.find('github.com-foo').get('User') == 'git'
+
+def test_remove_host_leaves_similar_aliases_alone():
+    config = SSHConfig.parse(CONFIG)
+
+    assert config.remove_host('github.com-foo')
+
+    text = config.render()
+    assert 'IdentityFile ~/.ssh/id_ed25519_foo\n' not in text
+    assert '# Git profile: foobar\nHost github.com-foobar\n' in text
+    # The alias is only dropped from a shared Host line; the block stays
+    assert config.find('github.com-foo').patterns == ['bastion', 'github.com-foo-mirror', 'github.com-foo']
+    assert config.find('github.com-foo-mirror') is not None
+
+def test_remove_alias_from_shared_host_line():
+    config = SSHConfig.parse(CONFIG)
+    config.remove_host('github.com-foo')
+
+    assert config.remove_host('github.com-foo')
+
+    text = config.render()
+    assert 'Host bastion github.com-foo-mirror\n    User admin\n' in text
+    assert config.find('github.com-foo') is None
+    assert config.find('bastion').get('User') == 'admin'
+
+def test_removal_keeps_everything_else_byte_for_byte():
+    config = SSHConfig.parse(CONFIG)
+
+    config.remove_host('github.com-foobar')
+
+    expected = CONFIG.replace("""# Git profile: foobar
+Host github.com-foobar
+\tHostName=github.com
+\tIdentityFile "~/.ssh/my keys/id_ed25519_foobar"
+
+""", '')
+    assert config.render() == expected
+
+def test_remove_unknown_alias_changes_nothing():
+    config = SSHConfig.parse(CONFIG)
+
+    assert not config.remove_host('github.com-fo')
+    assert config.render() == CONFIG
+
+@pytest.mark.parametrize('text', ['', 'Host a\n    User x', '# only a comment\n'])
+def test_set_host_appends_a_separated_block(text):
+    config = SSHConfig.parse(text)
+
+    assert config.set_host('github.com-new', [('HostName', 'github.com'), ('IdentityFile', '/k')],
+                           comment='Git profile: new')
+
+    rendered = config.render()
+    assert rendered.startswith(text)
+    reparsed = SSHConfig.parse(rendered)
+    assert reparsed.find('github.com-new').get('IdentityFile') == '/k'
+    assert reparsed.find('github.com-new').comments == ['# Git profile: new']
@@ -0,0 +1,136 @@
+"""
+`test all` against a stub `ssh` on PATH.
+
+The stub reads the profile from the host alias: `slow*` profiles hang,
+`fail*` profiles are refused and everything else authenticates after a
+short delay. Each call logs its start and end time, so the tests can see
+how many ran at once.
+"""
+
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pytest
+
+STUB_SSH = '''#!{python}
+import os, sys, time
+user = sys.argv[-1].split('github.com-', 1)[-1]
+log = os.path.join({log!r}, user)
+with open(log, 'a') as f:
+    f.write('start %f\\n' % time.time())
+if user.startswith('slow'):
+    time.sleep(30)
+time.sleep({latency})
+with open(log, 'a') as f:
+    f.write('end %f\\n' % time.time())
+if user.startswith('fail'):
+    sys.stderr.write('git@github.com: Permission denied (publickey).\\n')
+    sys.exit(255)
+sys.stderr.write("Hi %s! You've successfully authenticated, but GitHub does not provide shell access.\\n" % user)
+sys.exit(1)
+'''
+
+LATENCY = 0.4
+
+ANSI = re.compile(r'\033\[[0-9;]*m')
+
+@pytest.fixture
+def calls(home, tmp_path: Path) -> Path:
+    """Install the stub ssh; returns the directory it logs each call to."""
+    log_dir = tmp_path / 'calls'
+    log_dir.mkdir()
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    stub = bin_dir / 'ssh'
+    stub.write_text(STUB_SSH.format(python=sys.executable, log=str(log_dir), latency=LATENCY), encoding='utf-8')
+    stub.chmod(0o755)
+    home.prepend_path(bin_dir)
+    return log_dir
+
+def output(text: str) -> str:
+    return ANSI.sub('', text)
+
+def make_profiles(home, usernames: List[str]) -> None:
+    home.write_profiles({username: {'name': username, 'email': f'{username}@example.com',
+                                    'ssh_key': str(home.ssh_dir / f'id_ed25519_{username}')}
+                         for username in usernames})
+
+def intervals(log_dir: Path) -> Dict[str, Tuple[float, float]]:
+    """(start, end) of every stub call that finished."""
+    spans = {}
+    for log in log_dir.iterdir():
+        times = dict(line.split() for line in log.read_text().splitlines())
+        if 'end' in times:
+            spans[log.name] = (float(times['start']), float(times['end']))
+    return spans
+
+def peak_concurrency(spans: Dict[str, Tuple[float, float]]) -> int:
+    events = sorted([(start, 1) for start, _ in spans.values()] + [(end, -1) for _, end in spans.values()])
+    running = peak = 0
+    for _, step in events:
+        running += step
+        peak = max(peak, running)
+    return peak
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='the stub ssh is a POSIX script')
+class TestAll:
+    def test_jobs_limits_concurrency(self, home, calls):
+        usernames = [f'user{i}' for i in range(6)]
+        make_profiles(home, usernames)
+
+        result = home.run('test', 'all', '--jobs', '2', '--timeout', '20', '--deadline', '0')
+
+        assert result.returncode == 0, result.stdout + result.stderr
+        spans = intervals(calls)
+        assert sorted(spans) == usernames
+        assert peak_concurrency(spans) == 2
+
+    def test_deadline_bounds_the_whole_run(self, home, calls):
+        make_profiles(home, ['slow1', 'slow2', 'user1'])
+
+        start = time.monotonic()
+        result = home.run('test', 'all', '--jobs', '1', '--timeout', '20', '--deadline', '1.5')
+        elapsed = time.monotonic() - start
+
+        assert result.returncode == 1
+        assert elapsed < 10
+        summary = output(result.stdout).split('Profile')[-1]
+        assert 'timeout after 1.' in summary
+        # Tests that never got a turn are reported, not run
+        assert summary.count('deadline exceeded') == 2
+        assert sorted(path.name for path in calls.iterdir()) == ['slow1']
+
+    def test_results_stream_before_slow_hosts_finish(self, home, calls):
+        make_profiles(home, ['slow1', 'user1'])
+
+        process = subprocess.Popen(home.command('test', 'all', '--jobs', '2', '--timeout', '3', '--deadline', '0'),
+                                   env=home.env, cwd=str(home.root), stdout=subprocess.PIPE, text=True)
+        start = time.monotonic()
+        first_result = float('inf')
+        try:
+            for line in process.stdout:
+                if 'user1' in line:
+                    first_result = time.monotonic() - start
+                    break
+            process.communicate(timeout=30)
+        finally:
+            process.kill()
+        finished = time.monotonic() - start
+
+        assert first_result < finished - 1.5
+
+    def test_summary_lists_profiles_in_order(self, home, calls):
+        make_profiles(home, ['user2', 'fail1', 'user1'])
+
+        result = home.run('test', 'all', '--jobs', '3', '--timeout', '20', '--deadline', '0')
+
+        assert result.returncode == 1
+        summary = output(result.stdout).split('Profile')[-1].splitlines()
+        rows = [line.split()[:2] for line in summary[1:4]]
+        assert rows == [['user2', 'OK'], ['fail1', 'FAIL'], ['user1', 'OK']]
+        assert 'Permission denied (publickey).' in summary[2]
+        assert '2/3 connections succeeded' in result.stdout
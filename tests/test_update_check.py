@@ -0,0 +1,183 @@
+"""
+UpdateChecker against a local http.server standing in for the GitHub API.
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+
+from update_check import UPDATE_RETRY_TTL, UpdateChecker, UpdateStatus, compare_versions, parse_version
+
+class Releases(ThreadingHTTPServer):
+    """Serves one release with an ETag, answering If-None-Match with 304."""
+
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(('127.0.0.1', 0), ReleaseHandler)
+        self.tag = 'v2.4.0'
+        self.status = 200
+        self.delay = 0.0
+        self.requests: List[dict] = []
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.tag}"'
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}/releases/latest'
+
+class ReleaseHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        server = self.server
+        server.requests.append(dict(self.headers))
+        time.sleep(server.delay)
+        if server.status != 200:
+            self.send_error(server.status)
+            return
+        if self.headers.get('If-None-Match') == server.etag:
+            self.send_response(304)
+            self.send_header('ETag', server.etag)
+            self.end_headers()
+            return
+        body = json.dumps({'tag_name': server.tag, 'html_url': f'https://example.com/{server.tag}'}).encode()
+        self.send_response(200)
+        self.send_header('ETag', server.etag)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+@pytest.fixture
+def releases() -> Iterator[Releases]:
+    server = Releases()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+@pytest.fixture
+def checker(releases: Releases, tmp_path: Path) -> UpdateChecker:
+    return UpdateChecker(tmp_path / 'update.json', '2.3.0', url=releases.url, timeout=1.0)
+
+def test_check_reports_newer_release(checker, releases):
+    status = checker.check()
+
+    assert (status.latest, status.url, status.error) == ('2.4.0', 'https://example.com/v2.4.0', '')
+    assert status.available
+    assert checker.load_cache()['etag'] == releases.etag
+
+def test_unchanged_release_is_revalidated_with_etag(checker, releases):
+    checker.check()
+    status = checker.check(force=True)
+
+    assert releases.requests[0].get('If-None-Match') is None
+    assert releases.requests[1]['If-None-Match'] == releases.etag
+    assert (status.latest, status.error) == ('2.4.0', '')
+
+def test_changed_release_replaces_cached_answer(checker, releases):
+    checker.check()
+    releases.tag = 'v2.5.0'
+
+    status = checker.check(force=True)
+
+    assert status.latest == '2.5.0'
+    assert checker.load_cache()['etag'] == '"v2.5.0"'
+
+def test_fresh_cache_skips_the_network(checker, releases):
+    checker.check()
+    checker.check()
+    assert len(releases.requests) == 1
+
+    # Once the TTL has passed the next check asks again
+    cache = checker.load_cache()
+    cache['checked_at'] -= checker.ttl + 1
+    checker.cache_path.write_text(json.dumps(cache), encoding='utf-8')
+    checker.check()
+    assert len(releases.requests) == 2
+
+def test_failures_are_retried_after_the_retry_ttl(checker, releases):
+    releases.status = 500
+
+    status = checker.check()
+
+    assert status.error == 'HTTP 500'
+    cache = checker.load_cache()
+    assert checker.is_fresh(cache)
+    cache['checked_at'] -= UPDATE_RETRY_TTL + 1
+    assert not checker.is_fresh(cache)
+
+def test_cache_for_another_endpoint_is_ignored(checker, releases):
+    checker.check()
+    other = UpdateChecker(checker.cache_path, '2.3.0', url=releases.url + '?other', timeout=1.0)
+
+    assert other.load_cache() == {}
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='symlinks need privileges on Windows')
+def test_cache_is_replaced_atomically_through_a_symlink(checker, releases, tmp_path):
+    target = tmp_path / 'dotfiles' / 'update.json'
+    target.parent.mkdir()
+    target.write_text('{}', encoding='utf-8')
+    checker.cache_path.symlink_to(target)
+
+    checker.check()
+
+    assert checker.cache_path.is_symlink()
+    assert json.loads(target.read_text(encoding='utf-8'))['latest'] == '2.4.0'
+    assert [path.name for path in tmp_path.rglob('*.tmp')] == []
+
+def test_slow_server_times_out(checker, releases):
+    releases.delay = 3.0
+
+    start = time.monotonic()
+    status = checker.check()
+
+    assert time.monotonic() - start < 2.5
+    assert 'timed out' in status.error
+    assert status.latest == ''
+
+def test_wait_returns_before_a_slow_check_finishes(checker, releases):
+    releases.delay = 3.0
+    checker.start()
+
+    start = time.monotonic()
+    status = checker.wait(0.2)
+
+    assert time.monotonic() - start < 1.0
+    assert status.error == 'no answer within 0.2s'
+
+@pytest.mark.parametrize('older, newer', [
+    ('2.3.0', '2.4.0'),
+    ('2.9.9', '2.10.0'),
+    ('v1.2', '1.2.1'),
+    ('1.0.0-alpha', '1.0.0'),
+    ('1.0.0-alpha', '1.0.0-alpha.1'),
+    ('1.0.0-alpha.1', '1.0.0-alpha.beta'),
+    ('1.0.0-beta.2', '1.0.0-beta.11'),
+    ('1.0.0-rc.1', '1.0.0'),
+])
+def test_semver_ordering(older, newer):
+    assert compare_versions(older, newer) == -1
+    assert compare_versions(newer, older) == 1
+
+def test_build_metadata_is_ignored():
+    assert compare_versions('1.0.0+build.1', '1.0.0+build.2') == 0
+
+def test_invalid_versions():
+    assert parse_version('latest') is None
+    with pytest.raises(ValueError):
+        compare_versions('2.3.0', 'nightly')
+    assert not UpdateStatus('2.3.0', 'nightly', '', 0.0, '').available
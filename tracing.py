@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Tracing
+=======
+The single runner every subprocess goes through, and the phase markers that
+say what a command was doing at the time.
+
+Recording is off until enable() is called (`gitsw --trace`); after that each
+process is kept with its argv, phase, start, duration and exit code, and each
+phase as a span. The records can be printed as a summary table or written as
+Chrome trace-event JSON, which chrome://tracing and Perfetto open as a
+timeline.
+"""
+
+import json
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, TextIO, Tuple
+
+# Phase reported for work outside any phase() block
+ROOT_PHASE = 'main'
+
+class ProcessRecord(NamedTuple):
+    """One finished (or detached) subprocess."""
+    argv: Tuple[str, ...]
+    phase: str
+    start: float
+    duration: float
+    returncode: Optional[int]
+    error: str
+    thread: int
+
+class PhaseRecord(NamedTuple):
+    """One phase() block."""
+    name: str
+    start: float
+    duration: float
+    thread: int
+
+class Tracer:
+    """Collects process and phase records for one command."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.processes: List[ProcessRecord] = []
+        self.phases: List[PhaseRecord] = []
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        """Start recording; times are relative to this call."""
+        self.enabled = True
+        self._origin = time.perf_counter()
+
+    def current_phase(self) -> str:
+        """The innermost phase on this thread."""
+        stack = getattr(self._local, 'phases', None)
+        return stack[-1] if stack else ROOT_PHASE
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Attribute the processes started inside the block to name."""
+        stack = getattr(self._local, 'phases', None)
+        if stack is None:
+            stack = self._local.phases = []
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stack.pop()
+            if self.enabled:
+                record = PhaseRecord(name, start - self._origin, time.perf_counter() - start, threading.get_ident())
+                with self._lock:
+                    self.phases.append(record)
+
+    def _record(self, argv: Sequence[str], start: float, returncode: Optional[int], error: str = '') -> None:
+        """Keep one process record."""
+        record = ProcessRecord(tuple(str(arg) for arg in argv), self.current_phase(), start - self._origin,
+                               time.perf_counter() - start, returncode, error, threading.get_ident())
+        with self._lock:
+            self.processes.append(record)
+
+    def run(self, argv: Sequence[str], **kwargs: Any) -> subprocess.CompletedProcess:
+        """subprocess.run() that records the call when tracing is on."""
+        if not self.enabled:
+            return subprocess.run(argv, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            result = subprocess.run(argv, **kwargs)
+        except subprocess.CalledProcessError as e:
+            self._record(argv, start, e.returncode)
+            raise
+        except subprocess.TimeoutExpired:
+            self._record(argv, start, None, 'timeout')
+            raise
+        except OSError as e:
+            self._record(argv, start, None, e.strerror or str(e))
+            raise
+        self._record(argv, start, result.returncode)
+        return result
+
+    def popen(self, argv: Sequence[str], **kwargs: Any) -> subprocess.Popen:
+        """subprocess.Popen() for detached processes; only the spawn is timed."""
+        if not self.enabled:
+            return subprocess.Popen(argv, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            process = subprocess.Popen(argv, **kwargs)
+        except OSError as e:
+            self._record(argv, start, None, e.strerror or str(e))
+            raise
+        self._record(argv, start, None, 'detached')
+        return process
+
+    def summary(self) -> List[Tuple[str, str, int, float, float, int]]:
+        """Rows of (phase, command, calls, total s, max s, non-zero exits), slowest first.
+
+        Commands are grouped by program and first word (`git config`,
+        `ssh -T`), so a hundred connection tests make one row.
+        """
+        groups: Dict[Tuple[str, str], List[ProcessRecord]] = {}
+        for record in self.processes:
+            command = ' '.join(os.path.basename(arg) if i == 0 else arg for i, arg in enumerate(record.argv[:2]))
+            groups.setdefault((record.phase, command), []).append(record)
+
+        rows = []
+        for (phase, command), records in groups.items():
+            nonzero = sum(1 for record in records if record.returncode not in (0, None) or
+                           record.error not in ('', 'detached'))
+            rows.append((phase, command, len(records), sum(record.duration for record in records),
+                         max(record.duration for record in records), nonzero))
+        return sorted(rows, key=lambda row: row[3], reverse=True)
+
+    def print_summary(self, stream: TextIO) -> None:
+        """Print the summary table, then phase and total times."""
+        rows = self.summary()
+        phase_width = max([len('Phase')] + [len(row[0]) for row in rows])
+        command_width = max([len('Command')] + [len(row[1]) for row in rows])
+        stream.write(f"{'Phase':<{phase_width}}  {'Command':<{command_width}}  {'Calls':>5}  "
+                     f"{'Total':>9}  {'Max':>9}  {'Nonzero':>7}\n")
+        for phase, command, calls, total, longest, nonzero in rows:
+            stream.write(f"{phase:<{phase_width}}  {command:<{command_width}}  {calls:>5}  "
+                         f"{total * 1000:>7.1f}ms  {longest * 1000:>7.1f}ms  {nonzero:>7}\n")
+
+        phase_totals: Dict[str, float] = {}
+        for record in self.phases:
+            phase_totals[record.name] = phase_totals.get(record.name, 0.0) + record.duration
+        if phase_totals:
+            stream.write('\n' + '  '.join(f"{name} {total * 1000:.1f}ms"
+                                          for name, total in phase_totals.items()) + '\n')
+        elapsed = time.perf_counter() - self._origin
+        stream.write(f"{len(self.processes)} processes, "
+                     f"{sum(record.duration for record in self.processes) * 1000:.1f}ms in subprocesses, "
+                     f"{elapsed * 1000:.1f}ms total\n")
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Return the records as a Chrome trace-event document."""
+        pid = os.getpid()
+        threads: Dict[int, int] = {threading.main_thread().ident or 0: 0}
+        events: List[Dict[str, Any]] = [
+            {'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': 'gitsw'}},
+        ]
+
+        def tid(thread: int) -> int:
+            # Small stable ids read better in the viewer than pthread addresses
+            return threads.setdefault(thread, len(threads))
+
+        for record in self.phases:
+            events.append({'name': record.name, 'cat': 'phase', 'ph': 'X', 'pid': pid, 'tid': tid(record.thread),
+                           'ts': record.start * 1e6, 'dur': record.duration * 1e6})
+        for record in self.processes:
+            events.append({
+                'name': ' '.join(record.argv[:2]), 'cat': 'subprocess', 'ph': 'X', 'pid': pid,
+                'tid': tid(record.thread), 'ts': record.start * 1e6, 'dur': record.duration * 1e6,
+                'args': {'argv': list(record.argv), 'phase': record.phase,
+                         'returncode': record.returncode, 'error': record.error},
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path: Path) -> None:
+        """Write chrome_trace() to path."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+
+# The process-wide tracer the manager and CLI use
+TRACER = Tracer()
+
+run = TRACER.run
+popen = TRACER.popen
+phase = TRACER.phase
+
+__all__ = ['ROOT_PHASE', 'TRACER', 'PhaseRecord', 'ProcessRecord', 'Tracer', 'phase', 'popen', 'run']
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Update Check
+============
+Looks up the latest GitHub release without ever making the caller wait
+longer than a fixed timeout.
+
+The answer (and the response's ETag) is cached on disk. While the cache is
+younger than its TTL no request is made at all; after that the request sends
+If-None-Match, so an unchanged release costs a 304 and no body. Checks run
+on a daemon thread, and callers wait for them only as long as they choose:
+a captive portal or a black-holed DNS lookup leaves a thread behind, not a
+hung menu.
+
+RELEASES_URL can be overridden with GITSW_RELEASES_URL, which is how the
+check is pointed at a local stub server.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from file_lock import atomic_write
+
+RELEASES_URL = 'https://api.github.com/repos/nhatpm3124/git-switch/releases/latest'
+RELEASES_PAGE = 'https://github.com/nhatpm3124/git-switch/releases'
+UPDATE_TTL = 24 * 60 * 60        # seconds a successful answer is trusted
+UPDATE_RETRY_TTL = 60 * 60       # seconds before retrying after a failure
+UPDATE_TIMEOUT = 3.0             # seconds, per socket operation and per wait
+
+# MAJOR.MINOR[.PATCH][-PRERELEASE][+BUILD], with an optional leading v
+VERSION_PATTERN = re.compile(r'^v?(\d+)\.(\d+)(?:\.(\d+))?(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$')
+
+Version = Tuple[int, int, int, Tuple[Tuple[int, int, str], ...]]
+
+def parse_version(text: str) -> Optional[Version]:
+    """Parse a semantic version into a sortable tuple, or None if it isn't one.
+
+    Pre-release identifiers compare numerically when numeric and below any
+    alphanumeric identifier, as semver specifies; build metadata is ignored.
+    """
+    match = VERSION_PATTERN.match(text.strip())
+    if not match:
+        return None
+    major, minor, patch, prerelease = match.groups()
+    identifiers = tuple((0, int(part), '') if part.isdigit() else (1, 0, part)
+                        for part in prerelease.split('.')) if prerelease else ()
+    return int(major), int(minor), int(patch or 0), identifiers
+
+def compare_versions(left: str, right: str) -> int:
+    """Return -1, 0 or 1 as left is older than, equal to or newer than right."""
+    a, b = parse_version(left), parse_version(right)
+    if a is None or b is None:
+        raise ValueError(f"not a semantic version: '{left if a is None else right}'")
+    if a[:3] != b[:3]:
+        return -1 if a[:3] < b[:3] else 1
+    # A release outranks its pre-releases
+    if a[3] == b[3]:
+        return 0
+    if not a[3] or not b[3]:
+        return 1 if not a[3] else -1
+    return -1 if a[3] < b[3] else 1
+
+class UpdateStatus(NamedTuple):
+    """What is known about the latest release."""
+    current: str
+    latest: str
+    url: str
+    checked_at: float
+    error: str
+
+    @property
+    def available(self) -> bool:
+        """True when latest is a strictly newer version than current."""
+        try:
+            return bool(self.latest) and compare_versions(self.latest, self.current) > 0
+        except ValueError:
+            return False
+
+class UpdateChecker:
+    """Cached, conditional, time-bounded release lookups."""
+
+    def __init__(self, cache_path: Path, current: str, url: Optional[str] = None,
+                 ttl: float = UPDATE_TTL, timeout: float = UPDATE_TIMEOUT) -> None:
+        self.cache_path = cache_path
+        self.current = current
+        self.url = url or os.environ.get('GITSW_RELEASES_URL') or RELEASES_URL
+        self.ttl = ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def load_cache(self) -> Dict[str, Any]:
+        """Return the cached answer ({} if there is none)."""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # A cache written for another endpoint says nothing about this one
+        return cache if isinstance(cache, dict) and cache.get('source') == self.url else {}
+
+    def _save_cache(self, cache: Dict[str, Any]) -> None:
+        """Replace the cache file atomically; a failed write only costs a re-check."""
+        try:
+            atomic_write(self.cache_path, json.dumps(cache), durable=False)
+        except OSError:
+            pass
+
+    def is_fresh(self, cache: Dict[str, Any]) -> bool:
+        """Whether a cached answer (or failure) is recent enough to skip the network."""
+        ttl = UPDATE_RETRY_TTL if cache.get('error') else self.ttl
+        return 0 <= time.time() - cache.get('checked_at', 0) < ttl
+
+    def status(self, cache: Optional[Dict[str, Any]] = None) -> UpdateStatus:
+        """Build a status from a cache dict (default: the one on disk)."""
+        cache = self.load_cache() if cache is None else cache
+        return UpdateStatus(self.current, cache.get('latest', ''), cache.get('url', ''),
+                            cache.get('checked_at', 0.0), cache.get('error', ''))
+
+    def check(self, force: bool = False) -> UpdateStatus:
+        """Return the latest release, asking GitHub only if the cache is stale (or force)."""
+        with self._lock:
+            cache = self.load_cache()
+            if not force and self.is_fresh(cache):
+                return self.status(cache)
+            cache = self._fetch(cache)
+            self._save_cache(cache)
+            return self.status(cache)
+
+    def _fetch(self, cache: Dict[str, Any]) -> Dict[str, Any]:
+        """Make one conditional request and return the updated cache."""
+        import urllib.error
+        import urllib.request
+
+        headers = {'Accept': 'application/vnd.github+json', 'User-Agent': f'gitsw/{self.current}'}
+        if cache.get('etag') and cache.get('latest'):
+            headers['If-None-Match'] = cache['etag']
+        request = urllib.request.Request(self.url, headers=headers)
+        updated = {key: cache[key] for key in ('latest', 'url', 'etag') if key in cache}
+        updated.update(source=self.url, checked_at=time.time(), error='')
+
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                data = json.loads(response.read().decode('utf-8'))
+                updated['etag'] = response.headers.get('ETag', '')
+            updated['latest'] = str(data.get('tag_name', '')).lstrip('v')
+            updated['url'] = data.get('html_url', '') or RELEASES_PAGE
+        except urllib.error.HTTPError as e:
+            if e.code != 304:
+                updated['error'] = f"HTTP {e.code}"
+        except (OSError, ValueError, AttributeError) as e:
+            # URLError, timeouts and resets are OSErrors; bad JSON is a ValueError
+            updated['error'] = str(getattr(e, 'reason', None) or e) or type(e).__name__
+        return updated
+
+    def start(self, force: bool = False) -> None:
+        """Run check() on a daemon thread, unless one is already running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self.check, kwargs={'force': force}, daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> UpdateStatus:
+        """Wait up to timeout seconds for the running check; then report what is known."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(self.timeout if timeout is None else timeout)
+            if thread.is_alive():
+                stale = self.status()
+                return stale._replace(error=f"no answer within {self.timeout if timeout is None else timeout:g}s")
+        return self.status()
+
+__all__ = [
+    'RELEASES_PAGE', 'RELEASES_URL', 'UPDATE_RETRY_TTL', 'UPDATE_TIMEOUT', 'UPDATE_TTL', 'UpdateChecker',
+    'UpdateStatus', 'compare_versions', 'parse_version',
+]